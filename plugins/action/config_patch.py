@@ -0,0 +1,20 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.sonic.plugins.module_utils.patch import PatchError, patch_tables
+from ansible_collections.community.sonic.plugins.plugin_utils.snapshot import SnapshotActionModule
+
+
+class ActionModule(SnapshotActionModule):
+
+    def snapshot_tables(self, module_args):
+        if module_args.get('patch') is not None:
+            try:
+                return patch_tables(module_args['patch'])
+            except PatchError:
+                # The module reports the error
+                return ()
+        return tuple(module_args.get('config') or ())
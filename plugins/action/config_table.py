@@ -0,0 +1,13 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.sonic.plugins.plugin_utils.snapshot import SnapshotActionModule
+
+
+class ActionModule(SnapshotActionModule):
+
+    def snapshot_tables(self, module_args):
+        return (module_args.get('table'),)
@@ -0,0 +1,205 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+name: sonic_perf
+type: aggregate
+short_description: Summarize the cost of the community.sonic tasks of a play
+version_added: "0.4.0"
+description:
+    - Aggregates the wall time, database round trips, keys written and changed ratio of every C(community.sonic) task,
+      per host and per module, and prints a summary at the end of the playbook.
+    - The database figures come from the C(perf) result of the modules, set C(ANSIBLE_SONIC_PERF=true) in the
+      C(environment) of the play to have every module return it. Without it only the wall time and changed ratio are
+      collected.
+requirements:
+    - enable in configuration, for example C(callbacks_enabled = community.sonic.sonic_perf) in C(ansible.cfg)
+options:
+    top:
+        description: The number of slowest tasks and hosts to list
+        type: int
+        default: 10
+        env:
+            - name: ANSIBLE_SONIC_PERF_TOP
+        ini:
+            - section: callback_sonic_perf
+              key: top
+    output:
+        description: Also write the aggregated figures as JSON to this file
+        type: path
+        env:
+            - name: ANSIBLE_SONIC_PERF_OUTPUT
+        ini:
+            - section: callback_sonic_perf
+              key: output
+author:
+    - Christian Svensson (@bluecmd)
+'''
+
+import json
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+
+COLLECTION_PREFIX = 'community.sonic.'
+
+# The perf figures that are summed up
+PERF_COUNTERS = ('round_trips', 'commands', 'keys_written', 'bytes_read', 'bytes_written')
+
+
+def empty_stats():
+    stats = {'tasks': 0, 'changed': 0, 'failed': 0, 'wall_time': 0.0, 'module_time': 0.0}
+    stats.update((c, 0) for c in PERF_COUNTERS)
+    return stats
+
+
+def result_perf(result):
+    """Returns the perf dicts of a result, one per loop item and per namespace with all_namespaces"""
+    if 'perf' in result:
+        return [result['perf']]
+    perfs = list()
+    for r in result.get('results', ()):
+        if isinstance(r, dict):
+            perfs.extend(result_perf(r))
+    namespaces = result.get('namespaces')
+    if isinstance(namespaces, dict):
+        for r in namespaces.values():
+            if isinstance(r, dict) and 'perf' in r:
+                perfs.append(r['perf'])
+    return perfs
+
+
+class PerfAggregator(object):
+    """Collects the cost of tasks per host and per module"""
+
+    def __init__(self):
+        self.tasks = list()
+
+    def add(self, host, module, task, wall_time, result):
+        item = {
+            'host': host,
+            'module': module,
+            'task': task,
+            'wall_time': wall_time,
+            'changed': bool(result.get('changed')),
+            'failed': bool(result.get('failed')),
+            'module_time': 0.0,
+        }
+        item.update((c, 0) for c in PERF_COUNTERS)
+        for perf in result_perf(result):
+            item['module_time'] += perf.get('total', 0.0)
+            for c in PERF_COUNTERS:
+                item[c] += perf.get(c, 0)
+        self.tasks.append(item)
+
+    def _group(self, *fields):
+        groups = dict()
+        for item in self.tasks:
+            stats = groups.setdefault(tuple(item[f] for f in fields), empty_stats())
+            stats['tasks'] += 1
+            stats['changed'] += item['changed']
+            stats['failed'] += item['failed']
+            for c in ('wall_time', 'module_time') + PERF_COUNTERS:
+                stats[c] += item[c]
+        return groups
+
+    def by_host(self):
+        return {k[0]: v for k, v in self._group('host').items()}
+
+    def by_module(self):
+        return {k[0]: v for k, v in self._group('module').items()}
+
+    def by_host_module(self):
+        hosts = dict()
+        for (host, module), stats in self._group('host', 'module').items():
+            hosts.setdefault(host, dict())[module] = stats
+        return hosts
+
+    def slowest_tasks(self, top):
+        return sorted(self.tasks, key=lambda t: t['wall_time'], reverse=True)[:top]
+
+    def slowest_hosts(self, top):
+        """Returns (host, stats, ratio to the median host) of the slowest hosts"""
+        hosts = sorted(self.by_host().items(), key=lambda h: h[1]['wall_time'], reverse=True)
+        if not hosts:
+            return []
+        times = sorted(s['wall_time'] for h, s in hosts)
+        median = times[len(times) // 2]
+        return [(h, s, s['wall_time'] / median if median else 1.0) for h, s in hosts[:top]]
+
+    def to_dict(self):
+        return {
+            'modules': self.by_module(),
+            'hosts': self.by_host_module(),
+            'tasks': self.tasks,
+        }
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'community.sonic.sonic_perf'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self.aggregator = PerfAggregator()
+        self.started = dict()
+
+    def v2_runner_on_start(self, host, task):
+        self.started[(host.get_name(), task._uuid)] = time.monotonic()
+
+    def _record(self, result):
+        task = result._task
+        module = getattr(task, 'resolved_action', None) or task.action
+        host = result._host.get_name()
+        start = self.started.pop((host, task._uuid), None)
+        if not module or not module.startswith(COLLECTION_PREFIX):
+            return
+        wall_time = time.monotonic() - start if start is not None else 0.0
+        self.aggregator.add(host, module[len(COLLECTION_PREFIX):], task.get_name(), wall_time, result._result)
+
+    def v2_runner_on_ok(self, result):
+        self._record(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result)
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result)
+
+    def v2_runner_on_skipped(self, result):
+        task = result._task
+        self.started.pop((result._host.get_name(), task._uuid), None)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.aggregator.tasks:
+            return
+        top = self.get_option('top')
+
+        self._display.banner('SONIC PERF: MODULES')
+        for module, s in sorted(self.aggregator.by_module().items(), key=lambda m: m[1]['wall_time'], reverse=True):
+            self._display.display(
+                f'{module:<24} tasks={s["tasks"]:<5} wall={s["wall_time"]:.2f}s '
+                f'mean={s["wall_time"] / s["tasks"]:.3f}s round_trips={s["round_trips"]} '
+                f'keys_written={s["keys_written"]} changed={s["changed"]}/{s["tasks"]}')
+
+        self._display.banner('SONIC PERF: SLOWEST TASKS')
+        for t in self.aggregator.slowest_tasks(top):
+            self._display.display(
+                f'{t["host"]} | {t["module"]} | {t["task"]} : {t["wall_time"]:.3f}s round_trips={t["round_trips"]}')
+
+        self._display.banner('SONIC PERF: SLOWEST HOSTS')
+        for host, s, ratio in self.aggregator.slowest_hosts(top):
+            self._display.display(
+                f'{host:<32} wall={s["wall_time"]:.2f}s ({ratio:.1f}x median) tasks={s["tasks"]} '
+                f'round_trips={s["round_trips"]} changed={s["changed"]}/{s["tasks"]}')
+
+        output = self.get_option('output')
+        if output:
+            with open(output, 'w') as f:
+                json.dump(self.aggregator.to_dict(), f, indent=2, sort_keys=True)
@@ -0,0 +1,196 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+name: redis
+short_description: Reach the SONiC databases of a switch from the controller
+version_added: "0.4.0"
+description:
+    - Connects to the redis server of a SONiC switch, by forwarding its Unix socket over SSH or directly over TCP.
+    - With this connection M(community.sonic.get_entry), M(community.sonic.vlan), M(community.sonic.vlan_member),
+      M(community.sonic.sonic_interface_port), M(community.sonic.config_table), M(community.sonic.config_patch) and
+      M(community.sonic.rollback) run on the controller and only redis commands are sent to the switch, no Python runs on
+      the switch.
+    - Other modules can't be run with this connection. The I(dest) of M(community.sonic.get_entry) is a path on the
+      controller with this connection, as are the journals of the I(checkpoint) option. The journals, and the other
+      state the modules keep, are kept per switch, identified by I(remote_addr) and the port or socket of redis.
+    - The SSH connection forwarding the socket is kept open for I(persist) seconds after the last task, so later tasks
+      reuse it.
+author:
+    - Christian Svensson (@bluecmd)
+options:
+    remote_addr:
+        description: The address of the switch
+        type: str
+        default: inventory_hostname
+        vars:
+            - name: inventory_hostname
+            - name: ansible_host
+    port:
+        description: The SSH port of the switch
+        type: int
+        vars:
+            - name: ansible_port
+    remote_user:
+        description: The user to log in as
+        type: str
+        vars:
+            - name: ansible_user
+    private_key_file:
+        description: The private key to log in with
+        type: path
+        vars:
+            - name: ansible_private_key_file
+    ssh_executable:
+        description: The ssh client to forward the redis socket with
+        type: str
+        default: ssh
+        vars:
+            - name: ansible_ssh_executable
+    ssh_extra_args:
+        description: Extra arguments to the ssh client
+        type: str
+        default: ''
+        vars:
+            - name: ansible_ssh_extra_args
+    redis_socket:
+        description: The path of the redis Unix socket on the switch
+        type: str
+        default: /var/run/redis/redis.sock
+        vars:
+            - name: ansible_sonic_redis_socket
+    redis_port:
+        description:
+            - Connect directly to redis on this TCP port of the switch instead of forwarding the socket over SSH.
+            - Only use this on networks where the redis port of the switch can be reached safely.
+        type: int
+        vars:
+            - name: ansible_sonic_redis_port
+    persist:
+        description: The number of seconds to keep the SSH connection open after the last task
+        type: int
+        default: 60
+        vars:
+            - name: ansible_sonic_redis_persist
+    timeout:
+        description: The number of seconds to wait for the connection and for replies from redis
+        type: int
+        default: 30
+        vars:
+            - name: ansible_timeout
+'''
+
+import hashlib
+import os
+import shlex
+import subprocess
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.plugins.connection import ConnectionBase
+from ansible_collections.community.sonic.plugins.plugin_utils.resp import RespClient
+
+
+def forward_paths(host, port, user, redis_socket):
+    """The local socket and SSH control path for a switch, under ~/.ansible"""
+    digest = hashlib.sha1(f'{user}@{host}:{port}:{redis_socket}'.encode()).hexdigest()[:16]
+    directory = os.path.join(os.path.expanduser('~'), '.ansible', 'sonic_redis')
+    return os.path.join(directory, f'{digest}.sock'), os.path.join(directory, f'{digest}.ctl')
+
+
+def forward_command(ssh_executable, host, port, user, private_key_file, ssh_extra_args, redis_socket,
+                    local_socket, control_path, persist):
+    """The ssh command forwarding the redis socket of the switch to local_socket"""
+    command = [
+        ssh_executable, '-f', '-N',
+        '-o', 'ExitOnForwardFailure=yes',
+        '-o', 'StreamLocalBindUnlink=yes',
+        '-o', 'ControlMaster=auto',
+        '-o', f'ControlPath={control_path}',
+        '-o', f'ControlPersist={persist}',
+        '-L', f'{local_socket}:{redis_socket}',
+    ]
+    if port:
+        command.extend(['-p', str(port)])
+    if user:
+        command.extend(['-l', user])
+    if private_key_file:
+        command.extend(['-i', private_key_file])
+    command.extend(shlex.split(ssh_extra_args or ''))
+    command.append(host)
+    return command
+
+
+class Connection(ConnectionBase):
+    """Connection to the redis server of a SONiC switch"""
+
+    transport = 'community.sonic.redis'
+    has_pipelining = False
+
+    def __init__(self, *args, **kwargs):
+        super(Connection, self).__init__(*args, **kwargs)
+        self._local_socket = None
+
+    def _forward(self):
+        host = self.get_option('remote_addr')
+        port = self.get_option('port')
+        user = self.get_option('remote_user')
+        redis_socket = self.get_option('redis_socket')
+        local_socket, control_path = forward_paths(host, port, user, redis_socket)
+        try:
+            RespClient.unix(local_socket, self.get_option('timeout')).close()
+            return local_socket
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(local_socket), mode=0o700, exist_ok=True)
+        command = forward_command(
+            self.get_option('ssh_executable'), host, port, user, self.get_option('private_key_file'),
+            self.get_option('ssh_extra_args'), redis_socket, local_socket, control_path, self.get_option('persist'))
+        self._display.vvv(f'FORWARD REDIS SOCKET: {shlex.join(command)}', host=host)
+        p = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                           timeout=self.get_option('timeout'))
+        if p.returncode != 0:
+            raise AnsibleConnectionFailure(f'failed to forward the redis socket of {host}: {p.stderr.decode().strip()}')
+        return local_socket
+
+    def _connect(self):
+        if not self._connected:
+            if self.get_option('redis_port') is None:
+                self._local_socket = self._forward()
+            self._connected = True
+        return self
+
+    def redis_client(self):
+        """Returns a new connection to redis on the switch"""
+        self._connect()
+        timeout = self.get_option('timeout')
+        try:
+            if self._local_socket is None:
+                return RespClient.tcp(self.get_option('remote_addr'), self.get_option('redis_port'), timeout)
+            return RespClient.unix(self._local_socket, timeout)
+        except OSError as e:
+            raise AnsibleConnectionFailure(f'failed to connect to redis on {self.get_option("remote_addr")}: {e}')
+
+    def state_host(self):
+        """Identifies the redis server of the switch, the modules keep their state per switch"""
+        target = self.get_option('redis_port') or f'{self.get_option("port") or 22}:{self.get_option("redis_socket")}'
+        return f'{self.get_option("remote_addr")}:{target}'
+
+    def _unsupported(self):
+        raise AnsibleConnectionFailure(
+            'the community.sonic.redis connection only supports the community.sonic modules that run on the controller')
+
+    def exec_command(self, cmd, in_data=None, sudoable=True):
+        self._unsupported()
+
+    def put_file(self, in_path, out_path):
+        self._unsupported()
+
+    def fetch_file(self, in_path, out_path):
+        self._unsupported()
+
+    def close(self):
+        # The SSH master keeps the forward open for the next tasks
+        self._connected = False
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+
+    # Options shared by the modules writing to the configuration database
+    DOCUMENTATION = r'''
+options:
+    snapshot:
+        description:
+            - Configuration database tables to compute the changes against, instead of reading them from the switch.
+            - This is set by the action plugin from the C(sonic_snapshot) fact gathered by M(community.sonic.sonic_snapshot),
+              there should be no need to set it directly. The fact is only used when the task runs in the I(namespace) the
+              snapshot was taken in, and never with I(all_namespaces).
+            - Before writing, the entries that are about to change are read back from the switch. If they changed since the
+              snapshot was taken the module fails with C(snapshot_stale) set, and the action plugin runs it again without the snapshot.
+        type: dict
+        version_added: "0.4.0"
+    plan:
+        description:
+            - Compute the changes like a normal run but, instead of writing them, save them to this file on the switch,
+              together with hashes of the entries they were computed against.
+            - Apply the file later with I(apply_plan), for example to move the reading and diffing of a large change out
+              of a maintenance window.
+            - In check mode no plan is written.
+        type: path
+        version_added: "0.4.0"
+    apply_plan:
+        description:
+            - Write the changes saved to this file on the switch by an earlier run with I(plan), instead of computing them.
+            - The entries the plan touches are read first, if any of them changed since the plan was made nothing is written
+              and the module fails with C(plan_stale) set.
+            - The other options of the module must still be valid, but don't change what is written.
+            - Mutually exclusive with I(plan).
+        type: path
+        version_added: "0.4.0"
+    checkpoint:
+        description:
+            - Record the entries of the keys the module changes in the journal of this checkpoint on the switch, before
+              changing them, so M(community.sonic.rollback) can restore them.
+            - A key is only recorded the first time it changes, modules run with the same checkpoint add their keys to it,
+              and the checkpoint restores the entries from before the first of them.
+            - The name can have letters, digits, C(_), C(.) and C(-). Every namespace has its own journal.
+            - If not set, the C(ANSIBLE_SONIC_CHECKPOINT) environment variable on the switch is used, set it with the play
+              C(environment) keyword to record every change of the play.
+        type: str
+        version_added: "0.4.0"
+    perf:
+        description:
+            - Return the C(perf) dict with the time spent in each phase of the module run, the number of database round trips
+              and commands, the approximate number of bytes read and written, and the number of keys written.
+            - The phases are C(import) of swsscommon, C(connect) to the database, C(read), C(write) and C(compute),
+              the time spent in the module itself, mostly computing the changes.
+            - If not set, the C(ANSIBLE_SONIC_PERF) environment variable on the switch is used, set it with the task
+              or play C(environment) keyword to profile every task.
+        type: bool
+        default: false
+        version_added: "0.4.0"
+    agent:
+        description:
+            - Send the database calls to a persistent agent on the switch, which keeps swsscommon loaded and the databases
+              connected between tasks.
+            - If the agent isn't running the module starts it and runs by itself, later tasks use the agent. If the agent
+              can't be reached the module also runs by itself.
+            - If not set, the C(ANSIBLE_SONIC_AGENT) environment variable on the switch is used.
+        type: bool
+        default: false
+        version_added: "0.4.0"
+    agent_idle_timeout:
+        description:
+            - The number of seconds the agent keeps running without any module connecting to it.
+            - Only used when the module starts the agent.
+            - If not set, the C(ANSIBLE_SONIC_AGENT_IDLE_TIMEOUT) environment variable on the switch is used.
+        type: int
+        default: 600
+        version_added: "0.4.0"
+    namespace:
+        description:
+            - The namespace of the databases to use on a multi-ASIC switch, like C(asic0). By default the databases of the
+              host are used, which on a switch with a single ASIC are the only ones.
+            - Not supported when the module runs on the controller.
+        type: str
+        version_added: "0.4.0"
+    all_namespaces:
+        description:
+            - Run the module once in every namespace of a multi-ASIC switch, the host included, concurrently. The results
+              of the runs are returned in C(namespaces), keyed by namespace, the host is C('').
+            - Ports belong to one namespace, interfaces that are configured are only configured in the namespace that has
+              them, and the module fails if no namespace has them.
+            - The module fails if any of the runs failed, the runs in the other namespaces are not undone.
+            - Mutually exclusive with I(namespace), I(snapshot), I(plan) and I(apply_plan).
+        type: bool
+        default: false
+        version_added: "0.4.0"
+'''
+
+    # Options of the modules that can wait for their changes to be applied
+    WAIT = r'''
+options:
+    wait:
+        description:
+            - After writing, wait until the daemons of the switch applied the changes, see the description of the module for
+              what is waited for.
+            - When the module runs on the switch without the agent, the changes are watched through keyspace notifications
+              and the wait ends as soon as they are applied, otherwise they are polled.
+            - Nothing is waited for in check mode, with I(plan), or when nothing changed.
+        type: bool
+        default: false
+        version_added: "0.4.0"
+    wait_timeout:
+        description:
+            - The number of seconds to wait with I(wait). If the changes aren't applied by then the module fails, with the
+              keys that weren't applied in C(pending).
+        type: int
+        default: 60
+        version_added: "0.4.0"
+'''
+
+    # Options shared by all modules
+    COMMON = r'''
+options:
+    perf:
+        description:
+            - Return the C(perf) dict with the time spent in each phase of the module run, the number of database round trips
+              and commands, the approximate number of bytes read and written, and the number of keys written.
+            - The phases are C(import) of swsscommon, C(connect) to the database, C(read), C(write) and C(compute),
+              the time spent in the module itself, mostly computing the changes.
+            - If not set, the C(ANSIBLE_SONIC_PERF) environment variable on the switch is used, set it with the task
+              or play C(environment) keyword to profile every task.
+        type: bool
+        default: false
+        version_added: "0.4.0"
+    agent:
+        description:
+            - Send the database calls to a persistent agent on the switch, which keeps swsscommon loaded and the databases
+              connected between tasks.
+            - If the agent isn't running the module starts it and runs by itself, later tasks use the agent. If the agent
+              can't be reached the module also runs by itself.
+            - If not set, the C(ANSIBLE_SONIC_AGENT) environment variable on the switch is used.
+        type: bool
+        default: false
+        version_added: "0.4.0"
+    agent_idle_timeout:
+        description:
+            - The number of seconds the agent keeps running without any module connecting to it.
+            - Only used when the module starts the agent.
+            - If not set, the C(ANSIBLE_SONIC_AGENT_IDLE_TIMEOUT) environment variable on the switch is used.
+        type: int
+        default: 600
+        version_added: "0.4.0"
+    namespace:
+        description:
+            - The namespace of the databases to use on a multi-ASIC switch, like C(asic0). By default the databases of the
+              host are used, which on a switch with a single ASIC are the only ones.
+            - Not supported when the module runs on the controller.
+        type: str
+        version_added: "0.4.0"
+'''
@@ -0,0 +1,423 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""A persistent agent keeping swsscommon loaded and the databases connected
+
+The agent is forked from a module run and serves the connector calls of
+later module runs over a Unix socket, so they don't pay for importing
+swsscommon and connecting to redis. Connections are served concurrently.
+It exits when no module is connected and none has connected for the idle
+timeout.
+
+The protocol is one JSON object per line. A request has the database, its
+namespace, the connector method and its arguments, the response has the
+value or an error. Multi-keys are always returned joined with '|'. The
+socket lives in a directory only the user running the modules can access,
+and its name includes the protocol version, so modules of another
+collection version start their own agent.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+
+from ansible_collections.community.sonic.plugins.module_utils.entries import fix_keys
+
+AGENT_PROTOCOL = 3
+
+# The connector methods the agent serves, besides the redis commands
+AGENT_METHODS = ('get_entry', 'get_keys', 'get_table', 'get_config', 'mod_config')
+
+# How long a module waits for a response from the agent
+CLIENT_TIMEOUT = 30
+
+
+class AgentError(Exception):
+    pass
+
+
+# The switch the modules run for when they run on the controller, see use_state_host
+STATE_HOST = None
+
+
+def state_dir(uid=None):
+    """The directory for the agent socket and the caches of the modules
+
+    On the controller every switch has its own directory, so the checkpoints,
+    dirty markers and caches of one switch never mix with those of another.
+    """
+    name = f'ansible-sonic-{os.getuid() if uid is None else uid}'
+    if STATE_HOST is not None:
+        name += '-' + hashlib.sha1(STATE_HOST.encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+@contextlib.contextmanager
+def use_state_host(host):
+    """Make state_dir() the directory of host, a string identifying the switch"""
+    global STATE_HOST
+    previous = STATE_HOST
+    STATE_HOST = host
+    try:
+        yield
+    finally:
+        STATE_HOST = previous
+
+
+def state_dirs():
+    """The state directories of all users, that are private to their user"""
+    dirs = list()
+    for name in os.listdir(tempfile.gettempdir()):
+        if not name.startswith('ansible-sonic-'):
+            continue
+        path = os.path.join(tempfile.gettempdir(), name)
+        try:
+            st = os.lstat(path)
+        except OSError:
+            continue
+        if path == state_dir(st.st_uid) and os.path.isdir(path) and (st.st_mode & 0o077) == 0:
+            dirs.append(path)
+    return sorted(dirs)
+
+
+def agent_socket_path():
+    return os.path.join(state_dir(), f'agent-v{AGENT_PROTOCOL}.sock')
+
+
+def private_dir(path):
+    """Create the directory of path, returns False if it's not private to the user"""
+    directory = os.path.dirname(path)
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(directory)
+    return st.st_uid == os.getuid() and (st.st_mode & 0o077) == 0 and os.path.isdir(directory)
+
+
+def decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def redis_reply(name, reply):
+    """Make the reply of a redis command JSON serializable, like a redis-py client with decoded responses"""
+    if name == 'hgetall':
+        return {decode(f): decode(v) for f, v in dict(reply or ()).items()}
+    if name == 'scan':
+        cursor, keys = reply
+        return [int(cursor), [decode(k) for k in keys]]
+    return reply
+
+
+def run_redis_commands(client, commands, transaction=False):
+    """Run a list of redis commands, in a pipeline if the client supports it
+
+    With transaction the pipeline is sent as a MULTI/EXEC transaction. The
+    swsscommon DBConnector has no pipeline, there the commands are sent one
+    at a time, which is cheap as the agent runs on the switch. That is only
+    done for reads, call_connector applies transactions with write_commands.
+    """
+    if hasattr(client, 'pipeline'):
+        pipe = client.pipeline(transaction=transaction)
+        for name, *args in commands:
+            getattr(pipe, name)(*args)
+        return [redis_reply(c[0], r) for c, r in zip(commands, pipe.execute())]
+    results = list()
+    for name, key, *args in commands:
+        if name == 'hdel':
+            results.append(sum(client.hdel(key, field) for field in args))
+        elif name == 'hset':
+            # hset(key, field, value, mapping), the DBConnector sets one field at a time
+            mapping = dict(args[2] or ())
+            if args[0] is not None:
+                mapping[args[0]] = args[1]
+            for field, value in mapping.items():
+                client.hset(key, field, value)
+            results.append(len(mapping))
+        else:
+            results.append(redis_reply(name, getattr(client, name)(key, *args)))
+    return results
+
+
+def call_connector(config_db, method, args):
+    """Run a request on a connector, the value is JSON serializable"""
+    if method == 'scan':
+        return redis_reply('scan', config_db.get_redis_client(config_db.db_name).scan(*args))
+    if method == 'redis':
+        client = config_db.get_redis_client(config_db.db_name)
+        commands, transaction = (list(args) + [False])[:2]
+        if transaction and not hasattr(client, 'pipeline'):
+            # configdb imports this module, and swsscommon
+            from ansible_collections.community.sonic.plugins.module_utils.configdb import write_commands
+            try:
+                return write_commands(config_db, commands)
+            except ValueError as e:
+                raise AgentError(str(e))
+        return run_redis_commands(client, commands, transaction)
+    if method not in AGENT_METHODS:
+        raise AgentError(f'unsupported method {method}')
+    value = getattr(config_db, method)(*args)
+    if method == 'get_keys':
+        return ['|'.join(k) if isinstance(k, tuple) else k for k in value]
+    if method == 'get_table':
+        return fix_keys(value)
+    if method == 'get_config':
+        return {t: fix_keys(entries) for t, entries in value.items()}
+    return value
+
+
+class AgentServer(object):
+    """Serves the connector calls of module runs, a thread per connection
+
+    Module runs and the threads of a module run each have their own
+    connection, for example to wait on STATE_DB while CONFIG_DB is connected
+    or to run in every namespace, so connections are served concurrently.
+    A connector is used by one call at a time, the idle connectors of each
+    database are kept for the next calls.
+
+    connector_factory(db_name, namespace) returns a connected connector for a
+    database.
+    """
+
+    def __init__(self, path, connector_factory, idle_timeout):
+        self.path = path
+        self.connector_factory = connector_factory
+        self.idle_timeout = idle_timeout
+        self.connectors = dict()
+        self.lock = threading.Lock()
+        self.active = 0
+
+    def checkout(self, db):
+        with self.lock:
+            idle = self.connectors.get(db)
+            if idle:
+                return idle.pop()
+        return self.connector_factory(*db)
+
+    def checkin(self, db, connector):
+        with self.lock:
+            self.connectors.setdefault(db, list()).append(connector)
+
+    def dispatch(self, request):
+        db = (request['db'], request.get('namespace', ''))
+        for attempt in range(2):
+            connector = self.connector_factory(*db) if attempt else self.checkout(db)
+            try:
+                value = call_connector(connector, request['method'], request.get('args', ()))
+            except AgentError:
+                self.checkin(db, connector)
+                raise
+            except Exception:
+                # The connection may have gone stale, for example when redis
+                # was restarted, so reconnect once
+                if attempt:
+                    raise
+                continue
+            self.checkin(db, connector)
+            return value
+
+    def handle(self, conn):
+        conn.settimeout(self.idle_timeout)
+        with conn, conn.makefile('rwb') as f:
+            for line in f:
+                try:
+                    response = {'value': self.dispatch(json.loads(line))}
+                except Exception as e:
+                    response = {'error': f'{type(e).__name__}: {e}'}
+                f.write(json.dumps(response).encode() + b'\n')
+                f.flush()
+
+    def _handle(self, conn):
+        try:
+            self.handle(conn)
+        except OSError:
+            pass
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def serve(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            old_umask = os.umask(0o177)
+            try:
+                sock.bind(self.path)
+            finally:
+                os.umask(old_umask)
+            sock.listen(8)
+            sock.settimeout(self.idle_timeout)
+            while True:
+                try:
+                    conn, dummy = sock.accept()
+                except socket.timeout:
+                    with self.lock:
+                        if not self.active:
+                            break
+                    continue
+                with self.lock:
+                    self.active += 1
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            sock.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def start_agent(connector_factory, idle_timeout, path=None):
+    """Fork an agent detached from the module run
+
+    The module doesn't wait for the agent, it's used from the next run on.
+    """
+    path = path or agent_socket_path()
+    if not private_dir(path):
+        return
+    pid = os.fork()
+    if pid:
+        # Reap the intermediate child, the agent itself is reparented to init
+        os.waitpid(pid, 0)
+        return
+    try:
+        os.setsid()
+        if os.fork():
+            os._exit(0)
+        # Don't hold on to the pipes of the module run
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in range(3):
+            os.dup2(devnull, fd)
+        os.closerange(3, 1024)
+        AgentServer(path, connector_factory, idle_timeout).serve()
+    finally:
+        os._exit(0)
+
+
+class AgentClient(object):
+    def __init__(self, path=None, timeout=CLIENT_TIMEOUT):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path or agent_socket_path())
+        except OSError:
+            self.sock.close()
+            raise
+        self.f = self.sock.makefile('rwb')
+
+    def call(self, db_name, method, *args, namespace=''):
+        request = {'db': db_name, 'namespace': namespace, 'method': method, 'args': args}
+        self.f.write(json.dumps(request).encode() + b'\n')
+        self.f.flush()
+        line = self.f.readline()
+        if not line:
+            raise ConnectionError('the agent closed the connection')
+        response = json.loads(line)
+        if 'error' in response:
+            raise AgentError(response['error'])
+        return response['value']
+
+    def close(self):
+        self.f.close()
+        self.sock.close()
+
+
+class AgentRedisPipeline(object):
+    def __init__(self, connector, db_name, transaction=True):
+        self.connector = connector
+        self.db_name = db_name
+        self.transaction = transaction
+        self.commands = list()
+
+    def hdel(self, key, *fields):
+        self.commands.append(['hdel', key] + list(fields))
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self.commands.append(['hset', key, field, value, mapping])
+
+    def delete(self, *keys):
+        self.commands.append(['delete'] + list(keys))
+
+    def hgetall(self, key):
+        self.commands.append(['hgetall', key])
+
+    def scan(self, cursor, match, count):
+        self.commands.append(['scan', cursor, match, count])
+
+    def execute(self):
+        commands, self.commands = self.commands, list()
+        return self.connector._redis(self.db_name, commands, self.transaction)
+
+
+class AgentRedisClient(object):
+    """The subset of a redis client the session uses, served by the agent"""
+
+    def __init__(self, connector, db_name):
+        self.connector = connector
+        self.db_name = db_name
+
+    def scan(self, cursor, match, count):
+        return self.connector._call('scan', cursor, match, count)
+
+    def pipeline(self, transaction=True):
+        return AgentRedisPipeline(self.connector, self.db_name, transaction)
+
+
+class AgentConnector(object):
+    """A connector forwarding the calls of a session to the agent
+
+    If the agent goes away during the run, the connector falls back to the
+    connector returned by fallback(), the calls that can be retried are all
+    idempotent.
+    """
+
+    TABLE_NAME_SEPARATOR = '|'
+
+    def __init__(self, client, db_name, fallback, namespace=''):
+        self.client = client
+        self.db_name = db_name
+        self.fallback = fallback
+        self.namespace = namespace
+        self.local = None
+
+    def _call(self, method, *args):
+        if self.local is None:
+            try:
+                return self.client.call(self.db_name, method, *args, namespace=self.namespace)
+            except (OSError, ValueError):
+                self.local = self.fallback()
+        return call_connector(self.local, method, args)
+
+    def _redis(self, db_name, commands, transaction):
+        return self._call('redis', commands, transaction)
+
+    def get_entry(self, table, key):
+        return self._call('get_entry', table, key)
+
+    def get_keys(self, table):
+        return self._call('get_keys', table)
+
+    def get_table(self, table):
+        return self._call('get_table', table)
+
+    def get_config(self):
+        return self._call('get_config')
+
+    def mod_config(self, data):
+        return self._call('mod_config', data)
+
+    def get_redis_client(self, db_name):
+        return AgentRedisClient(self, db_name)
+
+
+def connect_agent(db_name, fallback, path=None, namespace=''):
+    """Returns an AgentConnector, None if the agent isn't running"""
+    try:
+        client = AgentClient(path)
+    except OSError:
+        return None
+    return AgentConnector(client, db_name, fallback, namespace)
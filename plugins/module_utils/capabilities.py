@@ -0,0 +1,197 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Port speeds and FEC modes supported by the platform
+
+The breakout modes of every front panel port are described by platform.json
+of the platform, and the default breakout mode and FEC of every port by
+hwsku.json of the hwsku, both in the device directory of the switch. The
+speeds of a port follow from the breakout mode of its front panel port in
+BREAKOUT_CFG, the FEC modes from the speed of each of its lanes.
+"""
+
+import json
+import os
+import re
+
+DEVICE_DIR = '/usr/share/sonic/device'
+MACHINE_CONF = '/host/machine.conf'
+
+# A group of a breakout mode, like 4x25G[10G] or 2x100G(4) in 1x200G(4)+2x100G(4)
+BREAKOUT_GROUP = re.compile(r'^(\d+)x(\d+)G(?:\[([\dG,]*)\])?(?:\((\d+)\))?$')
+
+# Parsed files keyed by path, modification time and size, reused for as
+# long as the process lives, by the agent for example
+_FILE_CACHE = dict()
+
+
+class BreakoutModeError(ValueError):
+    pass
+
+
+def parse_breakout_mode(mode, lanes):
+    """Returns (lanes, speeds) of the groups of a breakout mode, speeds are in Mb/s
+
+    lanes is the number of lanes of the front panel port, each group has
+    lanes for each of its ports. Raises BreakoutModeError.
+    """
+    groups = list()
+    parts = mode.split('+')
+    for part in parts:
+        m = BREAKOUT_GROUP.match(part.strip())
+        if m is None:
+            raise BreakoutModeError(f'invalid breakout mode "{mode}"')
+        count, speed, alternatives, group_lanes = m.groups()
+        count = int(count)
+        if group_lanes is None:
+            if len(parts) > 1:
+                raise BreakoutModeError(f'invalid breakout mode "{mode}", the lanes of each group are required')
+            group_lanes = lanes
+        speeds = {int(speed) * 1000}
+        speeds.update(int(s.rstrip('G')) * 1000 for s in (alternatives or '').split(',') if s)
+        for _ in range(count):
+            groups.append((int(group_lanes) // count, speeds))
+    return groups
+
+
+def supported_fec(speed, lanes):
+    """The FEC modes of a port with a speed in Mb/s over a number of lanes
+
+    PAM4 lanes of 50G and more need RS FEC, 25G lanes support RS and, for
+    ports up to 50G, FC, and slower lanes only FC.
+    """
+    lane_speed = speed // max(lanes, 1)
+    if lane_speed >= 50000:
+        modes = {'rs'}
+    elif lane_speed >= 25000:
+        modes = {'none', 'rs', 'fc'} if speed <= 50000 else {'none', 'rs'}
+    else:
+        modes = {'none', 'fc'}
+    return modes | {'auto'}
+
+
+def format_speed(speed):
+    """Human readable form of a speed in Mb/s, 100000 is 100G"""
+    return f'{speed // 1000}G' if speed >= 1000 and speed % 1000 == 0 else f'{speed}M'
+
+
+def _lanes(entry):
+    return [lane.strip() for lane in entry.get('lanes', '').split(',') if lane.strip()]
+
+
+class PortCapabilities(object):
+    """The speeds and FEC modes of the ports of a switch
+
+    platform is the parsed platform.json and hwsku the parsed hwsku.json,
+    breakout_cfg the BREAKOUT_CFG table.
+    """
+
+    def __init__(self, platform, hwsku=None, breakout_cfg=None):
+        self.front_panel = platform.get('interfaces', dict())
+        self.defaults = (hwsku or dict()).get('interfaces', dict())
+        self.breakout_cfg = breakout_cfg or dict()
+        self._lane_index = None
+
+    def front_panel_port(self, entry):
+        """Returns the name of the front panel port the lanes of a PORT entry belong to, None if unknown"""
+        if self._lane_index is None:
+            self._lane_index = {lane: name for name, port in self.front_panel.items() for lane in _lanes(port)}
+        lanes = _lanes(entry)
+        return self._lane_index.get(lanes[0]) if lanes else None
+
+    def breakout_mode(self, name):
+        mode = self.breakout_cfg.get(name, dict()).get('brkout_mode')
+        return mode or self.defaults.get(name, dict()).get('default_brkout_mode')
+
+    def speeds(self, entry):
+        """Returns the speeds in Mb/s the port with the PORT entry supports, None if unknown"""
+        name = self.front_panel_port(entry)
+        mode = self.breakout_mode(name) if name else None
+        if mode is None:
+            return None
+        lanes = _lanes(self.front_panel[name])
+        try:
+            groups = parse_breakout_mode(mode, len(lanes))
+        except BreakoutModeError:
+            return None
+        offset = lanes.index(_lanes(entry)[0])
+        for group_lanes, speeds in groups:
+            if offset < group_lanes:
+                return speeds
+            offset -= group_lanes
+        return None
+
+    def fec_modes(self, entry, speed):
+        """Returns the FEC modes the port with the PORT entry supports at a speed, None if unknown"""
+        lanes = _lanes(entry)
+        return supported_fec(speed, len(lanes)) if lanes else None
+
+    def default_fec(self, entry, speed):
+        """Returns the FEC mode a port should use at a speed, the hwsku default when it supports it"""
+        modes = self.fec_modes(entry, speed)
+        if modes is None:
+            return None
+        name = self.front_panel_port(entry)
+        fec = self.defaults.get(name, dict()).get('fec') if name else None
+        if fec in modes:
+            return fec
+        return 'rs' if 'none' not in modes else 'none'
+
+
+def read_json(path):
+    """Returns the parsed JSON file, None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _FILE_CACHE:
+        with open(path) as f:
+            _FILE_CACHE[key] = json.load(f)
+    return _FILE_CACHE[key]
+
+
+def get_platform():
+    """The platform of the switch, like sonic-py-common's device_info, None if not known"""
+    platform = os.environ.get('PLATFORM')
+    if platform:
+        return platform
+    try:
+        with open(MACHINE_CONF) as f:
+            for line in f:
+                name, _, value = line.strip().partition('=')
+                if name in ('onie_platform', 'aboot_platform'):
+                    return value
+    except OSError:
+        pass
+    return None
+
+
+def load_capabilities(session):
+    """Returns the PortCapabilities of the switch, None if its platform.json is not found
+
+    The files are only found when the module runs on the switch. The
+    DEVICE_METADATA and BREAKOUT_CFG tables are only read when they are.
+    """
+    if not os.path.isdir(DEVICE_DIR):
+        return None
+    metadata = None
+    platform = get_platform()
+    if platform is None:
+        metadata = session.get_entry('DEVICE_METADATA', 'localhost')
+        platform = metadata.get('platform')
+        if not platform:
+            return None
+    try:
+        platform_json = read_json(os.path.join(DEVICE_DIR, platform, 'platform.json'))
+        if platform_json is None:
+            return None
+        if metadata is None:
+            metadata = session.get_entry('DEVICE_METADATA', 'localhost')
+        hwsku_json = None
+        if metadata.get('hwsku'):
+            hwsku_json = read_json(os.path.join(DEVICE_DIR, platform, metadata['hwsku'], 'hwsku.json'))
+    except ValueError:
+        # Files that can't be parsed don't prevent configuring the ports
+        return None
+    return PortCapabilities(platform_json, hwsku_json, session.get_table('BREAKOUT_CFG'))
@@ -0,0 +1,957 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import contextlib
+import copy
+import json
+import os
+import re
+import tempfile
+import time
+import traceback
+
+from ansible.module_utils.basic import env_fallback, missing_required_lib
+from ansible_collections.community.sonic.plugins.module_utils.agent import (
+    connect_agent, private_dir, run_redis_commands, start_agent, state_dir, state_dirs)
+from ansible_collections.community.sonic.plugins.module_utils.entries import entry_hash, fix_keys
+
+# swsscommon is slow to import, so it's only imported when a module doesn't
+# use the agent, see import_swsscommon
+swsscommon = None
+HAS_SWSSCOMMON_LIBRARY = None
+SWSSCOMMON_IMPORT_ERROR = None
+
+# When set, connect() gets its connectors from this function instead of
+# swsscommon, see use_connector_factory
+CONNECTOR_FACTORY = None
+
+# Connector calls that write to the database, all others read
+WRITE_CALLS = ('mod_config', 'set_entry', 'mod_entry', 'hdel', 'write')
+
+# The version of the plan files, see the plan option
+PLAN_VERSION = 1
+
+# The version of the checkpoint journals, see the checkpoint option
+CHECKPOINT_VERSION = 1
+CHECKPOINT_NAME = re.compile(r'^[\w.-]+$')
+
+
+class StaleSnapshotError(Exception):
+    pass
+
+
+class StalePlanError(Exception):
+    pass
+
+
+def import_swsscommon():
+    """Import swsscommon on first use, returns whether it's available"""
+    global swsscommon, HAS_SWSSCOMMON_LIBRARY, SWSSCOMMON_IMPORT_ERROR
+    if HAS_SWSSCOMMON_LIBRARY is None:
+        try:
+            from swsscommon import swsscommon
+        except ImportError:
+            HAS_SWSSCOMMON_LIBRARY = False
+            SWSSCOMMON_IMPORT_ERROR = traceback.format_exc()
+        else:
+            HAS_SWSSCOMMON_LIBRARY = True
+    return HAS_SWSSCOMMON_LIBRARY
+
+
+def join_key(key):
+    if isinstance(key, tuple):
+        return '|'.join(key)
+    return key
+
+
+def raw_to_typed(raw):
+    """Decode a hash read with HGETALL like ConfigDBConnector does, None if the key doesn't exist"""
+    if not raw:
+        return None
+    entry = dict()
+    for field, value in raw.items():
+        # NULL:NULL is the placeholder of entries without fields
+        if field == 'NULL':
+            continue
+        if field.endswith('@'):
+            entry[field[:-1]] = value.split(',')
+        else:
+            entry[field] = value
+    return entry
+
+
+def typed_to_raw(entry):
+    """Encode an entry for HSET like ConfigDBConnector does"""
+    if not entry:
+        return {'NULL': 'NULL'}
+    return {f'{f}@' if isinstance(v, list) else f: ','.join(v) if isinstance(v, list) else str(v) for f, v in entry.items()}
+
+
+def hdel_fields(client, hdel):
+    """Remove fields with a swsscommon RedisPipeline, in one round trip
+
+    hdel maps (table, key) to the names of the fields to remove.
+    """
+    pipe = swsscommon.RedisPipeline(client)
+    tables = dict()
+    for (table, key), fields in hdel.items():
+        if table not in tables:
+            tables[table] = swsscommon.Table(pipe, table.upper(), True)
+        for field in fields:
+            tables[table].hdel(key, field)
+    for t in tables.values():
+        t.flush()
+
+
+def write_commands(config_db, commands):
+    """Apply a transaction of HSET, DEL and HDEL commands with a swsscommon connector
+
+    The swsscommon DBConnector has no MULTI/EXEC pipeline. The changed
+    fields and removed keys are written with mod_config instead, which
+    ConfigDBPipeConnector sends as one transaction, and the removed fields
+    follow in a RedisPipeline, like ConfigDBSession does without a
+    pipeline. All commands are checked first, so if one of them is invalid
+    nothing is written. Returns None for every command.
+    """
+    separator = config_db.TABLE_NAME_SEPARATOR
+    data = dict()
+    hdel = dict()
+    for name, _hash, *args in commands:
+        table, sep, key = _hash.partition(separator)
+        if not sep or not key:
+            raise ValueError(f'{_hash} is not a key of the config db')
+        if name == 'hset' and len(args) == 3 and args[0] is None and isinstance(args[2], dict):
+            entry = data.setdefault(table, dict()).get(key) or dict()
+            entry.update(raw_to_typed(args[2]) or dict())
+            data[table][key] = entry
+        elif name == 'delete' and not args:
+            data.setdefault(table, dict())[key] = None
+        elif name == 'hdel' and args:
+            hdel.setdefault((table, key), list()).extend(args)
+        else:
+            raise ValueError(f'{name} {_hash} can not be applied in a transaction')
+    if data:
+        config_db.mod_config(data)
+    if hdel:
+        hdel_fields(config_db.get_redis_client(config_db.db_name), hdel)
+    return [None] * len(commands)
+
+
+def payload_size(data):
+    """Approximate number of bytes of config db data, as stored in redis"""
+    if data is None:
+        return 0
+    if isinstance(data, dict):
+        return sum(len(join_key(k)) + payload_size(v) for k, v in data.items())
+    if isinstance(data, (list, tuple)):
+        return sum(payload_size(v) for v in data) + max(len(data) - 1, 0)
+    return len(str(data))
+
+
+def command_count(name, args, value):
+    """The number of redis commands a connector call issues"""
+    if name == 'get_table':
+        return 1 + len(value or ())
+    if name == 'get_config':
+        return 1 + sum(len(t) for t in value.values())
+    if name == 'mod_config':
+        return sum(1 if t is None else len(t) for t in args[0].values())
+    if name == 'write':
+        return command_count('mod_config', args[:1], None) + len(args[1])
+    if name == 'pipeline':
+        return len(args[0])
+    return 1
+
+
+class PerfRecorder(object):
+    """Collects the timings of a module run, see the perf option
+
+    Time is recorded per phase, the time not spent in any phase is reported
+    as compute, which is mostly diffing.
+    """
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.phases = dict()
+        self.round_trips = 0
+        self.commands = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.keys_written = 0
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - start
+
+    def record(self, name, args, value):
+        self.round_trips += 1
+        self.commands += command_count(name, args, value)
+        if name in WRITE_CALLS:
+            self.bytes_written += sum(payload_size(a) for a in args)
+        else:
+            self.bytes_read += payload_size(value)
+
+    def result(self):
+        elapsed = time.monotonic() - self.start
+        phases = dict(self.phases)
+        phases['compute'] = max(0.0, elapsed - sum(self.phases.values()))
+        return {
+            'total': round(elapsed, 6),
+            'phases': {k: round(v, 6) for k, v in phases.items()},
+            'round_trips': self.round_trips,
+            'commands': self.commands,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'keys_written': self.keys_written,
+        }
+
+
+def perf_recorder(module):
+    """Returns the recorder of a module run, None unless the perf option is set
+
+    All sessions of a module share the recorder.
+    """
+    if module is None or not module.params.get('perf'):
+        return None
+    if getattr(module, 'sonic_perf', None) is None:
+        module.sonic_perf = PerfRecorder()
+    return module.sonic_perf
+
+
+class ConfigDBSession(object):
+    """A config db connection shared by everything in a module run
+
+    Reads go through a cache, so every table and entry is only fetched once
+    per run, and reads return any writes that are queued but not flushed yet.
+    Writes are queued and sent by flush(), changed fields, removed keys and
+    removed fields in a single MULTI/EXEC pipeline, see _write().
+    Keys are always strings, multi-keys are joined with '|'.
+    round_trips counts the calls made to the database.
+
+    Tables can be preloaded from a snapshot, a dict of tables taken earlier
+    in the play. Before writing to such a table the written keys are read
+    back from the database, and if they changed since the snapshot was taken
+    the write is aborted with StaleSnapshotError.
+
+    When plan is set to a list, flush() appends the writes to it instead of
+    sending them, see apply_plan().
+
+    When journal is set to a dict, flush() records the entries of the keys it
+    is about to write for the first time in it, and saves it to journal_path
+    before writing, so the keys can be restored by the rollback module.
+
+    Writes are recorded in the dirty marker of the namespace, before and
+    after writing, so the save_config module knows there may be changes to
+    save, see mark_dirty.
+    """
+
+    def __init__(self, config_db, module=None, snapshot=None, perf=None):
+        self.config_db = config_db
+        self.module = module
+        self.perf = perf
+        self.round_trips = 0
+        self._tables = set()
+        # (table, key) -> entry as read from the database, None if absent
+        self._entries = dict()
+        # (table, key) -> wanted entry, None to remove the key
+        self._pending = dict()
+        # (table, key) -> entry written during this run
+        self._written = dict()
+        self._snapshot_tables = set()
+        self.plan = None
+        # Set by connect() when the connector talks to the database directly,
+        # not through the agent or from the controller
+        self.local = False
+        # The namespace of the database, '' for the host or a single ASIC
+        self.namespace = ''
+        # (table, key) -> hash of the entry the plan was computed against
+        self.plan_hashes = dict()
+        # (table, key) -> entry before the first write of the checkpoint, None if absent
+        self.journal = None
+        self.journal_path = None
+        for table, entries in (snapshot or dict()).items():
+            self._tables.add(table)
+            self._snapshot_tables.add(table)
+            for key, val in entries.items():
+                self._entries[(table, key)] = val
+
+    def _call(self, name, *args):
+        self.round_trips += 1
+        if self.perf is None:
+            return getattr(self.config_db, name)(*args)
+        with self.perf.phase('write' if name in WRITE_CALLS else 'read'):
+            value = getattr(self.config_db, name)(*args)
+        self.perf.record(name, args, value)
+        return value
+
+    def _pipeline(self, commands):
+        """Run redis commands in one pipeline, returns their replies
+
+        Clients without a pipeline, like the swsscommon DBConnector, run the
+        commands one at a time.
+        """
+        client = self.config_db.get_redis_client(self.config_db.db_name)
+        self.round_trips += 1 if hasattr(client, 'pipeline') else len(commands)
+        if self.perf is None:
+            return run_redis_commands(client, commands)
+        with self.perf.phase('read'):
+            replies = run_redis_commands(client, commands)
+        self.perf.record('pipeline', (commands,), replies)
+        return replies
+
+    def _hash(self, table, key):
+        return f'{table.upper()}{self.config_db.TABLE_NAME_SEPARATOR}{key}'
+
+    def _current(self, table, key):
+        """Returns the entry as it will be after the next flush"""
+        if (table, key) in self._pending:
+            return self._pending[(table, key)]
+        if (table, key) not in self._entries:
+            if table in self._tables:
+                return None
+            self._entries[(table, key)] = self._call('get_entry', table, key) or None
+        return self._entries[(table, key)]
+
+    def get_entry(self, table, key):
+        return copy.deepcopy(self._current(table, key)) or dict()
+
+    def read_entry(self, table, key):
+        """Read an entry from the database, bypassing the cache"""
+        return self._call('get_entry', table, key) or dict()
+
+    def get_entries(self, table, keys):
+        """Returns the given keys of a table that exist, as a dict
+
+        The keys that aren't cached are read in one pipeline.
+        """
+        self.prefetch((table, k) for k in keys)
+        value = dict()
+        for key in keys:
+            val = self._current(table, join_key(key))
+            if val is not None:
+                value[join_key(key)] = copy.deepcopy(val)
+        return value
+
+    def prefetch(self, keys):
+        """Read the (table, key) pairs that aren't cached yet into the cache, all in one pipeline"""
+        missing = dict()
+        for table, key in keys:
+            key = join_key(key)
+            if table not in self._tables and (table, key) not in self._entries:
+                missing[(table, key)] = None
+        if not missing:
+            return
+        replies = self._pipeline([('hgetall', self._hash(t, k)) for t, k in missing])
+        for (table, key), raw in zip(missing, replies):
+            # Unlike get_entry, HGETALL tells an entry without fields from a missing key
+            self._entries[(table, key)] = raw_to_typed(raw)
+
+    def scan(self, table, pattern='*', count=1000):
+        """Iterate over the keys of a table matching a glob style pattern
+
+        The keys are matched on the server with SCAN, so the table is never
+        read as a whole. Yields lists of keys, about count keys at a time.
+        """
+        client = self.config_db.get_redis_client(self.config_db.db_name)
+        prefix = f'{table.upper()}{self.config_db.TABLE_NAME_SEPARATOR}'
+        cursor = 0
+        while True:
+            self.round_trips += 1
+            if self.perf is None:
+                cursor, keys = client.scan(cursor, f'{prefix}{pattern}', count)
+            else:
+                with self.perf.phase('read'):
+                    cursor, keys = client.scan(cursor, f'{prefix}{pattern}', count)
+                self.perf.record('scan', (), keys)
+            keys = [k.decode() if isinstance(k, bytes) else k for k in keys]
+            if keys:
+                yield [k[len(prefix):] for k in keys]
+            if int(cursor) == 0:
+                break
+
+    def scan_keys(self, table, pattern='*'):
+        """Returns the sorted keys of a table matching a glob style pattern"""
+        keys = list()
+        for batch in self.scan(table, pattern):
+            keys.extend(batch)
+        return sorted(set(keys))
+
+    def iter_entries(self, table, pattern='*', count=1000):
+        """Iterate over the entries of a table matching a glob style pattern
+
+        Yields (key, entry) tuples. The entries of each SCAN batch are read in
+        one pipeline, they bypass the cache, so memory use doesn't grow with
+        the size of the table.
+        """
+        for keys in self.scan(table, pattern, count):
+            replies = self._pipeline([('hgetall', self._hash(table, k)) for k in keys])
+            for key, raw in zip(keys, replies):
+                entry = raw_to_typed(raw)
+                # The key might have been removed since the scan
+                if entry is not None:
+                    yield key, entry
+
+    def has_table(self, table):
+        """Whether the whole table was read, or preloaded from a snapshot"""
+        return table in self._tables
+
+    def get_keys(self, table):
+        """Returns the sorted keys of a table, without reading the entries"""
+        if table in self._tables:
+            return sorted(self.get_table(table))
+        keys = {join_key(k) for k in self._call('get_keys', table)}
+        for (t, key), val in self._pending.items():
+            if t == table:
+                if val is None:
+                    keys.discard(key)
+                else:
+                    keys.add(key)
+        return sorted(keys)
+
+    def get_table(self, table):
+        if table not in self._tables:
+            for key, val in fix_keys(self._call('get_table', table)).items():
+                self._entries.setdefault((table, key), val)
+            self._tables.add(table)
+        value = dict()
+        for (t, key), val in self._entries.items():
+            if t == table and (t, key) not in self._pending and val is not None:
+                value[key] = val
+        for (t, key), val in self._pending.items():
+            if t == table and val is not None:
+                value[key] = val
+        return copy.deepcopy(value)
+
+    def get_config(self):
+        """Returns every table of the database, read in a single pipelined get_config call, bypassing the cache"""
+        return {table: fix_keys(entries) for table, entries in self._call('get_config').items()}
+
+    def get_tables(self, tables, count=10000):
+        """Returns a dict with the given tables
+
+        When more than one table has to be read, the tables are scanned
+        together, one pipeline per SCAN step, and their entries are read in a
+        single pipeline, instead of two calls per table. Only the keys of the
+        given tables are read, never the whole database.
+        """
+        missing = [t for t in tables if t not in self._tables]
+        if len(missing) > 1:
+            keys = self._scan_tables(missing, count)
+            hashes = [(t, k) for t in missing for k in keys[t]]
+            replies = self._pipeline([('hgetall', self._hash(t, k)) for t, k in hashes]) if hashes else []
+            for (table, key), raw in zip(hashes, replies):
+                val = raw_to_typed(raw)
+                # The key might have been removed since the scan
+                if val is not None:
+                    self._entries.setdefault((table, key), val)
+            self._tables.update(missing)
+        return {t: self.get_table(t) for t in tables}
+
+    def _scan_tables(self, tables, count):
+        """Returns the sorted keys of each table, all tables are scanned in one pipeline per SCAN step"""
+        cursors = dict.fromkeys(tables, 0)
+        keys = {t: set() for t in tables}
+        while cursors:
+            scanned = list(cursors)
+            replies = self._pipeline([('scan', cursors[t], self._hash(t, '*'), count) for t in scanned])
+            for table, (cursor, batch) in zip(scanned, replies):
+                prefix = self._hash(table, '')
+                keys[table].update((k.decode() if isinstance(k, bytes) else k)[len(prefix):] for k in batch)
+                if int(cursor) == 0:
+                    del cursors[table]
+                else:
+                    cursors[table] = int(cursor)
+        return {t: sorted(k) for t, k in keys.items()}
+
+    def set_entry(self, table, key, value):
+        """Queue a write replacing the entry, None removes the key"""
+        key = join_key(key)
+        # Make sure the current entry is known, so flush can find removed fields
+        self._current(table, key)
+        self._pending[(table, key)] = copy.deepcopy(value)
+
+    def mod_entry(self, table, key, value):
+        """Queue a write updating the given fields of the entry, None removes the key"""
+        key = join_key(key)
+        if value is None:
+            self.set_entry(table, key, None)
+            return
+        new = dict(self._current(table, key) or dict())
+        new.update(copy.deepcopy(value))
+        self._pending[(table, key)] = new
+
+    def delete_entry(self, table, key):
+        self.set_entry(table, key, None)
+
+    def apply_patch(self, table, patch):
+        """Queue a patch as returned by entries.diff_table"""
+        for key, change in patch.items():
+            if change is None:
+                self.set_entry(table, key, None)
+                continue
+            new = dict(self._current(table, key) or dict())
+            for field in change['delete']:
+                new.pop(field, None)
+            new.update((f, v) for f, v in change['set'].items() if f != 'NULL')
+            self._pending[(table, key)] = new
+
+    @property
+    def pending(self):
+        """The keys with queued writes that change the database"""
+        return sorted(k for k, v in self._pending.items() if v != self._entries.get(k))
+
+    def _check_snapshot(self, keys):
+        """Make sure the keys about to be written haven't changed since the snapshot"""
+        keys = [(t, k) for t, k in keys if t in self._snapshot_tables]
+        if not keys:
+            return
+        # All keys are read back in one pipeline
+        replies = self._pipeline([('hgetall', self._hash(t, k)) for t, k in keys])
+        stale = [f'{t}|{k}' for (t, k), raw in zip(keys, replies) if raw_to_typed(raw) != self._entries.get((t, k))]
+        if not stale:
+            return
+        msg = f'config db changed since the snapshot was taken: {", ".join(sorted(stale))}'
+        if self.module is not None:
+            self.module.fail_json(msg=msg, snapshot_stale=True)
+        raise StaleSnapshotError(msg)
+
+    def flush(self):
+        """Send all queued writes to the database
+
+        Returns the number of keys that were written.
+        """
+        self._check_snapshot(self.pending)
+
+        data = dict()
+        hdel = dict()
+        for (table, key), new in self._pending.items():
+            cur = self._entries.get((table, key))
+            if new == cur:
+                continue
+            if new is None:
+                data.setdefault(table, dict())[key] = None
+                continue
+            cur = cur or dict()
+            set_fields = {f: v for f, v in new.items() if cur.get(f) != v}
+            delete = [f'{f}@' if isinstance(v, list) else f for f, v in cur.items() if f not in new]
+            if not new and (delete or not cur):
+                # An entry without fields is stored with a NULL placeholder,
+                # this also keeps the key when all of its fields are removed
+                set_fields = {'NULL': 'NULL'}
+            if set_fields:
+                data.setdefault(table, dict())[key] = set_fields
+            if delete:
+                hdel[(table, key)] = delete
+
+        written = self.pending
+        if self.plan is not None:
+            self._add_to_plan(written)
+        else:
+            self._record_journal(written)
+            if data or hdel:
+                self._mark_dirty()
+                self._write(data, hdel)
+                self._mark_dirty()
+            # Planned writes are not in the database, so they don't update the snapshot
+            for k in written:
+                self._written[k] = self._pending[k]
+
+        if self.perf is not None:
+            self.perf.keys_written += len(written)
+        self._entries.update(self._pending)
+        self._pending = dict()
+        return len(written)
+
+    def _mark_dirty(self):
+        try:
+            mark_dirty(self.namespace)
+        except OSError as e:
+            msg = f'failed to record the write to the config db: {e}'
+            if self.module is not None:
+                self.module.fail_json(msg=msg)
+            raise
+
+    def _record_journal(self, written):
+        if self.journal is None:
+            return
+        new = [k for k in written if k not in self.journal]
+        if not new:
+            return
+        for k in new:
+            self.journal[k] = copy.deepcopy(self._entries.get(k))
+        write_checkpoint(self.journal_path, self.journal, self.namespace)
+
+    def _add_to_plan(self, written):
+        if not written:
+            return
+        for k in written:
+            self.plan_hashes.setdefault(k, entry_hash(self._entries.get(k)))
+        self.plan.append([{'table': t, 'key': k, 'entry': self._pending[(t, k)]} for t, k in written])
+
+    def plan_document(self, module_name=None):
+        """The plan as written to the plan file"""
+        return {
+            'version': PLAN_VERSION,
+            'module': module_name,
+            'hashes': [{'table': t, 'key': k, 'hash': h} for (t, k), h in sorted(self.plan_hashes.items())],
+            'batches': self.plan or [],
+        }
+
+    def apply_plan(self, plan, check_mode=False):
+        """Write the batches of a plan made by an earlier run
+
+        The entries the plan was computed against are read and compared to
+        the hashes in the plan, if any of them changed nothing is written and
+        StalePlanError is raised. Returns the number of keys written, or that
+        would be written in check mode.
+        """
+        if plan.get('version') != PLAN_VERSION:
+            raise ValueError(f'unsupported plan version {plan.get("version")}, expected {PLAN_VERSION}')
+        stale = list()
+        for item in plan['hashes']:
+            k = (item['table'], item['key'])
+            # Always read the live entry, it may have been preloaded from a snapshot
+            self._entries[k] = self._call('get_entry', *k) or None
+            if entry_hash(self._entries[k]) != item['hash']:
+                stale.append(f'{k[0]}|{k[1]}')
+        if stale:
+            raise StalePlanError(f'config db changed since the plan was made: {", ".join(sorted(stale))}')
+        count = 0
+        for batch in plan['batches']:
+            for item in batch:
+                self.set_entry(item['table'], item['key'], item['entry'])
+            if check_mode:
+                count += len(self.pending)
+                self._entries.update(self._pending)
+                self._pending = dict()
+            else:
+                count += self.flush()
+        return count
+
+    def exit_json(self, **result):
+        """Exit the module, adding the details the action plugins need to the result"""
+        if self.plan is not None:
+            path = self.module.params['plan']
+            write_file_atomic(path, json.dumps(self.plan_document(self.module._name), indent=1, sort_keys=True))
+            result['plan'] = {'path': path, 'batches': len(self.plan), 'keys': len(self.plan_hashes)}
+        if self._snapshot_tables and self._written:
+            update = dict()
+            for (table, key), val in self._written.items():
+                update.setdefault(table, dict())[key] = val
+            result['snapshot_update'] = update
+        if self.perf is not None:
+            result['perf'] = self.perf.result()
+        self.module.exit_json(**result)
+
+    def _write(self, data, hdel):
+        """Send the writes of a flush
+
+        With a redis-py style client, like that of the redis connection, the
+        changed fields, removed keys and removed fields are all sent in one
+        MULTI/EXEC pipeline. The swsscommon DBConnector has no such pipeline,
+        there mod_config writes the fields and keys in one transaction and
+        the removed fields follow in a second pipeline. The agent connects
+        with a DBConnector, it gets the commands in one call and applies them
+        the same way, see write_commands.
+        """
+        client = self.config_db.get_redis_client(self.config_db.db_name)
+        if not hasattr(client, 'pipeline'):
+            if data:
+                self._call('mod_config', data)
+            if hdel:
+                self._delete_fields(hdel)
+            return
+        commands = list()
+        for table, entries in data.items():
+            for key, fields in entries.items():
+                if fields is None:
+                    commands.append(('delete', self._hash(table, key)))
+                else:
+                    commands.append(('hset', self._hash(table, key), None, None, typed_to_raw(fields)))
+        # After the HSETs, so a key keeps its NULL placeholder when all of its fields are removed
+        commands.extend(('hdel', self._hash(t, k)) + tuple(fields) for (t, k), fields in hdel.items())
+        self.round_trips += 1
+        if self.perf is None:
+            run_redis_commands(client, commands, transaction=True)
+            return
+        with self.perf.phase('write'):
+            run_redis_commands(client, commands, transaction=True)
+        self.perf.record('write', (data, hdel), None)
+
+    def _delete_fields(self, hdel):
+        if self.perf is None:
+            self._hdel(hdel)
+            return
+        with self.perf.phase('write'):
+            self._hdel(hdel)
+        # One HDEL per key, all sent in one pipeline
+        self.perf.record('hdel', (hdel,), None)
+        self.perf.commands += len(hdel) - 1
+
+    def _hdel(self, hdel):
+        self.round_trips += 1
+        hdel_fields(self.config_db.get_redis_client(self.config_db.db_name), hdel)
+
+
+def common_argument_spec():
+    """The options shared by all modules"""
+    return dict(
+        perf=dict(type='bool', default=False, required=False, fallback=(env_fallback, ['ANSIBLE_SONIC_PERF'])),
+        agent=dict(type='bool', default=False, required=False, fallback=(env_fallback, ['ANSIBLE_SONIC_AGENT'])),
+        agent_idle_timeout=dict(type='int', default=600, required=False,
+                                fallback=(env_fallback, ['ANSIBLE_SONIC_AGENT_IDLE_TIMEOUT'])),
+        namespace=dict(type='str', required=False),
+    )
+
+
+def all_namespaces_argument_spec():
+    """The option of the modules that can run in every namespace, see namespaces.run_namespaces"""
+    return dict(
+        all_namespaces=dict(type='bool', default=False, required=False),
+    )
+
+
+def configdb_argument_spec():
+    """The options shared by all modules writing to the config db"""
+    spec = dict(
+        snapshot=dict(type='dict', required=False),
+        plan=dict(type='path', required=False),
+        apply_plan=dict(type='path', required=False),
+        checkpoint=dict(type='str', required=False, fallback=(env_fallback, ['ANSIBLE_SONIC_CHECKPOINT'])),
+    )
+    spec.update(common_argument_spec())
+    spec.update(all_namespaces_argument_spec())
+    return spec
+
+
+def write_file_atomic(path, data, mode=None):
+    """Write data to path through a temporary file next to it, so path is never partially written
+
+    The file is only readable by the user, unless mode is given.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f'.{os.path.basename(path)}-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            if mode is not None:
+                os.fchmod(f.fileno(), mode)
+            f.write(data)
+        os.rename(tmp, path)
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+
+def read_plan(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def run_plan(module, session):
+    """Apply the plan given in the apply_plan option and exit the module"""
+    path = module.params['apply_plan']
+    try:
+        plan = read_plan(path)
+        count = session.apply_plan(plan, module.check_mode)
+    except StalePlanError as e:
+        module.fail_json(msg=str(e), plan_stale=True)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        module.fail_json(msg=f'failed to apply the plan {path}: {e}')
+    session.exit_json(changed=bool(count), plan={'path': path, 'batches': len(plan['batches']), 'keys': count})
+
+
+def checkpoint_path(name, namespace=''):
+    """The journal of a checkpoint, every namespace has its own, raises ValueError for invalid names"""
+    if not CHECKPOINT_NAME.match(name):
+        raise ValueError(f'invalid checkpoint name "{name}", use letters, digits, "_", "." and "-"')
+    suffix = f'@{namespace}' if namespace else ''
+    return os.path.join(state_dir(), f'checkpoint-{name}{suffix}.json')
+
+
+def read_checkpoint(path):
+    """Returns the journal of a checkpoint, (table, key) -> entry in the order the keys were first written"""
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f'unsupported checkpoint version {data.get("version")}, expected {CHECKPOINT_VERSION}')
+    return {(item['table'], item['key']): item['entry'] for item in data['entries']}
+
+
+def write_checkpoint(path, journal, namespace=''):
+    entries = [{'table': t, 'key': k, 'entry': entry} for (t, k), entry in journal.items()]
+    write_file_atomic(path, json.dumps({'version': CHECKPOINT_VERSION, 'namespace': namespace, 'entries': entries}))
+
+
+def open_checkpoint(module, session):
+    """Load the journal of the checkpoint option into the session, so flush() records the keys it writes
+
+    The journal is created when it doesn't exist, outside of check mode, so
+    every run with the checkpoint can be rolled back, even when it didn't
+    change anything.
+    """
+    name = module.params['checkpoint']
+    try:
+        path = checkpoint_path(name, session.namespace)
+        if not private_dir(path):
+            module.fail_json(msg=f'the directory of the checkpoint {path} is not private to the user')
+        if os.path.exists(path):
+            session.journal = read_checkpoint(path)
+        else:
+            session.journal = dict()
+            if not module.check_mode:
+                write_checkpoint(path, session.journal, session.namespace)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        module.fail_json(msg=f'failed to open the checkpoint {name}: {e}')
+    session.journal_path = path
+
+
+def dirty_marker_path(namespace='', directory=None):
+    suffix = f'@{namespace}' if namespace else ''
+    return os.path.join(directory or state_dir(), f'dirty{suffix}')
+
+
+def mark_dirty(namespace=''):
+    """Record a write to the config db of the namespace
+
+    The marker gets a new token on every write, so save_config can tell
+    whether there were writes while it was saving, see clear_dirty.
+    """
+    path = dirty_marker_path(namespace)
+    if not private_dir(path):
+        raise PermissionError(f'{os.path.dirname(path)} is not private to the user')
+    # The tokens have a fixed length, overwriting without truncating is much
+    # cheaper on a flash file system
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        os.pwrite(fd, os.urandom(16).hex().encode(), 0)
+    finally:
+        os.close(fd)
+
+
+def dirty_markers(namespace=''):
+    """The dirty markers of the namespace left by the users whose state directories can be read
+
+    Returns their paths and tokens, the config db was written since the
+    last save_config if there are any.
+    """
+    markers = dict()
+    for directory in state_dirs():
+        path = dirty_marker_path(namespace, directory)
+        try:
+            with open(path) as f:
+                markers[path] = f.read()
+        except OSError:
+            continue
+    return markers
+
+
+def clear_dirty(markers):
+    """Remove the dirty markers, unless they were written again since dirty_markers returned them"""
+    for path, token in markers.items():
+        try:
+            with open(path) as f:
+                if f.read() != token:
+                    continue
+            os.unlink(path)
+        except OSError:
+            # Only root can remove the markers of other users
+            continue
+
+
+@contextlib.contextmanager
+def use_connector_factory(factory):
+    """Make connect() use factory(db_name) for its connectors
+
+    This lets the modules run on the controller, with a connector talking
+    to the databases of the switch over the network.
+    """
+    global CONNECTOR_FACTORY
+    previous = CONNECTOR_FACTORY
+    CONNECTOR_FACTORY = factory
+    try:
+        yield
+    finally:
+        CONNECTOR_FACTORY = previous
+
+
+def connect_connector(db_name, namespace=''):
+    """Returns a swsscommon connector connected to a database, in a namespace of a multi-ASIC switch if given"""
+    if namespace:
+        if not swsscommon.SonicDBConfig.isGlobalInit():
+            swsscommon.SonicDBConfig.initializeGlobalConfig()
+        config_db = swsscommon.ConfigDBPipeConnector(namespace=namespace)
+    else:
+        config_db = swsscommon.ConfigDBPipeConnector()
+    if db_name == 'CONFIG_DB':
+        config_db.connect()
+    else:
+        config_db.db_connect(db_name)
+    return config_db
+
+
+def connect(module, db_name='CONFIG_DB'):
+    """Connect to a database, failing the module if swsscommon is missing
+
+    Other databases than the config db, like STATE_DB, are read using the
+    same connector and table/key conventions. With the namespace option the
+    databases of that namespace of a multi-ASIC switch are used.
+
+    With the agent option the calls are sent to the agent running on the
+    switch, which is started when it isn't running. Until it runs, and if it
+    goes away, the module connects by itself.
+
+    With the plan option the writes of the module are saved to the plan
+    file instead of being sent, with the apply_plan option the module doesn't
+    compute anything, the plan is applied and the module exits here. With
+    the checkpoint option the entries are recorded before they are written,
+    see open_checkpoint.
+    """
+    perf = perf_recorder(module)
+    namespace = module.params.get('namespace') or ''
+
+    def phase(name):
+        return perf.phase(name) if perf is not None else contextlib.nullcontext()
+
+    def local_connector():
+        with phase('import'):
+            if not import_swsscommon():
+                module.fail_json(
+                    msg=missing_required_lib('swsscommon'),
+                    exception=SWSSCOMMON_IMPORT_ERROR)
+        with phase('connect'):
+            return connect_connector(db_name, namespace)
+
+    config_db = None
+    local = False
+    if CONNECTOR_FACTORY is not None:
+        if namespace:
+            module.fail_json(msg='namespace is not supported when the module runs on the controller')
+        with phase('connect'):
+            config_db = CONNECTOR_FACTORY(db_name)
+    elif module.params.get('agent'):
+        with phase('connect'):
+            config_db = connect_agent(db_name, local_connector, namespace=namespace)
+        if config_db is None:
+            config_db = local_connector()
+            local = True
+            start_agent(connect_connector, module.params['agent_idle_timeout'])
+    if config_db is None:
+        config_db = local_connector()
+        local = True
+    session = ConfigDBSession(config_db, module=module, snapshot=module.params.get('snapshot'), perf=perf)
+    session.local = local
+    session.namespace = namespace
+    if db_name != 'CONFIG_DB':
+        return session
+    if module.params.get('plan') and module.params.get('apply_plan'):
+        module.fail_json(msg='parameters are mutually exclusive: plan|apply_plan')
+    if module.params.get('checkpoint'):
+        open_checkpoint(module, session)
+    if module.params.get('apply_plan'):
+        run_plan(module, session)
+    if module.params.get('plan') and not module.check_mode:
+        session.plan = list()
+    return session
@@ -1,15 +1,86 @@
 # GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from ansible.module_utils.common.dict_transformations import recursive_diff
+import hashlib
+import json
 
 
-def compare_entries(new, cur):
+# get_entry / get_table can return a dict with tuples as keys, so called multi-keys
+# so join the tuple into a string so it can be JSON encoded
+def fix_keys(value):
+    if not isinstance(value, dict):
+        return value
+    new_value = dict()
+    for k, v in value.items():
+        if isinstance(k, tuple):
+            nk = '|'.join(k)
+        else:
+            nk = k
+        new_value[nk] = v
+    return new_value
+
+
+# Schemas used to normalize entries of known tables before comparing them.
+# 'unordered' lists the list fields where the order has no meaning and
+# 'defaults' the values a field has when it's missing from an entry.
+# Tables not listed here are compared as plain strings and ordered lists.
+TABLE_SCHEMAS = {
+    'ACL_TABLE': {
+        'unordered': ('ports',),
+    },
+    'PORT': {
+        'defaults': {
+            'admin_status': 'down',
+            'fec': 'none',
+        },
+    },
+    'VLAN': {
+        'unordered': ('dhcp_servers', 'dhcpv6_servers'),
+    },
+}
+
+
+def normalize_value(value):
+    """Converts a value to how it is returned from the config db
+
+    The config db only stores strings, list fields are lists of strings.
+    """
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def normalize_entry(entry):
+    """Normalizes the values of an entry, None stays None"""
+    if entry is None:
+        return None
+    return {f: normalize_value(v) for f, v in entry.items()}
+
+
+def entry_hash(entry):
+    """A hash of the normalized entry, None for a missing or empty entry"""
+    if not entry:
+        return None
+    data = json.dumps(normalize_entry(entry), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _field_value(entry, field, schema):
+    value = entry.get(field, schema.get('defaults', dict()).get(field))
+    if isinstance(value, list) and field in schema.get('unordered', ()):
+        return sorted(value)
+    return value
+
+
+def compare_entries(new, cur, table=None):
     """Compares two config db entries
 
     If both new and current entries are empty/None return False.
     If one of the new or the current is empty/None but not the other return True.
     If both entries have values, compare them and return True if there are any differences.
+    Values are normalized using the schema of the table before they are compared.
     Else return False.
     """
     # if both new and cur is empty, both current and wanted state is absent
@@ -18,7 +89,84 @@ def compare_entries(new, cur):
     # if new XOR cur is empty current and wanted state doesn't match
     elif (not new) != (not cur):
         return True
-    # diff new and cur, if they are the same recursive_diff will return None
-    if not recursive_diff(new, cur) is None:
-        return True
-    return False
+    return bool(diff_table({'': new}, {'': cur}, 'replaced', table))
+
+
+def diff_fields(new, cur):
+    """Returns the fields that differ between two entries
+
+    The result maps every differing field to a dict with the before and/or
+    after value, a missing before or after means the field is added or removed.
+    """
+    new = new or dict()
+    cur = cur or dict()
+    fields = dict()
+    for field in sorted(set(new) | set(cur)):
+        if new.get(field) == cur.get(field):
+            continue
+        change = dict()
+        if field in cur:
+            change['before'] = cur[field]
+        if field in new:
+            change['after'] = new[field]
+        fields[field] = change
+    return fields
+
+
+def diff_table(wanted, current, state, table=None):
+    """Computes the field-level changes needed to reconcile a table
+
+    wanted maps keys to their wanted fields and current is the table as read
+    from the config db. state is one of merged, replaced, overridden or deleted.
+    Unless state is deleted, a wanted value of None means the key should be absent.
+    Values are normalized and compared using the schema of table, if any.
+    Returns a patch mapping each changed key to None if the key should be
+    removed, or to a dict with the fields to 'set' and the fields to 'delete'.
+    Keys that don't need to change are left out.
+    """
+    schema = TABLE_SCHEMAS.get(table, dict())
+    patch = dict()
+    if state == 'deleted':
+        # Without any keys given the whole table is removed
+        for key, fields in (wanted or dict.fromkeys(current)).items():
+            cur = current.get(key)
+            if cur is None:
+                continue
+            if not fields:
+                patch[key] = None
+                continue
+            delete = sorted(f for f in fields if f in cur)
+            if delete:
+                patch[key] = {'set': dict(), 'delete': delete}
+        return patch
+
+    for key, fields in wanted.items():
+        cur = normalize_entry(current.get(key))
+        if fields is None:
+            if cur is not None:
+                patch[key] = None
+            continue
+        fields = normalize_entry(fields)
+        set_fields = {
+            f: v for f, v in fields.items()
+            if cur is None or _field_value(cur, f, schema) != _field_value(fields, f, schema)
+        }
+        delete = list()
+        if state in ('replaced', 'overridden') and cur:
+            # Removing a field that has its default value makes no difference
+            delete = sorted(
+                f for f in cur
+                if f not in fields and _field_value(cur, f, schema) != _field_value(dict(), f, schema))
+        if cur is None and not fields:
+            # An entry without fields is stored with a NULL placeholder
+            set_fields = {'NULL': 'NULL'}
+        elif cur and delete and len(delete) == len(cur) and not set_fields:
+            # Keep the key around when all of its fields are removed
+            set_fields = {'NULL': 'NULL'}
+        if set_fields or delete:
+            patch[key] = {'set': set_fields, 'delete': delete}
+    if state == 'overridden':
+        for key in current:
+            if key not in wanted:
+                patch[key] = None
+    return patch
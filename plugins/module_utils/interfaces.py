@@ -0,0 +1,205 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Resolve interface names, aliases and lanes to the names used as keys
+
+The index is built from the PORT and PORTCHANNEL tables. Reading those is
+the expensive part, so the index is cached in a file on the switch, keyed
+by a fingerprint of the port and port channel names and of the platform
+and hwsku. Aliases and lanes are set by the hwsku and change together with
+the port names, by a breakout for example, so they are not part of the
+fingerprint and the tables are only read when the fingerprint changes.
+Every namespace of a multi-ASIC switch has its own ports and its own cache.
+"""
+
+import hashlib
+import json
+import os
+
+from ansible_collections.community.sonic.plugins.module_utils.agent import private_dir, state_dir
+from ansible_collections.community.sonic.plugins.module_utils.configdb import write_file_atomic
+
+# Part of the fingerprint, so caches written by other versions are ignored
+INDEX_VERSION = 2
+
+
+class NoSuchInterfaceError(ValueError):
+    pass
+
+
+class InterfaceIndex(object):
+    """Lookups of interface names, each in constant time
+
+    aliases maps port aliases to port names, lanes maps every lane to its
+    port and indexes every front panel index to its ports, more than one when
+    the port is broken out. ports and portchannels are any containers of the
+    names. When built from the tables, lanes and indexes are only computed
+    when used.
+    """
+
+    def __init__(self, aliases, ports, portchannels, lanes=None, indexes=None, port_table=None):
+        self.aliases = aliases
+        self.ports = ports
+        self.portchannels = portchannels
+        self._lanes = lanes
+        self._indexes = indexes
+        self._port_table = port_table
+        self._port_index = None
+
+    @classmethod
+    def from_tables(cls, port_table, portchannel_table=None):
+        aliases = {v['alias']: k for k, v in port_table.items() if 'alias' in v}
+        return cls(aliases, port_table, portchannel_table or dict(), port_table=port_table)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['aliases'], set(data['ports']), set(data['portchannels']), data['lanes'], data['indexes'])
+
+    def _build_ports(self):
+        lanes = dict()
+        indexes = dict()
+        for name, entry in self._port_table.items():
+            for lane in entry.get('lanes', '').split(','):
+                if lane.strip():
+                    lanes[lane.strip()] = name
+            if 'index' in entry:
+                indexes.setdefault(entry['index'], list()).append(name)
+        for ports in indexes.values():
+            ports.sort(key=port_sort_key)
+        self._lanes = lanes
+        self._indexes = indexes
+
+    @property
+    def lanes(self):
+        if self._lanes is None:
+            self._build_ports()
+        return self._lanes
+
+    @property
+    def indexes(self):
+        if self._indexes is None:
+            self._build_ports()
+        return self._indexes
+
+    def to_dict(self):
+        return {
+            'aliases': self.aliases,
+            'ports': sorted(self.ports, key=port_sort_key),
+            'portchannels': sorted(self.portchannels),
+            'lanes': self.lanes,
+            'indexes': self.indexes,
+        }
+
+    def get(self, name):
+        """Returns the port or port channel name of name, None if there is no such interface
+
+        Names take precedence over aliases, an alias can be the name of another port.
+        """
+        if name in self.ports or name in self.portchannels:
+            return name
+        return self.aliases.get(name)
+
+    def resolve(self, name):
+        """Returns the port or port channel name of name, raises NoSuchInterfaceError if there is no such interface"""
+        ifname = self.get(name)
+        if ifname is None:
+            raise NoSuchInterfaceError(f'could not find interface "{name}"')
+        return ifname
+
+    def is_port(self, name):
+        return name in self.ports
+
+    def is_portchannel(self, name):
+        return name in self.portchannels
+
+    def port_of_lane(self, lane):
+        return self.lanes.get(str(lane))
+
+    def ports_of_index(self, index):
+        """The ports of a front panel port, more than one when it's broken out"""
+        return list(self.indexes.get(str(index), ()))
+
+    def breakout_siblings(self, name):
+        """The ports broken out from the same front panel port as name, including itself"""
+        ifname = self.resolve(name)
+        if self._port_index is None:
+            self._port_index = {p: i for i, ports in self.indexes.items() for p in ports}
+        index = self._port_index.get(ifname)
+        return [ifname] if index is None else self.ports_of_index(index)
+
+
+def port_sort_key(name):
+    """Sort Ethernet8 before Ethernet16"""
+    head = name.rstrip('0123456789')
+    return (head, int(name[len(head):] or 0))
+
+
+def interfaces_fingerprint(ports, portchannels, metadata):
+    data = {
+        'version': INDEX_VERSION,
+        'ports': sorted(ports),
+        'portchannels': sorted(portchannels),
+        'platform': metadata.get('platform'),
+        'hwsku': metadata.get('hwsku'),
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def interfaces_cache_path(name='interfaces'):
+    return os.path.join(state_dir(), f'{name}.json')
+
+
+def read_cache(path, fingerprint):
+    """Returns the cached index if it has the fingerprint, otherwise None"""
+    try:
+        if not private_dir(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('fingerprint') != fingerprint:
+            return None
+        return InterfaceIndex.from_dict(data['index'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_cache(path, fingerprint, index):
+    """Write the index to the cache, the cache is only an optimization so errors are ignored"""
+    try:
+        if private_dir(path):
+            write_file_atomic(path, json.dumps({'fingerprint': fingerprint, 'index': index.to_dict()}))
+    except OSError:
+        pass
+
+
+def load_interfaces(session, cache=True):
+    """Returns the InterfaceIndex of the switch
+
+    When the session already read the PORT and PORTCHANNEL tables, for
+    example from a snapshot, the index is built from them. Otherwise the
+    fingerprint is computed from the keys of the tables, which are read
+    without the entries, and the cached index is used if it matches.
+    """
+    if not cache or (session.has_table('PORT') and session.has_table('PORTCHANNEL')):
+        return InterfaceIndex.from_tables(session.get_table('PORT'), session.get_table('PORTCHANNEL'))
+
+    fingerprint = interfaces_fingerprint(
+        session.get_keys('PORT'), session.get_keys('PORTCHANNEL'), session.get_entry('DEVICE_METADATA', 'localhost'))
+    path = interfaces_cache_path(f'interfaces-{session.namespace}' if session.namespace else 'interfaces')
+    index = read_cache(path, fingerprint)
+    if index is None:
+        index = InterfaceIndex.from_tables(session.get_table('PORT'), session.get_table('PORTCHANNEL'))
+        write_cache(path, fingerprint, index)
+    return index
+
+
+def resolve_interface(session, name):
+    """Returns the port or port channel name of name, raises NoSuchInterfaceError if there is no such interface
+
+    Port and port channel names are looked up directly, only aliases need
+    the index of all interfaces.
+    """
+    for table in ('PORT', 'PORTCHANNEL'):
+        if session.get_entry(table, name):
+            return name
+    return load_interfaces(session).resolve(name)
@@ -0,0 +1,128 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Run modules in every database namespace of a multi-ASIC switch
+
+A multi-ASIC switch has databases for the host and for every ASIC, each in
+its own namespace. With all_namespaces a module runs once per namespace,
+concurrently, each run with its own connections, and the results are
+returned per namespace.
+
+The runs get a NamespaceModule instead of the AnsibleModule, which turns
+exit_json and fail_json into exceptions, so a run ends without ending the
+module. Ports belong to one namespace, the runs of modules addressing
+ports skip the interfaces their namespace doesn't have, see
+owned_interfaces, and the module fails for interfaces no namespace has.
+"""
+
+import concurrent.futures
+import json
+
+DATABASE_GLOBAL_CONFIG = '/var/run/redis/sonic-db/database_global.json'
+
+
+class NamespaceExit(Exception):
+    pass
+
+
+class NamespaceFailure(Exception):
+    pass
+
+
+def get_namespaces():
+    """The namespaces of the switch, '' is the host, just [''] on a switch with a single ASIC"""
+    try:
+        with open(DATABASE_GLOBAL_CONFIG) as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return ['']
+    return [''] + sorted(i['namespace'] for i in config.get('INCLUDES', ()) if i.get('namespace'))
+
+
+class NamespaceModule(object):
+    """Stands in for the AnsibleModule in the run of one namespace
+
+    The parameters select the namespace, everything but exiting is left to
+    the AnsibleModule.
+    """
+
+    def __init__(self, module, namespace):
+        self._module = module
+        self.namespace = namespace
+        self.params = dict(module.params, namespace=namespace, all_namespaces=False)
+        # The interfaces skipped because the namespace doesn't have them
+        self.missing_interfaces = set()
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+    def exit_json(self, **result):
+        raise NamespaceExit(result)
+
+    def fail_json(self, msg, **result):
+        raise NamespaceFailure(dict(result, msg=msg, failed=True))
+
+
+def skip_interface(module, name):
+    """Whether to skip an interface the namespace doesn't have, only in the runs of all_namespaces"""
+    if not isinstance(module, NamespaceModule):
+        return False
+    module.missing_interfaces.add(name)
+    return True
+
+
+def owned_interfaces(module, interfaces, names):
+    """Returns the names the InterfaceIndex interfaces has, or all names when not in a run of all_namespaces"""
+    if not isinstance(module, NamespaceModule):
+        return list(names)
+    return [n for n in names if interfaces.get(n) is not None or not skip_interface(module, n)]
+
+
+def _run(module, run):
+    try:
+        run(module)
+    except NamespaceExit as e:
+        return e.args[0]
+    except NamespaceFailure as e:
+        return e.args[0]
+    return {'failed': True, 'msg': 'the module did not return a result'}
+
+
+def run_namespaces(module, run, combine=None):
+    """Run run(module), once per namespace with all_namespaces
+
+    The runs in the namespaces are concurrent. The result has the result of
+    every namespace in namespaces, and the module fails if any run failed.
+    combine, if given, returns the result to exit with from that result.
+    """
+    if not module.params.get('all_namespaces'):
+        run(module)
+        return
+    if module.params.get('namespace') is not None:
+        module.fail_json(msg='parameters are mutually exclusive: namespace|all_namespaces')
+    for name in ('snapshot', 'plan', 'apply_plan', 'dest', 'path'):
+        if module.params.get(name):
+            module.fail_json(msg=f'{name} can not be used with all_namespaces')
+
+    namespaces = get_namespaces()
+    runs = [NamespaceModule(module, ns) for ns in namespaces]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(runs)) as pool:
+        results = list(pool.map(lambda m: _run(m, run), runs))
+
+    result = {
+        'changed': any(r.get('changed') for r in results),
+        'namespaces': dict(zip(namespaces, results)),
+    }
+    diffs = [dict(r['diff'], before_header=ns or 'host', after_header=ns or 'host')
+             for ns, r in zip(namespaces, results) if isinstance(r.get('diff'), dict)]
+    if diffs:
+        result['diff'] = diffs
+    failed = [f'{ns or "host"}: {r.get("msg")}' for ns, r in zip(namespaces, results) if r.get('failed')]
+    if failed:
+        module.fail_json(msg=f'failed in namespace {"; ".join(failed)}', **result)
+    missing = set.intersection(*(m.missing_interfaces for m in runs))
+    if missing:
+        module.fail_json(msg=f'could not find interface {", ".join(sorted(missing))} in any namespace', **result)
+    if combine is not None:
+        result = combine(result)
+    module.exit_json(**result)
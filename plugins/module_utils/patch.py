@@ -0,0 +1,261 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Patches of the config db and the order they are written in
+
+A config db document is a dict of tables, each a dict of keys and their
+entries, like config_db.json. It can be patched with an RFC 6902 JSON patch
+or an RFC 7386 merge patch.
+
+Entries reference entries of other tables, a VLAN_MEMBER its VLAN and port
+for example. Changes are written in batches so that references are removed
+before what they reference, and created after it.
+"""
+
+import copy
+
+from ansible_collections.community.sonic.plugins.module_utils.entries import normalize_value
+
+# The tables the entries of a table reference, tables not listed don't
+# reference any other table
+TABLE_DEPENDENCIES = {
+    'ACL_RULE': ('ACL_TABLE',),
+    'ACL_TABLE': ('PORT', 'PORTCHANNEL', 'VLAN'),
+    'BGP_NEIGHBOR': ('VRF',),
+    'BUFFER_PG': ('PORT', 'BUFFER_PROFILE'),
+    'BUFFER_PROFILE': ('BUFFER_POOL',),
+    'BUFFER_QUEUE': ('PORT', 'BUFFER_PROFILE'),
+    'INTERFACE': ('PORT', 'VRF'),
+    'LOOPBACK_INTERFACE': ('VRF',),
+    'MGMT_INTERFACE': ('MGMT_PORT',),
+    'PORT_QOS_MAP': ('PORT', 'DSCP_TO_TC_MAP', 'TC_TO_QUEUE_MAP', 'TC_TO_PRIORITY_GROUP_MAP'),
+    'PORTCHANNEL_INTERFACE': ('PORTCHANNEL', 'VRF'),
+    'PORTCHANNEL_MEMBER': ('PORTCHANNEL', 'PORT'),
+    'QUEUE': ('PORT', 'SCHEDULER', 'WRED_PROFILE'),
+    'VLAN_INTERFACE': ('VLAN', 'VRF'),
+    'VLAN_MEMBER': ('VLAN', 'PORT', 'PORTCHANNEL'),
+    'VLAN_SUB_INTERFACE': ('PORT', 'PORTCHANNEL', 'VRF'),
+}
+
+PATCH_OPERATIONS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+
+class PatchError(ValueError):
+    pass
+
+
+def parse_pointer(path):
+    """Returns the tokens of a JSON pointer"""
+    if not isinstance(path, str) or (path and not path.startswith('/')):
+        raise PatchError(f'invalid JSON pointer {path!r}')
+    if not path:
+        return []
+    return [t.replace('~1', '/').replace('~0', '~') for t in path[1:].split('/')]
+
+
+def _touch(keys, table, key):
+    if key is None:
+        keys[table] = None
+    elif keys.setdefault(table, set()) is not None:
+        keys[table].add(key)
+
+
+def patch_keys(operations):
+    """Returns the keys a JSON patch touches per table, in order
+
+    A table the patch touches as a whole, like /VLAN, maps to None.
+    """
+    keys = dict()
+    for operation in operations:
+        for name in ('path', 'from'):
+            if name not in operation:
+                continue
+            tokens = parse_pointer(operation[name])
+            if not tokens:
+                raise PatchError('the whole config db can not be patched, the path must start with a table')
+            _touch(keys, tokens[0], tokens[1] if len(tokens) > 1 else None)
+    return keys
+
+
+def merge_patch_keys(patch):
+    """Returns the keys a merge patch touches per table, None for a table it replaces or removes"""
+    keys = dict()
+    for table, entries in patch.items():
+        if not isinstance(entries, dict):
+            _touch(keys, table, None)
+            continue
+        for key in entries:
+            _touch(keys, table, key)
+    return keys
+
+
+def _list_index(container, token, adding=False):
+    if adding and token == '-':
+        return len(container)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise PatchError(f'invalid list index {token!r}')
+    index = int(token)
+    if index > len(container) or (index == len(container) and not adding):
+        raise PatchError(f'list index {index} out of range')
+    return index
+
+
+def _parent(document, tokens):
+    """Returns the container of the location the tokens point to"""
+    value = document
+    for token in tokens[:-1]:
+        if isinstance(value, dict) and token in value:
+            value = value[token]
+        elif isinstance(value, list):
+            value = value[_list_index(value, token)]
+        else:
+            raise PatchError('path not found')
+    if not isinstance(value, (dict, list)):
+        raise PatchError('path not found')
+    return value
+
+
+def _get(document, tokens):
+    container = _parent(document, tokens)
+    if isinstance(container, list):
+        return container[_list_index(container, tokens[-1])]
+    if tokens[-1] not in container:
+        raise PatchError('path not found')
+    return container[tokens[-1]]
+
+
+def _add(document, tokens, value):
+    container = _parent(document, tokens)
+    if isinstance(container, list):
+        container.insert(_list_index(container, tokens[-1], adding=True), value)
+    else:
+        container[tokens[-1]] = value
+
+
+def _replace(document, tokens, value):
+    container = _parent(document, tokens)
+    if isinstance(container, list):
+        container[_list_index(container, tokens[-1])] = value
+    elif tokens[-1] not in container:
+        raise PatchError('path not found')
+    else:
+        container[tokens[-1]] = value
+
+
+def _remove(document, tokens):
+    container = _parent(document, tokens)
+    if isinstance(container, list):
+        return container.pop(_list_index(container, tokens[-1]))
+    if tokens[-1] not in container:
+        raise PatchError('path not found')
+    return container.pop(tokens[-1])
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return normalize_value(value)
+
+
+def apply_json_patch(document, operations):
+    """Returns a copy of document with an RFC 6902 JSON patch applied
+
+    The values compared by test operations are normalized like config db
+    values, so 10 matches "10". Raises PatchError if an operation fails.
+    """
+    document = copy.deepcopy(document)
+    for i, operation in enumerate(operations):
+        op = operation.get('op')
+        try:
+            if op not in PATCH_OPERATIONS:
+                raise PatchError(f'unsupported operation {op!r}')
+            tokens = parse_pointer(operation.get('path'))
+            if not tokens:
+                raise PatchError('the whole config db can not be patched')
+            if op in ('add', 'replace', 'test') and 'value' not in operation:
+                raise PatchError('value is required')
+            if op in ('move', 'copy'):
+                if 'from' not in operation:
+                    raise PatchError('from is required')
+                source = parse_pointer(operation['from'])
+                if not source:
+                    raise PatchError('the whole config db can not be moved or copied')
+            if op == 'add':
+                _add(document, tokens, copy.deepcopy(operation['value']))
+            elif op == 'remove':
+                _remove(document, tokens)
+            elif op == 'replace':
+                _replace(document, tokens, copy.deepcopy(operation['value']))
+            elif op == 'move':
+                if tokens[:len(source)] == source and tokens != source:
+                    raise PatchError('a value can not be moved into itself')
+                _add(document, tokens, _remove(document, source))
+            elif op == 'copy':
+                _add(document, tokens, copy.deepcopy(_get(document, source)))
+            elif _normalize(_get(document, tokens)) != _normalize(operation['value']):
+                raise PatchError(f'test failed, the value is {_get(document, tokens)!r}')
+        except PatchError as e:
+            raise PatchError(f'operation {i} ({op} {operation.get("path")}): {e}')
+    return document
+
+
+def apply_merge_patch(document, patch):
+    """Returns a copy of document with an RFC 7386 merge patch applied
+
+    A null value removes a table, key or field, lists are replaced as a whole.
+    """
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    document = copy.deepcopy(document) if isinstance(document, dict) else dict()
+    for name, value in patch.items():
+        if value is None:
+            document.pop(name, None)
+        else:
+            document[name] = apply_merge_patch(document.get(name), value)
+    return document
+
+
+def check_document(document):
+    """Make sure a patched document can be stored in the config db, raises PatchError"""
+    for table, entries in document.items():
+        if not isinstance(entries, dict):
+            raise PatchError(f'{table} must be a dict of keys and entries')
+        for key, entry in entries.items():
+            if not isinstance(entry, dict):
+                raise PatchError(f'{table}|{key} must be a dict of fields')
+            for field, value in entry.items():
+                values = value if isinstance(value, list) else [value]
+                if any(v is None or isinstance(v, (dict, list)) for v in values):
+                    raise PatchError(f'{table}|{key} field {field} must be a string or a list of strings')
+
+
+def table_level(table):
+    """The depth of a table in the dependency graph, 0 for tables without dependencies"""
+    dependencies = TABLE_DEPENDENCIES.get(table, ())
+    return 1 + max(table_level(t) for t in dependencies) if dependencies else 0
+
+
+def order_changes(changes):
+    """Split changes into batches that can be written one after the other
+
+    changes maps tables to patches as returned by entries.diff_table.
+    Removed keys and fields come first, dependent tables before the tables
+    they depend on, then added keys and fields, in the opposite order.
+    Within a table, multi-keys like Vlan10|10.0.0.1/24 are removed before and
+    added after shorter keys, like Vlan10. Returns a list of dicts with the
+    changes of each batch, keyed by table.
+    """
+    teardown = dict()
+    buildup = dict()
+    for table, patch in changes.items():
+        level = table_level(table)
+        for key, change in patch.items():
+            rank = (level, key.count('|'))
+            if change is None:
+                teardown.setdefault(rank, dict()).setdefault(table, dict())[key] = None
+                continue
+            if change['delete']:
+                teardown.setdefault(rank, dict()).setdefault(table, dict())[key] = {'set': dict(), 'delete': change['delete']}
+            if change['set'] and not (change['delete'] and change['set'] == {'NULL': 'NULL'}):
+                buildup.setdefault(rank, dict()).setdefault(table, dict())[key] = {'set': change['set'], 'delete': []}
+    return [teardown[r] for r in sorted(teardown, reverse=True)] + [buildup[r] for r in sorted(buildup)]
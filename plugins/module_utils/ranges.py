@@ -0,0 +1,61 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import re
+
+
+INTERFACE_RANGE_RE = re.compile(r'^(.*?)(\d+)-(\d+)(?:/(\d+))?$')
+
+
+def expand_range(spec, lower=None, upper=None):
+    """Expands a range string into a sorted list of integers
+
+    The string is a comma separated list of numbers or inclusive ranges,
+    e.g. '100-199,300'. Raises ValueError if the string can't be parsed or
+    if any number falls outside of lower/upper.
+    """
+    values = set()
+    for part in str(spec).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition('-')
+        try:
+            start = int(start)
+            end = int(end) if sep else start
+        except ValueError:
+            raise ValueError(f'could not parse range "{part}"')
+        if end < start:
+            raise ValueError(f'range "{part}" is in reverse order')
+        if lower is not None and start < lower:
+            raise ValueError(f'{start} in "{part}" is lower than {lower}')
+        if upper is not None and end > upper:
+            raise ValueError(f'{end} in "{part}" is higher than {upper}')
+        values.update(range(start, end + 1))
+    if not values:
+        raise ValueError(f'range "{spec}" is empty')
+    return sorted(values)
+
+
+def expand_interface_range(spec):
+    """Expands an interface range into a list of interface names
+
+    A range is a name ending with a numeric range and an optional step,
+    e.g. 'Ethernet0-188/4' expands to Ethernet0, Ethernet4, ..., Ethernet188.
+    Names that aren't ranges, such as aliases like 'fortyGigE0/24', are
+    returned as is. The numbers keep the zero padding of the start of the
+    range, 'PortChannel0001-0004' expands to PortChannel0001, ..., PortChannel0004.
+    """
+    m = INTERFACE_RANGE_RE.match(spec)
+    if m is None:
+        return [spec]
+    prefix, start, end, step = m.groups()
+    width = len(start)
+    start = int(start)
+    end = int(end)
+    step = int(step or 1)
+    if end < start:
+        raise ValueError(f'interface range "{spec}" is in reverse order')
+    if step < 1:
+        raise ValueError(f'interface range "{spec}" has an invalid step')
+    return [f'{prefix}{i:0{width}d}' for i in range(start, end + 1, step)]
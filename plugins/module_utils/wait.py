@@ -0,0 +1,132 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Wait for changes to the config db to be applied
+
+The daemons of the switch pick up changes to the config db and write them
+to APPL_DB and STATE_DB, vlanmgrd for example sets the state of a VLAN in
+STATE_DB once the VLAN is created in the kernel. Waiting for those entries
+tells when a change took effect.
+
+When the module runs on the switch without the agent, the entries are
+watched through keyspace notifications with a SubscriberStateTable, so the
+wait ends as soon as they change. Otherwise they are polled.
+"""
+
+import time
+
+from ansible_collections.community.sonic.plugins.module_utils import configdb
+from ansible_collections.community.sonic.plugins.module_utils.configdb import connect
+
+POLL_INTERVAL = 0.2
+
+
+def wait_argument_spec():
+    """The options of the modules that can wait for their changes to be applied"""
+    return dict(
+        wait=dict(type='bool', default=False, required=False),
+        wait_timeout=dict(type='int', default=60, required=False),
+    )
+
+
+def entry_matches(entry, wanted):
+    """Whether an entry has the wanted fields, wanted is None for an entry that should not exist"""
+    if wanted is None:
+        return not entry
+    return bool(entry) and all(entry.get(field) == value for field, value in wanted.items())
+
+
+class Subscription(object):
+    """The changes to a table, from keyspace notifications"""
+
+    def __init__(self, db_name, table, namespace=''):
+        swsscommon = configdb.swsscommon
+        if namespace:
+            self.db = swsscommon.DBConnector(db_name, 0, False, namespace)
+        else:
+            self.db = swsscommon.DBConnector(db_name, 0)
+        self.table = swsscommon.SubscriberStateTable(self.db, table)
+        self.select = swsscommon.Select()
+        self.select.addSelectable(self.table)
+        self.timeout = swsscommon.Select.TIMEOUT
+
+    def wait(self, timeout):
+        """Returns the entries that changed within timeout seconds, keyed by key, None for removed keys
+
+        The first calls also return the entries that existed when subscribing.
+        """
+        state, _ = self.select.select(max(int(timeout * 1000), 1))
+        if state == self.timeout:
+            return dict()
+        return {key: dict(fvs) if op == 'SET' else None for key, op, fvs in self.table.pops()}
+
+
+def wait_for_entries(module, db_name, table, wanted, timeout):
+    """Wait until the keys of a table have the wanted entries
+
+    wanted maps keys to the fields they should have, None for keys that
+    should not exist. Returns the keys that still don't match after timeout
+    seconds.
+    """
+    session = connect(module, db_name)
+    deadline = time.monotonic() + timeout
+    # Subscribe before reading, so no change is missed in between
+    subscription = Subscription(db_name, table, session.namespace) if session.local else None
+
+    def unmatched(keys):
+        return {k: wanted[k] for k in keys if not entry_matches(session.read_entry(table, k), wanted[k])}
+
+    pending = unmatched(wanted)
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if subscription is not None:
+            for key, entry in subscription.wait(remaining).items():
+                if key in pending and entry_matches(entry, pending[key]):
+                    del pending[key]
+        else:
+            time.sleep(min(POLL_INTERVAL, remaining))
+            pending = unmatched(pending)
+    return sorted(pending)
+
+
+def state_entries(patch):
+    """The STATE_DB entries for the keys of a patch, once the daemons created or removed them
+
+    The daemons set the state of the keys they created to ok, like vlanmgrd
+    for VLAN_TABLE and VLAN_MEMBER_TABLE.
+    """
+    return {key: None if change is None else {'state': 'ok'} for key, change in patch.items()}
+
+
+def wait_for(module, session, db_name, table, wanted):
+    """Wait for the changes a module made, if the wait option is set
+
+    Nothing is waited for in check mode or when the changes went to a plan.
+    Returns the keys to add to the result of the module, waited with the
+    number of seconds waited if anything was waited for. Fails the module
+    if the changes aren't applied in wait_timeout seconds.
+    """
+    return wait_for_all(module, session, [(db_name, table, wanted)])
+
+
+def wait_for_all(module, session, targets):
+    """Like wait_for, for a list of (db_name, table, wanted) targets in turn
+
+    The targets share the wait_timeout, so a later target only gets the time
+    the earlier ones left.
+    """
+    targets = [t for t in targets if t[2]]
+    if not module.params['wait'] or module.check_mode or session.plan is not None or not targets:
+        return dict()
+    start = time.monotonic()
+    timeout = module.params['wait_timeout']
+    for db_name, table, wanted in targets:
+        remaining = max(timeout - (time.monotonic() - start), 0)
+        pending = wait_for_entries(module, db_name, table, wanted, remaining)
+        if pending:
+            module.fail_json(
+                msg=f'timed out after {timeout} seconds waiting for {db_name} {table} {", ".join(pending)}',
+                changed=True, pending=pending)
+    return {'waited': round(time.monotonic() - start, 3)}
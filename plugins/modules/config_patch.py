@@ -0,0 +1,240 @@
+#!/usr/bin/python
+#
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = r'''
+---
+module: config_patch
+short_description: Patch several tables of the SONiC configuration database at once
+version_added: "0.4.0"
+description:
+    - Apply an RFC 6902 JSON patch, or a partial configuration in the format of C(config_db.json), to the SONiC
+      configuration database.
+    - Only the keys the patch touches are read, in one pipeline, and whole tables only when the patch adds, replaces or
+      removes a table as a whole.
+    - The changes are written in batches ordered by the references between the tables, so entries are removed before
+      the entries they reference and created after them. For example the members and interfaces of a VLAN are removed
+      before the VLAN itself.
+    - Changes that don't depend on each other are written together, one transaction per batch.
+extends_documentation_fragment:
+  - community.sonic.attributes
+  - community.sonic.configdb
+attributes:
+  check_mode:
+    support: full
+  diff_mode:
+    support: full
+options:
+    patch:
+        description:
+            - An RFC 6902 JSON patch, a list of operations against the configuration database.
+            - The paths start with the table, followed by the key, the field and the list index, for example
+              C(/VLAN/Vlan10/dhcp_servers/0). Use C(~1) for a C(/) in a key, for example C(/INTERFACE/Ethernet0|10.0.0.0~131).
+            - All operations, C(add), C(remove), C(replace), C(move), C(copy) and C(test), are supported. Values are
+              compared as strings by C(test).
+            - If an operation fails nothing is written.
+        type: list
+        elements: dict
+    config:
+        description:
+            - A partial configuration in the format of C(config_db.json), merged into the configuration database like an
+              RFC 7386 merge patch.
+            - Fields that are given are set, a null table, key or field is removed, other tables, keys and fields are
+              left alone.
+        type: dict
+
+author:
+    - Christian Svensson (@bluecmd)
+'''
+
+EXAMPLES = r'''
+# Remove a VLAN together with its members and interfaces
+- name: Remove Vlan10
+  community.sonic.config_patch:
+    patch:
+      - op: remove
+        path: /VLAN_MEMBER/Vlan10|Ethernet0
+      - op: remove
+        path: /VLAN_INTERFACE/Vlan10|10.1.0.1~124
+      - op: remove
+        path: /VLAN_INTERFACE/Vlan10
+      - op: remove
+        path: /VLAN/Vlan10
+
+# Only change the MTU if the port still has the expected speed
+- name: Set MTU of Ethernet0
+  community.sonic.config_patch:
+    patch:
+      - op: test
+        path: /PORT/Ethernet0/speed
+        value: 100000
+      - op: replace
+        path: /PORT/Ethernet0/mtu
+        value: 9100
+
+# Create a VLAN with an interface and a member
+- name: Add Vlan20
+  community.sonic.config_patch:
+    config:
+      VLAN:
+        Vlan20:
+          vlanid: 20
+      VLAN_INTERFACE:
+        Vlan20: {}
+        Vlan20|10.2.0.1/24: {}
+      VLAN_MEMBER:
+        Vlan20|Ethernet4:
+          tagging_mode: untagged
+'''
+
+RETURN = r'''
+changes:
+    description:
+        - The changes applied, or that would be applied in check mode, keyed by table and entry key.
+        - A removed entry is null, otherwise the fields that are set and the names of the fields that are deleted.
+    type: dict
+    returned: always
+    sample: {"VLAN": {"Vlan10": null}, "VLAN_MEMBER": {"Vlan10|Ethernet0": null}}
+batches:
+    description: The keys written by each batch, in the order they are written
+    type: list
+    elements: list
+    returned: always
+    sample: [["VLAN_MEMBER|Vlan10|Ethernet0"], ["VLAN|Vlan10"]]
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The other return values are then only returned per namespace.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": true}, "asic1": {"changed": false}}
+plan:
+    description:
+        - The plan file, the number of write batches and the number of keys written to the database or to the plan.
+    type: dict
+    returned: when I(plan) or I(apply_plan) is set
+    sample: {"path": "/var/tmp/vlan100.plan", "batches": 2, "keys": 9}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.079, "phases": {"import": 0.039, "connect": 0.011, "read": 0.005, "write": 0.009, "compute": 0.015},
+             "round_trips": 3, "commands": 4, "bytes_read": 14, "bytes_written": 66,
+             "keys_written": 2}
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import configdb_argument_spec, connect
+from ansible_collections.community.sonic.plugins.module_utils.entries import diff_table, normalize_entry
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import run_namespaces
+from ansible_collections.community.sonic.plugins.module_utils.patch import (
+    PatchError, apply_json_patch, apply_merge_patch, check_document, merge_patch_keys, order_changes, patch_keys)
+
+
+def read_current(session, keys):
+    """Returns the entries the patch touches, as returned by patch_keys
+
+    Whole tables are only read for the tables the patch touches as a whole,
+    the other keys are read in one pipeline.
+    """
+    current = session.get_tables([t for t, table_keys in keys.items() if table_keys is None])
+    session.prefetch((t, k) for t, table_keys in keys.items() for k in sorted(table_keys or ()))
+    for table, table_keys in keys.items():
+        if table_keys is not None:
+            current[table] = session.get_entries(table, sorted(table_keys))
+    return current
+
+
+def patch_document(current, patch=None, config=None):
+    """Returns the tables as they should be after the patch, raises PatchError"""
+    if patch is not None:
+        wanted = apply_json_patch(current, patch)
+    else:
+        wanted = apply_merge_patch(current, config)
+    check_document(wanted)
+    return wanted
+
+
+def build_changes(wanted, current):
+    """Returns the changes per table to get from current to wanted"""
+    changes = dict()
+    for table, entries in current.items():
+        patch = diff_table(wanted.get(table, dict()), entries, 'overridden', table)
+        if patch:
+            changes[table] = patch
+    return changes
+
+
+def build_diff(changes, wanted, current):
+    before = dict()
+    after = dict()
+    for table, patch in changes.items():
+        for key in patch:
+            if key in current[table]:
+                before.setdefault(table, dict())[key] = current[table][key]
+            if key in wanted.get(table, dict()):
+                after.setdefault(table, dict())[key] = normalize_entry(wanted[table][key])
+    return {'before': before, 'after': after}
+
+
+def run(module):
+    patch = module.params['patch']
+    config = module.params['config']
+    try:
+        keys = patch_keys(patch) if patch is not None else merge_patch_keys(config)
+    except PatchError as e:
+        module.fail_json(msg=str(e))
+
+    session = connect(module)
+    current = read_current(session, keys)
+    try:
+        wanted = patch_document(current, patch, config)
+    except PatchError as e:
+        module.fail_json(msg=str(e))
+
+    changes = build_changes(wanted, current)
+    batches = order_changes(changes)
+
+    if not module.check_mode:
+        for batch in batches:
+            for table, table_patch in batch.items():
+                session.apply_patch(table, table_patch)
+            session.flush()
+
+    session.exit_json(
+        changed=bool(changes),
+        changes=changes,
+        batches=[[f'{t}|{k}' for t, p in batch.items() for k in p] for batch in batches],
+        diff=build_diff(changes, wanted, current))
+
+
+def run_module():
+    module_args = dict(
+        patch=dict(type='list', elements='dict', required=False),
+        config=dict(type='dict', required=False),
+    )
+    module_args.update(configdb_argument_spec())
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        mutually_exclusive=[('patch', 'config')],
+        required_one_of=[('patch', 'config')],
+        supports_check_mode=True
+    )
+
+    run_namespaces(module, run)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
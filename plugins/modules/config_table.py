@@ -0,0 +1,192 @@
+#!/usr/bin/python
+#
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = r'''
+---
+module: config_table
+short_description: Manage entries of any SONiC configuration database table
+version_added: "0.4.0"
+description:
+    - Reconcile the entries of a table in the SONiC configuration database.
+    - The table is read once and only the changed fields are written, unchanged entries are never rewritten.
+extends_documentation_fragment:
+  - community.sonic.attributes
+  - community.sonic.configdb
+attributes:
+  check_mode:
+    support: full
+  diff_mode:
+    support: full
+options:
+    table:
+        description: The table to manage, for example C(LOOPBACK_INTERFACE)
+        required: true
+        type: str
+    entries:
+        description:
+            - The wanted entries, a dict of keys and their fields.
+            - Multi-keys are joined with C(|), for example C(Vlan100|Ethernet0).
+            - Use a list as value for list fields, these are stored with a C(@) suffix.
+            - An entry without fields is stored as an empty entry.
+        type: dict
+        default: {}
+    state:
+        description:
+            - C(merged) adds and updates the given fields and leaves all other fields and entries alone.
+            - C(replaced) makes the given entries match I(entries) exactly, removing fields that are not listed.
+            - C(overridden) works like C(replaced) and also removes all entries of the table that are not listed.
+            - C(deleted) removes the given fields, or the whole entry when no fields are given.
+              If I(entries) is empty all entries of the table are removed.
+        default: merged
+        type: str
+        choices: [merged, replaced, overridden, deleted]
+
+author:
+    - Christian Svensson (@bluecmd)
+'''
+
+EXAMPLES = r'''
+# Add loopback interfaces, keeping any other loopbacks
+- name: Add loopbacks
+  community.sonic.config_table:
+    table: LOOPBACK_INTERFACE
+    entries:
+      Loopback0: {}
+      Loopback0|10.1.0.1/32: {}
+
+# Make the BGP neighbors match exactly
+- name: Override BGP neighbors
+  community.sonic.config_table:
+    table: BGP_NEIGHBOR
+    state: overridden
+    entries:
+      10.0.0.1:
+        asn: 65100
+        name: spine1
+      10.0.0.3:
+        asn: 65100
+        name: spine2
+
+# Remove a field from an entry
+- name: Remove port description
+  community.sonic.config_table:
+    table: PORT
+    state: deleted
+    entries:
+      Ethernet0:
+        description:
+'''
+
+RETURN = r'''
+table:
+    description: The database table
+    type: str
+    returned: always
+changes:
+    description:
+        - The changes applied, or that would be applied in check mode, keyed by entry key.
+        - A removed entry is null, otherwise the fields that are set and the names of the fields that are deleted.
+    type: dict
+    returned: always
+    sample: {"Loopback0": {"set": {"NULL": "NULL"}, "delete": []}, "Loopback1": null}
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The other return values are then only returned per namespace.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": true}, "asic1": {"changed": false}}
+plan:
+    description:
+        - The plan file, the number of write batches and the number of keys written to the database or to the plan.
+    type: dict
+    returned: when I(plan) or I(apply_plan) is set
+    sample: {"path": "/var/tmp/acl_rules.plan", "batches": 1, "keys": 200}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.074, "phases": {"import": 0.039, "connect": 0.011, "read": 0.004, "write": 0.006, "compute": 0.014},
+             "round_trips": 2, "commands": 3, "bytes_read": 0, "bytes_written": 36,
+             "keys_written": 2}
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import configdb_argument_spec, connect
+from ansible_collections.community.sonic.plugins.module_utils.entries import diff_table, normalize_entry
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import run_namespaces
+
+
+def build_table_entries(entries, state):
+    """Normalize the wanted entries so they can be compared to the config db
+
+    For state deleted only the field names are of interest, so the values are kept as is.
+    """
+    wanted = dict()
+    for key, fields in entries.items():
+        if state != 'deleted':
+            fields = normalize_entry(fields or dict())
+        wanted[key] = fields
+    return wanted
+
+
+def build_diff(patch, current):
+    before = dict()
+    after = dict()
+    for key, change in patch.items():
+        cur = current.get(key)
+        if cur is not None:
+            before[key] = cur
+        if change is not None:
+            new = {f: v for f, v in (cur or dict()).items() if f not in change['delete']}
+            new.update((f, v) for f, v in change['set'].items() if f != 'NULL')
+            after[key] = new
+    return {'before': before, 'after': after}
+
+
+def run(module):
+    session = connect(module)
+
+    table = module.params['table']
+    state = module.params['state']
+    wanted = build_table_entries(module.params['entries'], state)
+    current = session.get_table(table)
+    patch = diff_table(wanted, current, state, table)
+
+    if not module.check_mode and patch:
+        session.apply_patch(table, patch)
+        session.flush()
+
+    session.exit_json(changed=bool(patch), table=table, changes=patch, diff=build_diff(patch, current))
+
+
+def run_module():
+    module_args = dict(
+        table=dict(type='str', required=True),
+        entries=dict(type='dict', default=dict(), required=False),
+        state=dict(type='str', default='merged', choices=['merged', 'replaced', 'overridden', 'deleted'], required=False),
+    )
+    module_args.update(configdb_argument_spec())
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    run_namespaces(module, run)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
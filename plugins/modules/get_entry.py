@@ -13,6 +13,8 @@ module: get_entry
 short_description: Get table/entry from SONiC configuration database
 version_added: "0.2.0"
 description: Manage VLANs in SONiC
+extends_documentation_fragment:
+  - community.sonic.configdb.common
 options:
     table:
         description: The table to lookup
@@ -21,6 +23,56 @@ options:
     key:
         description: The key to look up in table
         type: str
+    keys:
+        description:
+            - A list of keys to look up in table.
+            - Keys that don't exist are left out of the result.
+        type: list
+        elements: str
+        version_added: "0.4.0"
+    key_pattern:
+        description:
+            - A glob style pattern, like C(MY_ACL|*), matching the keys to look up in table.
+            - The keys are matched on the switch using C(SCAN), so only the matching entries are read.
+        type: str
+        version_added: "0.4.0"
+    fields:
+        description: Only return these fields of the entries
+        type: list
+        elements: str
+        version_added: "0.4.0"
+    dest:
+        description:
+            - Write the entries of the table, or the entries matching I(key_pattern), to this file on the switch
+              instead of returning them.
+            - The file has one JSON object per line with the C(key) and C(value) of an entry, use M(ansible.builtin.fetch)
+              to copy it to the controller.
+            - The keys are read in chunks, so the memory used doesn't depend on the size of the table.
+            - The file is only replaced, and the task only reports a change, when its content changed. In check mode
+              nothing is read or written and no change is reported.
+        type: path
+        version_added: "0.4.0"
+    compress:
+        description: Compress the file written to I(dest) with gzip
+        type: bool
+        default: false
+        version_added: "0.4.0"
+    all_namespaces:
+        description:
+            - Read the entries in every namespace of a multi-ASIC switch, the host included. The results are returned in
+              C(namespaces), keyed by namespace, the host is C('').
+            - Mutually exclusive with I(namespace) and I(dest).
+        type: bool
+        default: false
+        version_added: "0.4.0"
+    if_none_match:
+        description:
+            - The C(fingerprint) returned by an earlier run of the same lookup. If the entries still have that fingerprint,
+              C(value) is left out of the result and C(not_modified) is true, so pollers don't transfer unchanged entries.
+            - The entries are still read from the database to compute the fingerprint.
+            - Mutually exclusive with I(dest).
+        type: str
+        version_added: "0.4.0"
 
 author:
     - Erik Larsson (@whooo)
@@ -37,6 +89,40 @@ EXAMPLES = r'''
   community.sonic.get_entry:
     table: VLAN
     key: Vlan3600
+
+# Get the rules of one ACL
+- name: get the rules of an ACL
+  community.sonic.get_entry:
+    table: ACL_RULE
+    key_pattern: DATAACL|*
+    fields:
+      - PRIORITY
+      - PACKET_ACTION
+
+# Export a large table to a file and copy it to the controller
+- name: export the ACL rules
+  community.sonic.get_entry:
+    table: ACL_RULE
+    dest: /tmp/acl_rule.jsonl.gz
+    compress: true
+  register: export_result
+
+- name: fetch the exported ACL rules
+  ansible.builtin.fetch:
+    src: '{{ export_result.dest }}'
+    dest: exports/
+
+# Only transfer the VLANs again when they changed
+- name: get vlan table if it changed
+  community.sonic.get_entry:
+    table: VLAN
+    if_none_match: '{{ vlans.fingerprint | default(omit) }}'
+  register: vlans_poll
+
+- name: keep the last VLANs
+  ansible.builtin.set_fact:
+    vlans: '{{ vlans_poll }}'
+  when: not vlans_poll.not_modified | default(false)
 '''
 
 RETURN = r'''
@@ -49,75 +135,174 @@ key:
     type: str
     returned: when a key was passed to the module
 value:
-    description: The database value
+    description:
+        - The database value.
+        - When I(keys) or I(key_pattern) was passed to the module, a dict of the matching keys and their entries.
     type: dict
-    returned: always
+    returned: when I(dest) was not passed to the module, and the entries changed if I(if_none_match) was passed
+fingerprint:
+    description:
+        - A fingerprint of C(value) and of the lookup, the table, key and fields. It only changes when they change, pass it
+          to I(if_none_match) to only get the entries again when they changed.
+    type: str
+    returned: when I(dest) was not passed to the module
+    sample: 3b1f0c5e8d0a4a5c9f5e2b7c6d4e1f0a9b8c7d6e5f4a3b2c1d0e9f8a7b6c5d4e
+not_modified:
+    description: Whether the entries still have the fingerprint passed in I(if_none_match)
+    type: bool
+    returned: when I(if_none_match) was passed to the module
+dest:
+    description: The file the entries were written to
+    type: str
+    returned: when I(dest) was passed to the module
+count:
+    description: The number of entries written to I(dest)
+    type: int
+    returned: when I(dest) was passed to the module
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The other return values are then only returned per namespace.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": true}, "asic1": {"changed": false}}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.058, "phases": {"import": 0.039, "connect": 0.011, "read": 0.003, "write": 0.0, "compute": 0.005},
+             "round_trips": 1, "commands": 1, "bytes_read": 70, "bytes_written": 0,
+             "keys_written": 0}
 '''
 
-import traceback
-from ansible.module_utils.basic import AnsibleModule, missing_required_lib
-
-try:
-    from swsscommon import swsscommon
-except ImportError:
-    HAS_SWSSCOMMON_LIBRARY = False
-    SWSSCOMMON_IMPORT_ERROR = traceback.format_exc()
-else:
-    HAS_SWSSCOMMON_LIBRARY = True
-    SWSSCOMMON_IMPORT_ERROR = None
-
-
-# get_entry / get_table can return a dict with tuples as keys, so called multi-keys
-# so join the tuple into a string so it can be JSON encoded
-def fix_keys(value):
-    if not isinstance(value, dict):
-        return value
-    new_value = dict()
-    for k, v in value.items():
-        if isinstance(k, tuple):
-            nk = '|'.join(k)
-        else:
-            nk = k
-        new_value[nk] = v
-    return new_value
+import filecmp
+import hashlib
+import gzip
+import json
+import os
+import tempfile
 
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import (
+    all_namespaces_argument_spec, common_argument_spec, connect)
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import run_namespaces
 
-def run_module():
-    module_args = dict(
-        table=dict(type='str', required=True),
-        key=dict(type='str', required=False, no_log=False),
-    )
 
-    module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=True
-    )
+def project_fields(entry, fields):
+    if fields is None:
+        return entry
+    return {f: v for f, v in entry.items() if f in fields}
+
+
+def fingerprint(table, value, key=None, fields=None):
+    """The fingerprint of the value returned for a lookup, changes when the value or the lookup changes
+
+    The values read from the database are strings, so they are hashed as is,
+    in a single serialization of the sorted value.
+    """
+    lookup = [table, key, sorted(fields) if fields is not None else None]
+    data = json.dumps([lookup, value], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
 
-    if not HAS_SWSSCOMMON_LIBRARY:
-        module.fail_json(
-            msg=missing_required_lib('swsscommon'),
-            exception=SWSSCOMMON_IMPORT_ERROR)
+def export_entries(entries, dest, compress=False, fields=None):
+    """Write (key, entry) tuples to dest as JSON lines
 
-    config_db = swsscommon.ConfigDBConnector()
-    config_db.connect()
+    The file is written to a temporary file next to dest and renamed when
+    it's complete, so a partial export never replaces an earlier one. If
+    dest already has the same content it's left alone, the gzip header has
+    no timestamp so the same entries always compress to the same bytes.
+    Returns the number of entries written and whether dest changed.
+    """
+    count = 0
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), prefix='.get_entry-')
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            f = gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) if compress else raw
+            for key, entry in entries:
+                line = json.dumps({'key': key, 'value': project_fields(entry, fields)}, sort_keys=True)
+                f.write(line.encode('utf-8') + b'\n')
+                count += 1
+            if compress:
+                f.close()
+        if os.path.isfile(dest) and filecmp.cmp(tmp, dest, shallow=False):
+            os.unlink(tmp)
+            return count, False
+        os.rename(tmp, dest)
+    except Exception:
+        os.unlink(tmp)
+        raise
+    return count, True
+
+
+def run(module):
+    session = connect(module)
 
     table = module.params.get('table')
     key = module.params.get('key', None)
-    if key is None:
-        value = config_db.get_table(table)
+    keys = module.params.get('keys', None)
+    key_pattern = module.params.get('key_pattern', None)
+    fields = module.params.get('fields', None)
+    dest = module.params.get('dest', None)
+    if dest is not None:
+        count = 0
+        changed = False
+        if not module.check_mode:
+            entries = session.iter_entries(table, key_pattern or '*')
+            count, changed = export_entries(entries, dest, module.params['compress'], fields)
+        session.exit_json(changed=changed, table=table, dest=dest, count=count)
+
+    if key is not None:
+        value = project_fields(session.get_entry(table, key), fields)
     else:
-        value = config_db.get_entry(table, key)
+        if key_pattern is not None:
+            keys = session.scan_keys(table, key_pattern)
+        if keys is not None:
+            value = session.get_entries(table, keys)
+        else:
+            value = session.get_table(table)
+        value = {k: project_fields(v, fields) for k, v in value.items()}
 
-    value = fix_keys(value)
     rargs = {
         'changed': False,
         'table': table,
-        'value': value,
+        'fingerprint': fingerprint(table, value, key, fields),
     }
+    if_none_match = module.params['if_none_match']
+    if if_none_match is not None:
+        rargs['not_modified'] = if_none_match == rargs['fingerprint']
+    # The caller already has the value if it's not modified
+    if not rargs.get('not_modified'):
+        rargs['value'] = value
     # If the whole table was requested, don't return the key as it will be None
     if key is not None:
         rargs['key'] = key
-    module.exit_json(**rargs)
+    session.exit_json(**rargs)
+
+
+def run_module():
+    module_args = dict(
+        table=dict(type='str', required=True),
+        key=dict(type='str', required=False, no_log=False),
+        keys=dict(type='list', elements='str', required=False, no_log=False),
+        key_pattern=dict(type='str', required=False, no_log=False),
+        fields=dict(type='list', elements='str', required=False),
+        dest=dict(type='path', required=False),
+        compress=dict(type='bool', default=False, required=False),
+        if_none_match=dict(type='str', required=False),
+    )
+    module_args.update(common_argument_spec())
+    module_args.update(all_namespaces_argument_spec())
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+        mutually_exclusive=(('key', 'keys', 'key_pattern'), ('dest', 'key'), ('dest', 'keys'), ('dest', 'if_none_match')),
+    )
+
+    run_namespaces(module, run)
 
 
 def main():
@@ -0,0 +1,213 @@
+#!/usr/bin/python
+#
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = r'''
+---
+module: rollback
+short_description: Restore the keys of the SONiC configuration database changed since a checkpoint
+version_added: "0.4.0"
+description:
+    - Restore the entries that the modules run with the I(checkpoint) option changed, to what they were before the first
+      change, without a C(config reload).
+    - Only the keys in the journal of the checkpoint are read and written, so the time a rollback takes and what it touches
+      depend on the size of the change and not on the size of the configuration.
+    - The changes are written in batches ordered by the references between the tables, like M(community.sonic.config_patch),
+      one transaction per batch.
+    - Entries that already have the value they had before the checkpoint are not written.
+extends_documentation_fragment:
+  - community.sonic.attributes
+  - community.sonic.configdb.common
+attributes:
+  check_mode:
+    support: full
+  diff_mode:
+    support: full
+options:
+    checkpoint:
+        description:
+            - The name of the checkpoint, as given to the I(checkpoint) option of the modules that made the changes.
+            - The module fails if the checkpoint doesn't exist. Use the same I(namespace) or I(all_namespaces) as the
+              modules that made the changes.
+        required: true
+        type: str
+    keep:
+        description:
+            - Keep the checkpoint after restoring it, so later changes made with it can be rolled back again to the same
+              entries.
+            - By default the checkpoint is removed, outside of check mode.
+        type: bool
+        default: false
+    all_namespaces:
+        description:
+            - Restore the checkpoint in every namespace of a multi-ASIC switch, the host included. The results are returned
+              in C(namespaces), keyed by namespace, the host is C('').
+            - Mutually exclusive with I(namespace).
+        type: bool
+        default: false
+
+author:
+    - Christian Svensson (@bluecmd)
+'''
+
+EXAMPLES = r'''
+- name: Add Vlan10 with a member
+  block:
+    - name: Add Vlan10
+      community.sonic.vlan:
+        vlanid: 10
+        checkpoint: change-1234
+
+    - name: Add Ethernet0 to Vlan10
+      community.sonic.vlan_member:
+        vlanid: 10
+        interface: Ethernet0
+        tagged: true
+        checkpoint: change-1234
+  rescue:
+    - name: Undo the changes
+      community.sonic.rollback:
+        checkpoint: change-1234
+
+# Roll back again to the same entries after more changes
+- name: Undo the changes and keep the checkpoint
+  community.sonic.rollback:
+    checkpoint: change-1234
+    keep: true
+'''
+
+RETURN = r'''
+changes:
+    description:
+        - The changes applied, or that would be applied in check mode, keyed by table and entry key.
+        - A removed entry is null, otherwise the fields that are set and the names of the fields that are deleted.
+    type: dict
+    returned: always
+    sample: {"VLAN": {"Vlan10": null}, "VLAN_MEMBER": {"Vlan10|Ethernet0": null}}
+batches:
+    description: The keys written by each batch, in the order they are written
+    type: list
+    elements: list
+    returned: always
+    sample: [["VLAN_MEMBER|Vlan10|Ethernet0"], ["VLAN|Vlan10"]]
+keys:
+    description: The number of keys in the journal of the checkpoint
+    type: int
+    returned: always
+    sample: 2
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The other return values are then only returned per namespace.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": true}, "asic1": {"changed": false}}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.082, "phases": {"import": 0.039, "connect": 0.011, "read": 0.007, "write": 0.01, "compute": 0.015},
+             "round_trips": 4, "commands": 4, "bytes_read": 27, "bytes_written": 39,
+             "keys_written": 2}
+'''
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import (
+    all_namespaces_argument_spec, checkpoint_path, common_argument_spec, connect)
+from ansible_collections.community.sonic.plugins.module_utils.entries import diff_table
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import run_namespaces
+from ansible_collections.community.sonic.plugins.module_utils.patch import order_changes
+
+
+def build_restore(journal):
+    """Returns the entries of the journal per table, None for keys that didn't exist"""
+    tables = dict()
+    for (table, key), entry in journal.items():
+        tables.setdefault(table, dict())[key] = entry
+    return tables
+
+
+def build_changes(restore, current):
+    changes = dict()
+    for table, entries in restore.items():
+        patch = diff_table(entries, current[table], 'replaced', table)
+        if patch:
+            changes[table] = patch
+    return changes
+
+
+def build_diff(changes, restore, current):
+    before = dict()
+    after = dict()
+    for table, patch in changes.items():
+        for key in patch:
+            if key in current[table]:
+                before.setdefault(table, dict())[key] = current[table][key]
+            if restore[table][key] is not None:
+                after.setdefault(table, dict())[key] = restore[table][key]
+    return {'before': before, 'after': after}
+
+
+def run(module):
+    name = module.params['checkpoint']
+    try:
+        path = checkpoint_path(name, module.params.get('namespace') or '')
+    except ValueError as e:
+        module.fail_json(msg=str(e))
+    if not os.path.exists(path):
+        module.fail_json(msg=f'checkpoint {name} does not exist')
+
+    session = connect(module)
+    restore = build_restore(session.journal)
+    # Only the keys of the journal are read
+    current = {table: session.get_entries(table, entries) for table, entries in restore.items()}
+    changes = build_changes(restore, current)
+    batches = order_changes(changes)
+
+    if not module.check_mode:
+        for batch in batches:
+            for table, table_patch in batch.items():
+                session.apply_patch(table, table_patch)
+            session.flush()
+        if not module.params['keep']:
+            os.unlink(path)
+
+    session.exit_json(
+        changed=bool(changes),
+        changes=changes,
+        batches=[[f'{t}|{k}' for t, p in batch.items() for k in p] for batch in batches],
+        keys=len(session.journal),
+        diff=build_diff(changes, restore, current))
+
+
+def run_module():
+    module_args = dict(
+        checkpoint=dict(type='str', required=True),
+        keep=dict(type='bool', default=False, required=False),
+    )
+    module_args.update(common_argument_spec())
+    module_args.update(all_namespaces_argument_spec())
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    run_namespaces(module, run)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/python
+#
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = r'''
+---
+module: save_config
+short_description: Save the SONiC configuration database to the startup configuration when it changed
+version_added: "0.4.0"
+description:
+    - Save the running configuration database to C(/etc/sonic/config_db.json), like C(config save), but only when it
+      differs from the saved configuration.
+    - The modules of the collection record every write to the configuration database on the switch. Without such a
+      write since the last save, nothing is read or written, unless I(force) is set.
+    - Otherwise the configuration database is read in one pipelined call and compared to the saved configuration. The
+      file is only written when they differ, through a temporary file that is renamed over it, so it is never partially
+      written.
+    - Use it as a handler notified by the tasks that change the configuration, so it runs once at the end of the play.
+    - Writes made on the controller with the C(community.sonic.redis) connection are not recorded on the switch, set
+      I(force) to compare the configuration after those.
+extends_documentation_fragment:
+  - community.sonic.attributes
+  - community.sonic.configdb.common
+attributes:
+  check_mode:
+    support: full
+  diff_mode:
+    support: none
+options:
+    path:
+        description:
+            - The file to save the configuration to.
+            - Defaults to C(/etc/sonic/config_db.json), or to C(/etc/sonic/config_dbN.json) for the namespace C(asicN) of a
+              multi-ASIC switch.
+        type: path
+    force:
+        description:
+            - Compare the configuration database to the saved configuration even when no write was recorded, for example
+              after changes made with the SONiC CLI.
+        type: bool
+        default: false
+    all_namespaces:
+        description:
+            - Save the configuration of every namespace of a multi-ASIC switch, the host included, each to its default
+              I(path). The results are returned in C(namespaces), keyed by namespace, the host is C('').
+            - Mutually exclusive with I(namespace) and I(path).
+        type: bool
+        default: false
+
+author:
+    - Christian Svensson (@bluecmd)
+'''
+
+EXAMPLES = r'''
+- name: Configure the switches
+  hosts: switches
+  tasks:
+    - name: Add Vlan10
+      community.sonic.vlan:
+        vlanid: 10
+      notify: Save the configuration
+
+  handlers:
+    - name: Save the configuration
+      community.sonic.save_config:
+      become: true
+
+# Save changes made outside of the collection as well
+- name: Save the configuration
+  community.sonic.save_config:
+    force: true
+  become: true
+'''
+
+RETURN = r'''
+path:
+    description: The file the configuration is saved to
+    type: str
+    returned: always
+    sample: /etc/sonic/config_db.json
+dirty:
+    description: Whether a write to the configuration database was recorded since the last save
+    type: bool
+    returned: always
+tables:
+    description: The tables that differ from the saved configuration, empty if the configuration database wasn't read
+    type: list
+    elements: str
+    returned: always
+    sample: ["VLAN", "VLAN_MEMBER"]
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The other return values are then only returned per namespace.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": true}, "asic1": {"changed": false}}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.118, "phases": {"import": 0.039, "connect": 0.011, "read": 0.027, "write": 0.0, "compute": 0.041},
+             "round_trips": 1, "commands": 218, "bytes_read": 8182, "bytes_written": 0,
+             "keys_written": 0}
+'''
+
+import json
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import (
+    all_namespaces_argument_spec, clear_dirty, common_argument_spec, connect, dirty_markers, write_file_atomic)
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import run_namespaces
+
+CONFIG_DIR = '/etc/sonic'
+
+
+def default_path(namespace=''):
+    """The startup configuration of a namespace, config_db0.json for asic0"""
+    if namespace.startswith('asic'):
+        namespace = namespace[len('asic'):]
+    return os.path.join(CONFIG_DIR, f'config_db{namespace}.json')
+
+
+def read_saved(path):
+    """Returns the saved configuration, None if it doesn't exist or can't be parsed"""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return saved if isinstance(saved, dict) else None
+
+
+def changed_tables(running, saved):
+    """The tables that differ between the running and the saved configuration"""
+    if saved is None:
+        return sorted(running)
+    return sorted(t for t in set(running) | set(saved) if running.get(t) != saved.get(t))
+
+
+def run(module):
+    namespace = module.params.get('namespace') or ''
+    path = module.params['path'] or default_path(namespace)
+    markers = dirty_markers(namespace)
+    result = {'path': path, 'dirty': bool(markers), 'tables': list()}
+
+    if not markers and not module.params['force'] and os.path.exists(path):
+        module.exit_json(changed=False, **result)
+
+    session = connect(module)
+    running = session.get_config()
+    result['tables'] = changed_tables(running, read_saved(path))
+
+    if not module.check_mode:
+        if result['tables']:
+            mode = os.stat(path).st_mode & 0o7777 if os.path.exists(path) else 0o644
+            try:
+                write_file_atomic(path, json.dumps(running, indent=4, sort_keys=True) + '\n', mode)
+            except OSError as e:
+                module.fail_json(msg=f'failed to save the configuration to {path}: {e}', **result)
+        clear_dirty(markers)
+
+    session.exit_json(changed=bool(result['tables']), **result)
+
+
+def run_module():
+    module_args = dict(
+        path=dict(type='path', required=False),
+        force=dict(type='bool', default=False, required=False),
+    )
+    module_args.update(common_argument_spec())
+    module_args.update(all_namespaces_argument_spec())
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    run_namespaces(module, run)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/python
+#
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = r'''
+---
+module: sonic_facts
+short_description: Gather facts from the SONiC databases
+version_added: "0.4.0"
+description:
+    - Gather the configuration, and optionally the state, of a SONiC switch as facts.
+    - All requested tables of a database are scanned together and their entries are read in a single pipeline, the rest of
+      the database is never read.
+extends_documentation_fragment:
+  - community.sonic.attributes
+  - community.sonic.configdb.common
+attributes:
+  check_mode:
+    support: full
+  diff_mode:
+    support: none
+options:
+    gather_subset:
+        description:
+            - The subsets of facts to gather, one or more of C(all), C(min), C(metadata), C(ports), C(vlans),
+              C(interfaces) and C(portchannels).
+            - Prefix a subset with C(!) to exclude it, for example C(!vlans).
+            - The C(min) subset, which is the device metadata, is always gathered.
+        type: list
+        elements: str
+        default: [all]
+    gather_network_resources:
+        description:
+            - The network resources to return in a structured form in C(ansible_network_resources).
+            - The tables needed are read even if they are not part of I(gather_subset).
+        type: list
+        elements: str
+        choices: [all, ports, vlans, portchannels]
+        default: []
+    databases:
+        description:
+            - The databases to gather the tables of the subsets from.
+            - C(STATE_DB) and C(APPL_DB) return the operational state of the ports, VLANs and port channels.
+        type: list
+        elements: str
+        choices: [CONFIG_DB, STATE_DB, APPL_DB]
+        default: [CONFIG_DB]
+    all_namespaces:
+        description:
+            - Gather the facts in every namespace of a multi-ASIC switch, the host included. The facts of the host are
+              returned as usual, the facts of every namespace in C(sonic_namespaces), keyed by namespace, the host is C('').
+            - Mutually exclusive with I(namespace).
+        type: bool
+        default: false
+        version_added: "0.4.0"
+
+author:
+    - Christian Svensson (@bluecmd)
+'''
+
+EXAMPLES = r'''
+# Gather all configuration facts
+- name: Gather facts
+  community.sonic.sonic_facts:
+
+# Gather the port configuration and state
+- name: Gather port facts
+  community.sonic.sonic_facts:
+    gather_subset:
+      - ports
+    databases:
+      - CONFIG_DB
+      - STATE_DB
+
+# Gather the ports of every ASIC of a multi-ASIC switch
+- name: Gather port facts of every namespace
+  community.sonic.sonic_facts:
+    gather_subset:
+      - ports
+    all_namespaces: true
+
+# Gather the VLANs as structured resources
+- name: Gather VLANs
+  community.sonic.sonic_facts:
+    gather_subset:
+      - min
+    gather_network_resources:
+      - vlans
+'''
+
+RETURN = r'''
+ansible_facts:
+    description: Facts to add to ansible_facts
+    returned: always
+    type: dict
+    contains:
+        sonic_gather_subset:
+            description: The subsets that were gathered
+            type: list
+            elements: str
+            returned: always
+        sonic_hostname:
+            description: The hostname from the device metadata
+            type: str
+            returned: always
+        sonic_platform:
+            description: The platform from the device metadata
+            type: str
+            returned: always
+        sonic_hwsku:
+            description: The hardware SKU from the device metadata
+            type: str
+            returned: always
+        sonic_config_db:
+            description: The configuration database tables of the gathered subsets
+            type: dict
+            returned: when C(CONFIG_DB) is in I(databases)
+        sonic_state_db:
+            description: The state database tables of the gathered subsets
+            type: dict
+            returned: when C(STATE_DB) is in I(databases)
+        sonic_appl_db:
+            description: The application database tables of the gathered subsets
+            type: dict
+            returned: when C(APPL_DB) is in I(databases)
+        ansible_network_resources:
+            description: The structured network resources
+            type: dict
+            returned: when I(gather_network_resources) is set
+            sample: {"vlans": [{"vlanid": 100, "dhcp_servers": [], "dhcpv6_servers": [],
+                     "members": [{"interface": "Ethernet0", "tagged": true}]}]}
+        sonic_namespaces:
+            description: The facts of every namespace, keyed by namespace, the host is C('')
+            type: dict
+            returned: when I(all_namespaces) is true
+            sample: {"": {"sonic_hostname": "switch1"}, "asic0": {"sonic_hostname": "switch1"}}
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The facts are returned in C(sonic_namespaces) instead.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": false}, "asic1": {"changed": false}}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.162, "phases": {"import": 0.04, "connect": 0.012, "read": 0.071, "write": 0.0, "compute": 0.039},
+             "round_trips": 2, "commands": 226, "bytes_read": 10787, "bytes_written": 0,
+             "keys_written": 0}
+'''
+
+import re
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import (
+    all_namespaces_argument_spec, common_argument_spec, connect)
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import run_namespaces
+
+
+# The tables of each subset, per database
+FACT_SUBSETS = {
+    'metadata': {
+        'CONFIG_DB': ('DEVICE_METADATA',),
+    },
+    'ports': {
+        'CONFIG_DB': ('PORT',),
+        'STATE_DB': ('PORT_TABLE',),
+        'APPL_DB': ('PORT_TABLE',),
+    },
+    'vlans': {
+        'CONFIG_DB': ('VLAN', 'VLAN_MEMBER', 'VLAN_INTERFACE'),
+        'STATE_DB': ('VLAN_TABLE', 'VLAN_MEMBER_TABLE'),
+        'APPL_DB': ('VLAN_TABLE', 'VLAN_MEMBER_TABLE'),
+    },
+    'interfaces': {
+        'CONFIG_DB': ('INTERFACE', 'LOOPBACK_INTERFACE'),
+        'STATE_DB': ('INTERFACE_TABLE',),
+        'APPL_DB': ('INTF_TABLE',),
+    },
+    'portchannels': {
+        'CONFIG_DB': ('PORTCHANNEL', 'PORTCHANNEL_MEMBER', 'PORTCHANNEL_INTERFACE'),
+        'STATE_DB': ('LAG_TABLE', 'LAG_MEMBER_TABLE'),
+        'APPL_DB': ('LAG_TABLE', 'LAG_MEMBER_TABLE'),
+    },
+}
+
+# The config db tables needed to build each network resource
+RESOURCE_TABLES = {
+    'ports': ('PORT',),
+    'vlans': ('VLAN', 'VLAN_MEMBER'),
+    'portchannels': ('PORTCHANNEL', 'PORTCHANNEL_MEMBER'),
+}
+
+DB_FACTS = {
+    'CONFIG_DB': 'sonic_config_db',
+    'STATE_DB': 'sonic_state_db',
+    'APPL_DB': 'sonic_appl_db',
+}
+
+
+class InvalidSubsetError(Exception):
+    pass
+
+
+def resolve_subsets(gather_subset):
+    """Resolve the gather_subset option into a sorted list of subsets"""
+    subsets = set()
+    excluded = set()
+    for subset in gather_subset:
+        exclude = subset.startswith('!')
+        name = subset.lstrip('!')
+        if name == 'all':
+            names = set(FACT_SUBSETS)
+        elif name == 'min':
+            names = {'metadata'}
+        elif name in FACT_SUBSETS:
+            names = {name}
+        else:
+            raise InvalidSubsetError(f'unknown subset "{name}", expected one of all, min, {", ".join(sorted(FACT_SUBSETS))}')
+        if exclude:
+            excluded.update(names)
+        else:
+            subsets.update(names)
+    # The device metadata is always gathered
+    return sorted((subsets - excluded) | {'metadata'})
+
+
+def natural_key(name):
+    return [int(p) if p.isdigit() else p for p in re.split(r'(\d+)', name)]
+
+
+def build_ports(config):
+    ports = list()
+    for name in sorted(config.get('PORT', dict()), key=natural_key):
+        port = config['PORT'][name]
+        ports.append({
+            'name': name,
+            'alias': port.get('alias'),
+            'description': port.get('description'),
+            'speed': port.get('speed'),
+            'fec': port.get('fec'),
+            'mtu': port.get('mtu'),
+            'enabled': port.get('admin_status') == 'up',
+        })
+    return ports
+
+
+def build_vlans(config):
+    members = dict()
+    for key in sorted(config.get('VLAN_MEMBER', dict()), key=natural_key):
+        vlan, interface = key.split('|', 1)
+        tagged = config['VLAN_MEMBER'][key].get('tagging_mode') == 'tagged'
+        members.setdefault(vlan, list()).append({'interface': interface, 'tagged': tagged})
+    vlans = list()
+    for name in sorted(config.get('VLAN', dict()), key=natural_key):
+        vlan = config['VLAN'][name]
+        vlans.append({
+            'vlanid': int(vlan.get('vlanid', name[len('Vlan'):])),
+            'dhcp_servers': vlan.get('dhcp_servers', list()),
+            'dhcpv6_servers': vlan.get('dhcpv6_servers', list()),
+            'members': members.get(name, list()),
+        })
+    return vlans
+
+
+def build_portchannels(config):
+    members = dict()
+    for key in sorted(config.get('PORTCHANNEL_MEMBER', dict()), key=natural_key):
+        portchannel, interface = key.split('|', 1)
+        members.setdefault(portchannel, list()).append(interface)
+    portchannels = list()
+    for name in sorted(config.get('PORTCHANNEL', dict()), key=natural_key):
+        portchannel = config['PORTCHANNEL'][name]
+        portchannels.append({
+            'name': name,
+            'min_links': portchannel.get('min_links'),
+            'mtu': portchannel.get('mtu'),
+            'enabled': portchannel.get('admin_status') == 'up',
+            'members': members.get(name, list()),
+        })
+    return portchannels
+
+
+RESOURCE_BUILDERS = {
+    'ports': build_ports,
+    'vlans': build_vlans,
+    'portchannels': build_portchannels,
+}
+
+
+def build_facts(subsets, resources, tables, databases=None):
+    """Build the facts from the tables read from each database
+
+    Only the tables of the databases in databases, all by default, are
+    returned as facts. The config db is also read for the device metadata
+    and the network resources when it isn't requested.
+    """
+    config = tables.get('CONFIG_DB', dict())
+    metadata = config.get('DEVICE_METADATA', dict()).get('localhost', dict())
+    facts = {
+        'sonic_gather_subset': subsets,
+        'sonic_hostname': metadata.get('hostname'),
+        'sonic_platform': metadata.get('platform'),
+        'sonic_hwsku': metadata.get('hwsku'),
+    }
+    for db_name, db_tables in tables.items():
+        if databases is None or db_name in databases:
+            facts[DB_FACTS[db_name]] = db_tables
+    if resources:
+        facts['ansible_network_resources'] = {r: RESOURCE_BUILDERS[r](config) for r in resources}
+    return facts
+
+
+def gather(module):
+    try:
+        subsets = resolve_subsets(module.params['gather_subset'])
+    except InvalidSubsetError as e:
+        module.fail_json(msg=str(e))
+
+    resources = module.params['gather_network_resources']
+    if 'all' in resources:
+        resources = sorted(RESOURCE_BUILDERS)
+
+    # The config db is always read for the device metadata
+    tables = dict()
+    for db_name in sorted(set(module.params['databases']) | {'CONFIG_DB'}):
+        names = set()
+        for subset in subsets:
+            names.update(FACT_SUBSETS[subset].get(db_name, ()))
+        if db_name == 'CONFIG_DB':
+            for resource in resources:
+                names.update(RESOURCE_TABLES[resource])
+        session = connect(module, db_name)
+        tables[db_name] = session.get_tables(sorted(names))
+
+    facts = build_facts(subsets, resources, tables, module.params['databases'])
+
+    session.exit_json(changed=False, ansible_facts=facts)
+
+
+def combine_facts(result):
+    """Moves the facts of every namespace into sonic_namespaces, the facts of the host stay the facts"""
+    facts = {ns: r.pop('ansible_facts', dict()) for ns, r in result['namespaces'].items()}
+    result['ansible_facts'] = dict(facts.get('', dict()), sonic_namespaces=facts)
+    return result
+
+
+def run_module():
+    module_args = dict(
+        gather_subset=dict(type='list', elements='str', default=['all'], required=False),
+        gather_network_resources=dict(type='list', elements='str', default=list(), required=False,
+                                      choices=['all', 'ports', 'vlans', 'portchannels']),
+        databases=dict(type='list', elements='str', default=['CONFIG_DB'], required=False,
+                       choices=['CONFIG_DB', 'STATE_DB', 'APPL_DB']),
+    )
+    module_args.update(common_argument_spec())
+    module_args.update(all_namespaces_argument_spec())
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    run_namespaces(module, gather, combine_facts)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
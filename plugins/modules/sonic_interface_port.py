@@ -16,9 +16,18 @@ DOCUMENTATION = r'''
 module: sonic_interface_port
 short_description: Configure a SONiC interface port
 version_added: "0.0.1"
-description: Manage all settings related to interface ports in SONiC
+description:
+    - Manage all settings related to interface ports in SONiC
+    - With I(wait) the module waits until C(PORT_TABLE) of C(APPL_DB) has the changed speed, FEC, MTU, admin status and
+      description of the ports, then until C(PORT_TABLE) of C(STATE_DB) has the changed admin status and speed, which
+      portsyncd and orchagent set once the port was changed in the kernel and in the ASIC.
+    - The FEC, MTU and description are only waited for in C(APPL_DB), so the wait doesn't tell when they took effect in
+      the ASIC. The operational status of the ports isn't waited for, a port that is administratively up can still be
+      down, for example without a cable.
 extends_documentation_fragment:
   - community.sonic.attributes
+  - community.sonic.configdb
+  - community.sonic.configdb.wait
 attributes:
   check_mode:
     support: full
@@ -26,19 +35,27 @@ attributes:
     support: full
 options:
     interface:
-        description: The interface name to operate on. Alias naming is supported.
-        required: true
+        description:
+            - The interface name to operate on. Alias naming is supported.
+            - One of I(interface) or I(ports) is required.
         type: str
     description:
         description: Update the interface description to this string
         required: false
         type: str
     speed:
-        description: Human readable format for the interface speed
+        description:
+            - Human readable format for the interface speed.
+            - When the module runs on the switch, the speeds supported by the breakout mode of the port in C(platform.json)
+              of the platform are enforced.
         required: false
         type: str
     fec:
-        description: The FEC mode to use.
+        description:
+            - The FEC mode to use.
+            - When the module runs on the switch, a FEC mode the port doesn't support at its speed is rejected. If the FEC
+              mode of the port isn't supported at a new speed and none is given, the default of the hwsku, or C(none) or
+              C(rs) depending on the lanes, is set.
         choices:
             - none
             - rs
@@ -50,6 +67,36 @@ options:
         description: Admin status for the interface
         required: false
         type: bool
+    ports:
+        description:
+            - A list of ports to configure in a single invocation.
+            - The C(PORT) table is read once and only the changed ports are written, in one batch.
+            - Mutually exclusive with I(interface), I(description), I(speed), I(fec) and I(enabled).
+        type: list
+        elements: dict
+        version_added: "0.4.0"
+        suboptions:
+            interface:
+                description: The interface name to operate on. Alias naming is supported.
+                required: true
+                type: str
+            description:
+                description: Update the interface description to this string
+                type: str
+            speed:
+                description: Human readable format for the interface speed, validated like I(speed)
+                type: str
+            fec:
+                description: The FEC mode to use, validated like I(fec)
+                choices:
+                    - none
+                    - rs
+                    - fc
+                    - auto
+                type: str
+            enabled:
+                description: Admin status for the interface
+                type: bool
 
 author:
     - Christian Svensson (@bluecmd)
@@ -69,29 +116,78 @@ EXAMPLES = r'''
     description: This is the uplink
     speed: 1G
     enabled: True
+
+# Configure many ports at once
+- name: Set port properties in aggregate
+  community.sonic.sonic_interface_port:
+    ports:
+      - interface: qsfp1
+        description: Uplink 1
+        speed: 100G
+        fec: rs
+      - interface: qsfp2
+        description: Uplink 2
+        enabled: false
 '''
 
 RETURN = r'''
 interface:
     description: The resolved interface name
     type: str
-    returned: always
+    returned: when I(interface) was passed to the module
+results:
+    description: The changed fields of every changed port, keyed by the resolved interface name
+    type: dict
+    returned: when I(ports) was passed to the module
+    sample: {"Ethernet0": {"speed": {"before": "40000", "after": "100000"}}}
+waited:
+    description: The number of seconds waited for the changes to be applied
+    type: float
+    returned: when I(wait) is true and something changed
+    sample: 0.42
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The other return values are then only returned per namespace.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": true}, "asic1": {"changed": false}}
+plan:
+    description:
+        - The plan file, the number of write batches and the number of keys written to the database or to the plan.
+    type: dict
+    returned: when I(plan) or I(apply_plan) is set
+    sample: {"path": "/var/tmp/ports.plan", "batches": 1, "keys": 32}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.093, "phases": {"import": 0.04, "connect": 0.011, "read": 0.019, "write": 0.005, "compute": 0.018},
+             "round_trips": 2, "commands": 34, "bytes_read": 2189, "bytes_written": 30,
+             "keys_written": 1}
 '''
 
 import copy
 import re
-import traceback
 
-from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.capabilities import format_speed, load_capabilities
+from ansible_collections.community.sonic.plugins.module_utils.configdb import configdb_argument_spec, connect
+from ansible_collections.community.sonic.plugins.module_utils.entries import diff_fields, diff_table
+from ansible_collections.community.sonic.plugins.module_utils.interfaces import InterfaceIndex, resolve_interface
+from ansible_collections.community.sonic.plugins.module_utils.interfaces import NoSuchInterfaceError as InterfaceNotFoundError
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import owned_interfaces, run_namespaces, skip_interface
+from ansible_collections.community.sonic.plugins.module_utils.wait import wait_argument_spec, wait_for_all
+
 
-try:
-    from swsscommon import swsscommon
-except ImportError:
-    HAS_SWSSCOMMON_LIBRARY = False
-    SWSSCOMMON_IMPORT_ERROR = traceback.format_exc()
-else:
-    HAS_SWSSCOMMON_LIBRARY = True
-    SWSSCOMMON_IMPORT_ERROR = None
+# The fields portmgrd copies to APPL_DB PORT_TABLE, with the value it sets
+# when they are removed, None if it keeps the last value
+APPLIED_PORT_FIELDS = {'admin_status': 'down', 'description': '', 'speed': None, 'fec': None, 'mtu': None}
+# The fields of STATE_DB PORT_TABLE once the port is changed in the kernel
+# (admin_status, by portsyncd) and in the ASIC (speed, by orchagent)
+STATE_PORT_FIELDS = ('admin_status', 'speed')
 
 
 class ModuleError(Exception):
@@ -106,6 +202,10 @@ class InvalidSpeedError(ModuleError):
     pass
 
 
+class InvalidFecError(ModuleError):
+    pass
+
+
 # TODO: Figure out how to move this to a utils class
 SIZE_RANGES = {
     'Y': 10 ** 24,
@@ -165,10 +265,15 @@ def mutate_state(port_table,
                  description=None,
                  enabled=None,
                  speed=None,
-                 fec=None):
+                 fec=None,
+                 interfaces=None,
+                 capabilities=None):
     changed = False
-    port_alias_table = {v['alias']: k for k, v in port_table.items() if 'alias' in v}
-    ifname = port_alias_table.get(interface, interface)
+    # Building the interface index is linear in the number of ports, so
+    # callers handling many interfaces should build it once and pass it in
+    if interfaces is None:
+        interfaces = InterfaceIndex.from_tables(port_table)
+    ifname = interfaces.get(interface) or interface
     if ifname not in port_table:
         raise NoSuchInterfaceError(f'could not find interface "{ifname}"')
 
@@ -187,7 +292,7 @@ def mutate_state(port_table,
         if enabled:
             new_state['admin_status'] = 'up'
         else:
-            del new_state['admin_status']
+            new_state.pop('admin_status', None)
         changed = changed or (
             new_state.get('admin_status') != current_state.get('admin_status'))
 
@@ -200,17 +305,21 @@ def mutate_state(port_table,
         changed = changed or (
             new_state.get('speed') != current_state.get('speed'))
 
-    # If the interface is configured for a speed that does not utilize FEC
-    # (e.g. 40G, or 10G) we remove the old FEC mode if a new one is not
-    # specified. This is done in order to not force the user to clean up
-    # the old FEC that may have been set from when the interface possibly
-    # operated on a higher speed.
-    # As it is not currently possible to remove the FEC entry in a nice way,
-    # we force it to 'none' instead.
-    port_speed_gbit = int(new_state.get('speed') or current_state.get('speed')) // 1000
-    if port_speed_gbit != 25 and port_speed_gbit < 100:
-        if fec is None and 'fec' in current_state:
-            fec = 'none'
+    port_speed = int(new_state.get('speed') or current_state.get('speed'))
+    if capabilities is not None:
+        fec = check_capabilities(capabilities, ifname, new_state, port_speed, speed is not None, fec)
+    else:
+        # If the interface is configured for a speed that does not utilize FEC
+        # (e.g. 40G, or 10G) we remove the old FEC mode if a new one is not
+        # specified. This is done in order to not force the user to clean up
+        # the old FEC that may have been set from when the interface possibly
+        # operated on a higher speed.
+        # As it is not currently possible to remove the FEC entry in a nice way,
+        # we force it to 'none' instead.
+        port_speed_gbit = port_speed // 1000
+        if port_speed_gbit != 25 and port_speed_gbit < 100:
+            if fec is None and 'fec' in current_state:
+                fec = 'none'
 
     if fec is not None:
         new_state['fec'] = fec
@@ -220,53 +329,197 @@ def mutate_state(port_table,
     return (current_state, new_state, ifname, changed)
 
 
-def run_module():
-    module_args = dict(
-        interface=dict(type='str', required=True),
-        description=dict(type='str', required=False),
-        enabled=dict(type='bool', required=False),
-        speed=dict(type='str', required=False),
-        fec=dict(type='str', required=False, choices=['none', 'rs', 'fc', 'auto']),
-    )
+def check_capabilities(capabilities, ifname, state, port_speed, speed_changed, fec):
+    """Validate the speed and FEC of a port against what the platform supports
 
-    module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=True
-    )
+    A FEC mode the port doesn't support at the new speed is replaced by the
+    default of the hwsku, or of the speed, unless a FEC mode is given.
+    Returns the FEC mode to set, raises InvalidSpeedError or InvalidFecError.
+    """
+    if speed_changed:
+        speeds = capabilities.speeds(state)
+        if speeds is not None and port_speed not in speeds:
+            supported = ', '.join(format_speed(s) for s in sorted(speeds, reverse=True))
+            raise InvalidSpeedError(
+                f'speed {format_speed(port_speed)} is not supported by {ifname}, the supported speeds are {supported}')
+
+    modes = capabilities.fec_modes(state, port_speed)
+    if modes is None:
+        return fec
+    if fec is not None:
+        if fec not in modes:
+            raise InvalidFecError(
+                f'fec {fec} is not supported by {ifname} at {format_speed(port_speed)}, '
+                f'the supported modes are {", ".join(sorted(modes))}')
+        return fec
+    if 'fec' in state and state['fec'] not in modes:
+        return capabilities.default_fec(state, port_speed)
+    return None
+
+
+def mutate_ports(port_table, ports, capabilities=None):
+    """Apply mutate_state to a list of ports
+
+    The interface index is built once for all ports. If a port is listed
+    more than once the changes are applied in order.
+    Returns the new state of every port.
+    """
+    interfaces = InterfaceIndex.from_tables(port_table)
+    new_table = dict()
+    for item in ports:
+        ifname = interfaces.get(item['interface']) or item['interface']
+        table = port_table
+        if ifname in new_table:
+            table = dict(port_table)
+            table[ifname] = new_table[ifname]
+        _, new_state, ifname, _ = mutate_state(table, interfaces=interfaces, capabilities=capabilities, **item)
+        new_table[ifname] = new_state
+    return new_table
+
+
+def write_ports(session, patch):
+    # Specifically for description, if it has been removed we need to clean
+    # it up from APPL_DB / PORT_TABLE since that is not done automatically
+    # as of this writing (2023-04-15).
+    # The cleanest way to do this is to set the description to '' before
+    # deleting it, which triggers the APPL_DB to refresh. Both writes are
+    # seen at once if they are flushed together, so this takes two flushes.
+    for ifname, change in patch.items():
+        if 'description' in change['delete']:
+            session.mod_entry('PORT', ifname, {'description': ''})
+    if session.pending:
+        session.flush()
+
+    session.apply_patch('PORT', patch)
+    session.flush()
+
+
+def applied_ports(patch):
+    """The fields of APPL_DB PORT_TABLE once the changes of a PORT patch are applied"""
+    wanted = dict()
+    for ifname, change in patch.items():
+        fields = {f: v for f, v in change['set'].items() if f in APPLIED_PORT_FIELDS}
+        fields.update((f, APPLIED_PORT_FIELDS[f]) for f in change['delete'] if APPLIED_PORT_FIELDS.get(f) is not None)
+        if fields:
+            wanted[ifname] = fields
+    return wanted
+
+
+def port_wait_targets(patch):
+    """The entries to wait for once the changes of a PORT patch are written"""
+    applied = applied_ports(patch)
+    state = dict()
+    for ifname, fields in applied.items():
+        fields = {f: v for f, v in fields.items() if f in STATE_PORT_FIELDS}
+        if fields:
+            state[ifname] = fields
+    return [('APPL_DB', 'PORT_TABLE', applied), ('STATE_DB', 'PORT_TABLE', state)]
+
+
+def run_aggregate(module, session):
+    port_table = session.get_table('PORT')
+    # In the runs of all_namespaces only the ports of the namespace are configured
+    owned = owned_interfaces(module, InterfaceIndex.from_tables(port_table), [p['interface'] for p in module.params['ports']])
+    ports = [p for p in module.params['ports'] if p['interface'] in owned]
+    capabilities = None
+    if any(p['speed'] is not None or p['fec'] is not None for p in ports):
+        capabilities = load_capabilities(session)
+
+    try:
+        new_states = mutate_ports(port_table, ports, capabilities)
+    except ModuleError as e:
+        module.fail_json(msg=str(e))
+
+    patch = diff_table(new_states, port_table, 'replaced', 'PORT')
+    results = {ifname: diff_fields(new_states[ifname], port_table[ifname]) for ifname in patch}
+    diff = {
+        'before': {ifname: {k: v['before'] for k, v in fields.items() if 'before' in v} for ifname, fields in results.items()},
+        'after': {ifname: {k: v['after'] for k, v in fields.items() if 'after' in v} for ifname, fields in results.items()},
+    }
 
-    if not HAS_SWSSCOMMON_LIBRARY:
-        module.fail_json(
-            msg=missing_required_lib('swsscommon'),
-            exception=SWSSCOMMON_IMPORT_ERROR)
+    if not module.check_mode and patch:
+        write_ports(session, patch)
 
-    config_db = swsscommon.ConfigDBConnector()
-    config_db.connect()
-    port_table = config_db.get_table('PORT')
+    waited = wait_for_all(module, session, port_wait_targets(patch))
+    session.exit_json(changed=bool(patch), results=results, diff=diff, **waited)
 
+
+def run(module):
+    session = connect(module)
+
+    if module.params['ports'] is not None:
+        run_aggregate(module, session)
+
+    params = {k: module.params[k] for k in ('interface', 'description', 'enabled', 'speed', 'fec')}
+    # Only the entry of the port is read, an alias is resolved with the cached interface index
     try:
-        old_state, new_state, ifname, changed = mutate_state(port_table, **module.params)
+        ifname = resolve_interface(session, params['interface'])
+    except InterfaceNotFoundError:
+        # mutate_state reports the missing interface
+        ifname = params['interface']
+    entry = session.get_entry('PORT', ifname)
+    port_table = {ifname: entry} if entry else dict()
+    capabilities = None
+    if module.params['speed'] is not None or module.params['fec'] is not None:
+        capabilities = load_capabilities(session)
+
+    try:
+        old_state, new_state, ifname, changed = mutate_state(port_table, capabilities=capabilities, **dict(params, interface=ifname))
+    except NoSuchInterfaceError as e:
+        if skip_interface(module, params['interface']):
+            session.exit_json(changed=False, interface=params['interface'])
+        module.fail_json(msg=str(e))
     except ModuleError as e:
         module.fail_json(msg=str(e))
 
+    # mutate_state compares the raw values, the patch also takes defaults
+    # like admin_status being down when it's not set into account
+    patch = diff_table({ifname: new_state}, {ifname: old_state}, 'replaced', 'PORT')
+    changed = bool(patch)
+
     diff = {'before': old_state, 'after': new_state}
 
     if module.check_mode:
-        module.exit_json(changed=changed, interface=ifname, diff=diff)
+        session.exit_json(changed=changed, interface=ifname, diff=diff)
 
     if not changed:
-        module.exit_json(changed=changed, interface=ifname, diff=diff)
+        session.exit_json(changed=changed, interface=ifname, diff=diff)
 
-    if 'description' in old_state and 'description' not in new_state:
-        # Specifically for description, if it has been removed we need to clean
-        # it up from APPL_DB / PORT_TABLE since that is not done automatically
-        # as of this writing (2023-04-15).
-        # The cleanest way to do this is to set the description to '' before
-        # deleting it, which triggers the APPL_DB to refresh.
-        config_db.mod_entry('PORT', ifname, {'description': ''})
+    write_ports(session, patch)
+
+    waited = wait_for_all(module, session, port_wait_targets(patch))
+    session.exit_json(changed=changed, interface=ifname, diff=diff, **waited)
+
+
+def run_module():
+    port_args = dict(
+        interface=dict(type='str', required=True),
+        description=dict(type='str', required=False),
+        enabled=dict(type='bool', required=False),
+        speed=dict(type='str', required=False),
+        fec=dict(type='str', required=False, choices=['none', 'rs', 'fc', 'auto']),
+    )
+    module_args = dict(
+        interface=dict(type='str', required=False),
+        description=dict(type='str', required=False),
+        enabled=dict(type='bool', required=False),
+        speed=dict(type='str', required=False),
+        fec=dict(type='str', required=False, choices=['none', 'rs', 'fc', 'auto']),
+        ports=dict(type='list', elements='dict', options=port_args, required=False),
+    )
+    module_args.update(configdb_argument_spec())
+    module_args.update(wait_argument_spec())
 
-    config_db.set_entry('PORT', ifname, new_state)
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+        required_one_of=(('interface', 'ports'),),
+        mutually_exclusive=(
+            ('interface', 'ports'), ('description', 'ports'), ('enabled', 'ports'),
+            ('speed', 'ports'), ('fec', 'ports')),
+    )
 
-    module.exit_json(changed=changed, interface=ifname, diff=diff)
+    run_namespaces(module, run)
 
 
 def main():
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+#
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = r'''
+---
+module: sonic_snapshot
+short_description: Take a snapshot of SONiC configuration database tables for the play
+version_added: "0.4.0"
+description:
+    - Read configuration database tables once and store them as the C(sonic_snapshot) fact of the host.
+    - The tables are scanned together and their entries are read in a single pipeline, the rest of the database is never
+      read.
+    - The action plugins of M(community.sonic.vlan), M(community.sonic.vlan_member), M(community.sonic.sonic_interface_port)
+      and M(community.sonic.config_table) pass the snapshot to the module, so later tasks compute their changes without
+      reading the tables again.
+    - The entries a module writes are checked against the switch before writing and the snapshot is updated with the
+      written entries, see the I(snapshot) option of those modules.
+    - The snapshot is taken in one namespace of a multi-ASIC switch, the host by default. It is only used by the tasks
+      run in the same I(namespace), never by tasks run with I(all_namespaces).
+extends_documentation_fragment:
+  - community.sonic.attributes
+  - community.sonic.configdb.common
+attributes:
+  check_mode:
+    support: full
+  diff_mode:
+    support: none
+options:
+    tables:
+        description: The tables to take a snapshot of
+        type: list
+        elements: str
+        default: [PORT, VLAN, VLAN_MEMBER]
+
+author:
+    - Christian Svensson (@bluecmd)
+'''
+
+EXAMPLES = r'''
+- name: Snapshot the tables used by the following tasks
+  community.sonic.sonic_snapshot:
+    tables:
+      - PORT
+      - VLAN
+      - VLAN_MEMBER
+
+- name: Add VLAN, computed against the snapshot
+  community.sonic.vlan:
+    vlanid: 3600
+'''
+
+RETURN = r'''
+ansible_facts:
+    description: Facts to add to ansible_facts
+    returned: always
+    type: dict
+    contains:
+        sonic_snapshot:
+            description: The snapshot of the tables
+            type: dict
+            returned: always
+            contains:
+                tables:
+                    description: The content of every table, keyed by table name
+                    type: dict
+                    returned: always
+                namespace:
+                    description: The namespace the snapshot was taken in, C('') for the host
+                    type: str
+                    returned: always
+                    sample: asic0
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.131, "phases": {"import": 0.04, "connect": 0.011, "read": 0.058, "write": 0.0, "compute": 0.022},
+             "round_trips": 2, "commands": 218, "bytes_read": 8093, "bytes_written": 0,
+             "keys_written": 0}
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import connect, common_argument_spec
+
+
+def run_module():
+    module_args = dict(
+        tables=dict(type='list', elements='str', default=['PORT', 'VLAN', 'VLAN_MEMBER'], required=False),
+    )
+    module_args.update(common_argument_spec())
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    session = connect(module)
+
+    tables = session.get_tables(module.params['tables'])
+    snapshot = {'tables': tables, 'namespace': module.params.get('namespace') or ''}
+    session.exit_json(changed=False, ansible_facts={'sonic_snapshot': snapshot})
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -12,11 +12,17 @@ DOCUMENTATION = r'''
 module: vlan
 short_description: Configure a SONiC VLANs
 version_added: "0.2.0"
-description: Manage VLANs in SONiC
+description:
+    - Manage VLANs in SONiC
+    - With I(wait) the module waits until the VLANs are created or removed in C(VLAN_TABLE) of C(STATE_DB).
+extends_documentation_fragment:
+  - community.sonic.configdb
+  - community.sonic.configdb.wait
 options:
     vlanid:
-        description: The VLAN ID to configure
-        required: true
+        description:
+            - The VLAN ID to configure.
+            - One of I(vlanid) or I(vlans) is required.
         type: int
     state:
         description: Whether the VLAN should be present or absent
@@ -28,6 +34,29 @@ options:
         type: list
         elements: str
         default: []
+    vlans:
+        description:
+            - A list of VLANs to configure in a single invocation.
+            - The C(VLAN) table is read once and only the changed VLANs are written, in one batch.
+            - Mutually exclusive with I(vlanid).
+        type: list
+        elements: dict
+        version_added: "0.4.0"
+        suboptions:
+            vlanid:
+                description: The VLAN ID or a range of VLAN IDs, for example C(100-199,300)
+                required: true
+                type: str
+            state:
+                description: Whether the VLANs should be present or absent
+                default: present
+                type: str
+                choices: [present, absent]
+            dhcp_servers:
+                description: DHCP servers to relay DHCP packets to
+                type: list
+                elements: str
+                default: []
 
 author:
     - Erik Larsson (@whooo)
@@ -52,28 +81,72 @@ EXAMPLES = r'''
     dhcp_servers:
       - "10.1.0.2"
       - "10.1.0.3"
+
+# Add and remove many VLANs at once
+- name: Aggregate VLANs
+  community.sonic.vlan:
+    vlans:
+      - vlanid: 100-199,300
+        dhcp_servers:
+          - "10.1.0.2"
+      - vlanid: 400-409
+        state: absent
 '''
 
 RETURN = r'''
 interface:
     description: The VLAN interface name
     type: str
-    returned: always
+    returned: when I(vlanid) was passed to the module
+results:
+    description: The changed status for each VLAN
+    type: list
+    elements: dict
+    returned: when I(vlans) was passed to the module
+    contains:
+        interface:
+            description: The VLAN interface name
+            type: str
+        changed:
+            description: Whether the VLAN was changed
+            type: bool
+    sample: [{"interface": "Vlan100", "changed": true}]
+waited:
+    description: The number of seconds waited for the changes to be applied
+    type: float
+    returned: when I(wait) is true and something changed
+    sample: 0.42
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The other return values are then only returned per namespace.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": true}, "asic1": {"changed": false}}
+plan:
+    description:
+        - The plan file, the number of write batches and the number of keys written to the database or to the plan.
+    type: dict
+    returned: when I(plan) or I(apply_plan) is set
+    sample: {"path": "/var/tmp/vlans.plan", "batches": 1, "keys": 12}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.071, "phases": {"import": 0.038, "connect": 0.011, "read": 0.004, "write": 0.005, "compute": 0.013},
+             "round_trips": 2, "commands": 2, "bytes_read": 0, "bytes_written": 20,
+             "keys_written": 1}
 '''
 
 import ipaddress
-import traceback
-from ansible.module_utils.basic import AnsibleModule, missing_required_lib
-from ansible_collections.community.sonic.plugins.module_utils.entries import compare_entries
-
-try:
-    from swsscommon import swsscommon
-except ImportError:
-    HAS_SWSSCOMMON_LIBRARY = False
-    SWSSCOMMON_IMPORT_ERROR = traceback.format_exc()
-else:
-    HAS_SWSSCOMMON_LIBRARY = True
-    SWSSCOMMON_IMPORT_ERROR = None
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import configdb_argument_spec, connect
+from ansible_collections.community.sonic.plugins.module_utils.entries import diff_table
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import run_namespaces
+from ansible_collections.community.sonic.plugins.module_utils.ranges import expand_range
+from ansible_collections.community.sonic.plugins.module_utils.wait import state_entries, wait_argument_spec, wait_for
 
 
 def check_address(address):
@@ -113,41 +186,91 @@ def build_vlan_entry(vlanid, state, dhcp_servers):
     return key, val
 
 
-def run_module():
-    module_args = dict(
-        vlanid=dict(type='int', required=True),
-        state=dict(type='str', default='present', choices=['present', 'absent'], required=False),
-        dhcp_servers=dict(type='list', elements='str', default=list(), required=False),
-    )
+def build_vlan_entries(vlans):
+    """Build the entries for a list of VLANs
 
-    module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=True
-    )
+    Each vlanid can be a range of VLAN IDs, if a VLAN is listed more than
+    once the last item wins.
+    Returns a dict of keys and their entries, None for absent VLANs.
+    """
+    entries = dict()
+    for item in vlans:
+        for vlanid in expand_range(item['vlanid'], lower=1, upper=4094):
+            key, val = build_vlan_entry(vlanid, item['state'], item['dhcp_servers'])
+            entries[key] = val
+    return entries
+
+
+def run_aggregate(module, session):
+    try:
+        entries = build_vlan_entries(module.params['vlans'])
+    except ValueError as e:
+        module.fail_json(msg=f'invalid vlanid: {e}')
+
+    # Read the whole table once instead of looking up every single VLAN
+    cur_table = session.get_table('VLAN')
+    patch = diff_table(entries, cur_table, 'replaced', 'VLAN')
+    results = [dict(interface=key, changed=key in patch) for key in entries]
+
+    if not module.check_mode and patch:
+        session.apply_patch('VLAN', patch)
+        session.flush()
 
+    waited = wait_for(module, session, 'STATE_DB', 'VLAN_TABLE', state_entries(patch))
+    session.exit_json(changed=bool(patch), results=results, **waited)
+
+
+def run(module):
     # Check all addresses in dhcp_servers so we can provide an good error message
-    for ds in module.params.get('dhcp_servers', []):
+    dhcp_servers = list(module.params.get('dhcp_servers', []))
+    for item in module.params.get('vlans') or []:
+        dhcp_servers.extend(item['dhcp_servers'])
+    for ds in dhcp_servers:
         if not check_address(ds):
             module.fail_json(msg=f'dhcp server address {ds} is not a valid IP address')
 
-    if not HAS_SWSSCOMMON_LIBRARY:
-        module.fail_json(
-            msg=missing_required_lib('swsscommon'),
-            exception=SWSSCOMMON_IMPORT_ERROR)
+    session = connect(module)
 
-    config_db = swsscommon.ConfigDBConnector()
-    config_db.connect()
+    if module.params.get('vlans') is not None:
+        run_aggregate(module, session)
 
-    key, val = build_vlan_entry(**module.params)
-    cur_val = config_db.get_entry('VLAN', key)
-    changed = compare_entries(val, cur_val)
+    key, val = build_vlan_entry(module.params['vlanid'], module.params['state'], module.params['dhcp_servers'])
+    patch = diff_table({key: val}, session.get_entries('VLAN', [key]), 'replaced', 'VLAN')
+    changed = bool(patch)
 
     if module.check_mode or not changed:
-        module.exit_json(changed=changed, interface=key)
+        session.exit_json(changed=changed, interface=key)
+
+    session.apply_patch('VLAN', patch)
+    session.flush()
+
+    waited = wait_for(module, session, 'STATE_DB', 'VLAN_TABLE', state_entries(patch))
+    session.exit_json(changed=changed, interface=key, **waited)
+
+
+def run_module():
+    vlan_args = dict(
+        vlanid=dict(type='str', required=True),
+        state=dict(type='str', default='present', choices=['present', 'absent'], required=False),
+        dhcp_servers=dict(type='list', elements='str', default=list(), required=False),
+    )
+    module_args = dict(
+        vlanid=dict(type='int', required=False),
+        state=dict(type='str', default='present', choices=['present', 'absent'], required=False),
+        dhcp_servers=dict(type='list', elements='str', default=list(), required=False),
+        vlans=dict(type='list', elements='dict', options=vlan_args, required=False),
+    )
+    module_args.update(configdb_argument_spec())
+    module_args.update(wait_argument_spec())
 
-    config_db.set_entry('VLAN', key, val)
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+        required_one_of=(('vlanid', 'vlans'),),
+        mutually_exclusive=(('vlanid', 'vlans'),),
+    )
 
-    module.exit_json(changed=changed, interface=key)
+    run_namespaces(module, run)
 
 
 def main():
@@ -12,11 +12,17 @@ DOCUMENTATION = r'''
 module: vlan_member
 short_description: Configure a SONiC VLAN port memberships
 version_added: "0.2.0"
-description: Manage VLAN port memberships in SONiC
+description:
+    - Manage VLAN port memberships in SONiC
+    - With I(wait) the module waits until the memberships are created or removed in C(VLAN_MEMBER_TABLE) of C(STATE_DB).
+extends_documentation_fragment:
+  - community.sonic.configdb
+  - community.sonic.configdb.wait
 options:
     vlanid:
-        description: The VLAN to manage the interface membership for
-        required: true
+        description:
+            - The VLAN to manage the interface membership for.
+            - One of I(vlanid) or I(members) is required.
         type: int
     state:
         description: Whether the interface should be attached to the VLAN or not
@@ -24,12 +30,52 @@ options:
         type: str
         choices: [present, absent]
     interface:
-        description: The interface to attach to the VLAN
-        required: true
+        description:
+            - The port or port channel to attach to the VLAN, required together with I(vlanid).
+            - When I(state=present) alias naming is supported, and the module fails if there is no such port or port
+              channel.
         type: str
     tagged:
         description: Whether the VLAN should be tagged for the interface or not, required when I(state=present)
         type: bool
+    members:
+        description:
+            - A list of VLAN memberships to manage in a single invocation.
+            - The C(VLAN_MEMBER) table is read once and all additions, tagging mode changes and
+              removals are written in one batch.
+            - Mutually exclusive with I(vlanid) and I(interface).
+        type: list
+        elements: dict
+        version_added: "0.4.0"
+        suboptions:
+            vlanid:
+                description: The VLAN ID or a range of VLAN IDs, for example C(100-199,300)
+                required: true
+                type: str
+            interfaces:
+                description:
+                    - The interfaces to manage the membership for.
+                    - Interface ranges with an optional step are supported, for example C(Ethernet0-188/4).
+                    - Alias naming is supported.
+                    - When I(state=present) the module fails if there is no such port or port channel.
+                required: true
+                type: list
+                elements: str
+            state:
+                description: Whether the interfaces should be attached to the VLANs or not
+                default: present
+                type: str
+                choices: [present, absent]
+            tagged:
+                description: Whether the VLANs should be tagged for the interfaces or not, required when I(state=present)
+                type: bool
+    exclusive:
+        description:
+            - Remove all VLAN memberships that are not listed in I(members).
+            - Only used together with I(members).
+        type: bool
+        default: false
+        version_added: "0.4.0"
 
 author:
     - Erik Larsson (@whooo)
@@ -56,20 +102,75 @@ EXAMPLES = r'''
     vlanid: 3600
     interface: Ethernet90
     tagged: false
+
+# Trunk a range of VLANs on every fourth port and remove all other memberships
+- name: Bulk VLAN memberships
+  community.sonic.vlan_member:
+    members:
+      - vlanid: 100-299
+        interfaces:
+          - Ethernet0-188/4
+        tagged: true
+      - vlanid: 10
+        interfaces:
+          - qsfp1
+        tagged: false
+    exclusive: true
 '''
 
-import traceback
-from ansible.module_utils.basic import AnsibleModule, missing_required_lib
-from ansible_collections.community.sonic.plugins.module_utils.entries import compare_entries
+RETURN = r'''
+added:
+    description: The VLAN membership keys that were added
+    type: list
+    elements: str
+    returned: when I(members) was passed to the module
+    sample: ["Vlan100|Ethernet0"]
+retagged:
+    description: The VLAN membership keys that changed tagging mode
+    type: list
+    elements: str
+    returned: when I(members) was passed to the module
+removed:
+    description: The VLAN membership keys that were removed
+    type: list
+    elements: str
+    returned: when I(members) was passed to the module
+waited:
+    description: The number of seconds waited for the changes to be applied
+    type: float
+    returned: when I(wait) is true and something changed
+    sample: 0.42
+namespaces:
+    description:
+        - The result of the run in every namespace, keyed by namespace, the host is C('').
+        - The other return values are then only returned per namespace.
+    type: dict
+    returned: when I(all_namespaces) is true
+    sample: {"": {"changed": false}, "asic0": {"changed": true}, "asic1": {"changed": false}}
+plan:
+    description:
+        - The plan file, the number of write batches and the number of keys written to the database or to the plan.
+    type: dict
+    returned: when I(plan) or I(apply_plan) is set
+    sample: {"path": "/var/tmp/vlan_members.plan", "batches": 1, "keys": 48}
+perf:
+    description:
+        - The time spent in each phase in seconds, the number of database round trips and commands, and the approximate
+          number of bytes read and written and of keys written.
+    type: dict
+    returned: when I(perf) is true
+    sample: {"total": 0.077, "phases": {"import": 0.039, "connect": 0.011, "read": 0.008, "write": 0.005, "compute": 0.014},
+             "round_trips": 3, "commands": 3, "bytes_read": 58, "bytes_written": 46,
+             "keys_written": 1}
+'''
 
-try:
-    from swsscommon import swsscommon
-except ImportError:
-    HAS_SWSSCOMMON_LIBRARY = False
-    SWSSCOMMON_IMPORT_ERROR = traceback.format_exc()
-else:
-    HAS_SWSSCOMMON_LIBRARY = True
-    SWSSCOMMON_IMPORT_ERROR = None
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.sonic.plugins.module_utils.configdb import configdb_argument_spec, connect
+from ansible_collections.community.sonic.plugins.module_utils.entries import diff_table
+from ansible_collections.community.sonic.plugins.module_utils.interfaces import load_interfaces, resolve_interface
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import owned_interfaces, run_namespaces, skip_interface
+from ansible_collections.community.sonic.plugins.module_utils.ranges import expand_interface_range, expand_range
+from ansible_collections.community.sonic.plugins.module_utils.wait import state_entries, wait_argument_spec, wait_for
 
 
 def build_vlan_member_entry(vlanid, interface, state, tagged):
@@ -84,39 +185,148 @@ def build_vlan_member_entry(vlanid, interface, state, tagged):
     return key, val
 
 
+def resolve_member_interface(interfaces, interface, state):
+    """Returns the port or port channel name of a VLAN member
+
+    Interfaces that don't exist raise NoSuchInterfaceError, unless the
+    membership is removed, so members of removed ports can be cleaned up.
+    """
+    if state == 'absent':
+        return interfaces.get(interface) or interface
+    return interfaces.resolve(interface)
+
+
+def build_vlan_member_entries(members, interfaces):
+    """Build the entries for a list of VLAN memberships
+
+    VLAN IDs and interfaces can be ranges, interface aliases are resolved
+    using the interfaces InterfaceIndex. If a membership is listed more than
+    once the last item wins.
+    Returns a dict of keys and their entries, None for absent memberships.
+    Raises ValueError for invalid ranges and interfaces.
+    """
+    entries = dict()
+    for item in members:
+        vlanids = expand_range(item['vlanid'], lower=1, upper=4094)
+        names = list()
+        for spec in item['interfaces']:
+            names.extend(resolve_member_interface(interfaces, i, item['state']) for i in expand_interface_range(spec))
+        for vlanid in vlanids:
+            for interface in names:
+                key, val = build_vlan_member_entry(vlanid, interface, item['state'], item['tagged'])
+                entries[key] = val
+    return entries
+
+
+def diff_vlan_members(entries, cur_table, exclusive):
+    """Compare the wanted memberships with the VLAN_MEMBER table
+
+    Returns the patch to write together with the keys that are added,
+    retagged and removed.
+    """
+    patch = diff_table(entries, cur_table, 'overridden' if exclusive else 'replaced', 'VLAN_MEMBER')
+    added = sorted(k for k, v in patch.items() if v is not None and k not in cur_table)
+    retagged = sorted(k for k, v in patch.items() if v is not None and k in cur_table)
+    removed = sorted(k for k, v in patch.items() if v is None)
+    return patch, added, retagged, removed
+
+
+def owned_members(module, members, interfaces):
+    """The memberships with only the interfaces of the namespace, in the runs of all_namespaces
+
+    Memberships are only removed from the interfaces of the namespace, the
+    others don't exist in its VLAN_MEMBER table. Raises ValueError for
+    invalid interface ranges.
+    """
+    owned = list()
+    for item in members:
+        names = [i for spec in item['interfaces'] for i in expand_interface_range(spec)]
+        if item['state'] == 'present':
+            names = owned_interfaces(module, interfaces, names)
+        owned.append(dict(item, interfaces=names))
+    return owned
+
+
+def run_bulk(module, session):
+    try:
+        interfaces = load_interfaces(session)
+        members = owned_members(module, module.params['members'], interfaces)
+        entries = build_vlan_member_entries(members, interfaces)
+    except ValueError as e:
+        module.fail_json(msg=str(e))
+
+    cur_table = session.get_table('VLAN_MEMBER')
+    patch, added, retagged, removed = diff_vlan_members(entries, cur_table, module.params['exclusive'])
+
+    if not module.check_mode and patch:
+        session.apply_patch('VLAN_MEMBER', patch)
+        session.flush()
+
+    waited = wait_for(module, session, 'STATE_DB', 'VLAN_MEMBER_TABLE', state_entries(patch))
+    session.exit_json(changed=bool(patch), added=added, retagged=retagged, removed=removed, **waited)
+
+
+def run(module):
+    # Don't require the tagged option if we want to remove the membership
+    if module.params['vlanid'] is not None and module.params['state'] == 'present' and module.params['tagged'] is None:
+        module.fail_json(msg='state is present but all of the following are missing: tagged')
+
+    session = connect(module)
+
+    if module.params['members'] is not None:
+        run_bulk(module, session)
+
+    interface = module.params['interface']
+    if module.params['state'] == 'present':
+        try:
+            interface = resolve_interface(session, interface)
+        except ValueError as e:
+            if skip_interface(module, interface):
+                session.exit_json(changed=False)
+            module.fail_json(msg=str(e))
+    key, val = build_vlan_member_entry(module.params['vlanid'], interface, module.params['state'], module.params['tagged'])
+    patch = diff_table({key: val}, session.get_entries('VLAN_MEMBER', [key]), 'replaced', 'VLAN_MEMBER')
+    changed = bool(patch)
+
+    if module.check_mode or not changed:
+        session.exit_json(changed=changed)
+
+    session.apply_patch('VLAN_MEMBER', patch)
+    session.flush()
+
+    waited = wait_for(module, session, 'STATE_DB', 'VLAN_MEMBER_TABLE', state_entries(patch))
+    session.exit_json(changed=changed, **waited)
+
+
 def run_module():
+    member_args = dict(
+        vlanid=dict(type='str', required=True),
+        interfaces=dict(type='list', elements='str', required=True),
+        state=dict(type='str', default='present', choices=['present', 'absent'], required=False),
+        tagged=dict(type='bool', required=False),
+    )
     module_args = dict(
-        vlanid=dict(type='int', required=True),
+        vlanid=dict(type='int', required=False),
         state=dict(type='str', default='present', choices=['present', 'absent'], required=False),
-        interface=dict(type='str', required=True),
+        interface=dict(type='str', required=False),
         tagged=dict(type='bool', required=False),
+        members=dict(
+            type='list', elements='dict', options=member_args, required=False,
+            required_if=(('state', 'present', ('tagged',), True),)),
+        exclusive=dict(type='bool', default=False, required=False),
     )
+    module_args.update(configdb_argument_spec())
+    module_args.update(wait_argument_spec())
 
     module = AnsibleModule(
         argument_spec=module_args,
         supports_check_mode=True,
-        # Don't require the tagged option if we want to remove the membership
-        required_if=(('state', 'present', ('tagged',), True),),
+        required_one_of=(('vlanid', 'members'),),
+        required_together=(('vlanid', 'interface'),),
+        mutually_exclusive=(('vlanid', 'members'), ('interface', 'members')),
     )
 
-    if not HAS_SWSSCOMMON_LIBRARY:
-        module.fail_json(
-            msg=missing_required_lib('swsscommon'),
-            exception=SWSSCOMMON_IMPORT_ERROR)
-
-    config_db = swsscommon.ConfigDBConnector()
-    config_db.connect()
-
-    key, val = build_vlan_member_entry(**module.params)
-    cur_val = config_db.get_entry('VLAN_MEMBER', key)
-    changed = compare_entries(val, cur_val)
-
-    if module.check_mode or not changed:
-        module.exit_json(changed=changed)
-
-    config_db.set_entry('VLAN_MEMBER', key, val)
-
-    module.exit_json(changed=changed)
+    run_namespaces(module, run)
 
 
 def main():
@@ -0,0 +1,110 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import contextlib
+import importlib
+import io
+import json
+
+from ansible.module_utils import basic
+from ansible.plugins.action import ActionBase
+from ansible_collections.community.sonic.plugins.module_utils.agent import use_state_host
+from ansible_collections.community.sonic.plugins.module_utils.configdb import use_connector_factory
+from ansible_collections.community.sonic.plugins.plugin_utils.resp import RedisConnector
+
+
+@contextlib.contextmanager
+def module_args(args):
+    """Pass args to the AnsibleModule created in this process"""
+    saved = (basic._ANSIBLE_ARGS, getattr(basic, '_ANSIBLE_PROFILE', None))
+    basic._ANSIBLE_ARGS = json.dumps({'ANSIBLE_MODULE_ARGS': args}).encode()
+    if hasattr(basic, '_ANSIBLE_PROFILE'):
+        basic._ANSIBLE_PROFILE = 'legacy'
+    try:
+        yield
+    finally:
+        basic._ANSIBLE_ARGS = saved[0]
+        if hasattr(basic, '_ANSIBLE_PROFILE'):
+            basic._ANSIBLE_PROFILE = saved[1]
+
+
+def run_on_controller(module_name, args, redis_client, host=None):
+    """Run a module of the collection in this process
+
+    The module connects through RedisConnector with clients returned by
+    redis_client(), its result is read from what it writes to stdout, like
+    when it runs on the switch. host identifies the switch, the module keeps
+    its state, like the journals of checkpoints, in a directory of its own.
+    """
+    module = importlib.import_module(f'ansible_collections.community.sonic.plugins.modules.{module_name.split(".")[-1]}')
+    connectors = list()
+
+    def factory(db_name):
+        connector = RedisConnector(redis_client())
+        connectors.append(connector)
+        if db_name == 'CONFIG_DB':
+            connector.connect()
+        else:
+            connector.db_connect(db_name)
+        return connector
+
+    output = io.StringIO()
+    try:
+        with use_connector_factory(factory), use_state_host(host), module_args(args), contextlib.redirect_stdout(output):
+            try:
+                module.run_module()
+            except SystemExit:
+                pass
+    finally:
+        for connector in connectors:
+            connector.client.close()
+    try:
+        return json.loads(output.getvalue())
+    except ValueError:
+        return {'failed': True, 'msg': f'{module_name} returned no result', 'module_stdout': output.getvalue()}
+
+
+class ControllerActionModule(ActionBase):
+    """Runs the module on the controller when the host uses the community.sonic.redis connection
+
+    With another connection the module runs on the switch like with the
+    normal action, async included. On the controller the module runs in this
+    process, which can't be done in the background, so async is rejected.
+    """
+
+    _supports_async = True
+
+    def execute_module(self, module_name, module_args, task_vars):
+        redis_client = getattr(self._connection, 'redis_client', None)
+        if redis_client is None:
+            wrap_async = self._task.async_val and not self._connection.has_native_async
+            result = self._execute_module(module_name=module_name, module_args=module_args, task_vars=task_vars,
+                                          wrap_async=wrap_async)
+            if not wrap_async:
+                self._remove_tmp_path(self._connection._shell.tmpdir)
+            return result
+        if self._task.async_val:
+            return {'failed': True, 'msg': f'async is not supported for {module_name} with the community.sonic.redis connection'}
+        args = dict(module_args)
+        args['_ansible_check_mode'] = bool(self._task.check_mode or self._play_context.check_mode)
+        args['_ansible_diff'] = bool(self._task.diff)
+        args['_ansible_no_log'] = bool(self._task.no_log)
+        return run_on_controller(module_name, args, redis_client, self._connection.state_host())
+
+    def run_module(self, module_name, module_args, task_vars):
+        """Returns the result of the module, subclasses change how the module is run here"""
+        return self.execute_module(module_name, module_args, task_vars)
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+
+        result = super(ControllerActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        module_name = getattr(self._task, 'resolved_action', None) or self._task.action
+        result.update(self.run_module(module_name, self._task.args.copy(), task_vars))
+        return result
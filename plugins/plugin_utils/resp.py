@@ -0,0 +1,306 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""A small redis client implementing the swsscommon connector API
+
+Used on the controller by the community.sonic.redis connection, so the
+modules can run against the databases of a switch without any Python on
+the switch. Only the commands the config db session needs are implemented,
+the values are encoded like ConfigDBConnector does: multi-keys joined with
+'|', list fields with a '@' suffix and entries without fields as NULL:NULL.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import socket
+
+
+# The redis database numbers of the SONiC databases, see database_config.json
+DATABASES = {
+    'APPL_DB': 0,
+    'ASIC_DB': 1,
+    'COUNTERS_DB': 2,
+    'LOGLEVEL_DB': 3,
+    'CONFIG_DB': 4,
+    'FLEX_COUNTER_DB': 5,
+    'STATE_DB': 6,
+}
+
+# The separator between the table and the key, for the databases that don't use '|'
+SEPARATORS = {
+    'APPL_DB': ':',
+    'ASIC_DB': ':',
+    'COUNTERS_DB': ':',
+    'LOGLEVEL_DB': ':',
+    'FLEX_COUNTER_DB': ':',
+}
+
+
+class RespError(Exception):
+    pass
+
+
+def encode_command(args):
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+class RespClient(object):
+    """A redis connection speaking RESP2, replies are decoded as str"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.f = sock.makefile('rb')
+        self.round_trips = 0
+
+    @classmethod
+    def unix(cls, path, timeout=30):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except OSError:
+            sock.close()
+            raise
+        return cls(sock)
+
+    @classmethod
+    def tcp(cls, host, port, timeout=30):
+        return cls(socket.create_connection((host, port), timeout))
+
+    def _read(self):
+        line = self.f.readline()
+        if not line:
+            raise ConnectionError('redis closed the connection')
+        kind, data = line[:1], line[1:-2]
+        if kind == b'+':
+            return data.decode()
+        if kind == b'-':
+            return RespError(data.decode())
+        if kind == b':':
+            return int(data)
+        if kind == b'$':
+            length = int(data)
+            if length < 0:
+                return None
+            value = self.f.read(length + 2)[:-2]
+            return value.decode()
+        if kind == b'*':
+            length = int(data)
+            if length < 0:
+                return None
+            return [self._read() for dummy in range(length)]
+        raise RespError(f'unexpected reply {line!r}')
+
+    def execute_many(self, commands):
+        """Send the commands in one write and read all replies
+
+        Errors are returned as RespError instances in the list of replies.
+        """
+        if not commands:
+            return []
+        self.round_trips += 1
+        self.sock.sendall(b''.join(encode_command(c) for c in commands))
+        return [self._read() for dummy in commands]
+
+    def execute(self, *args):
+        reply = self.execute_many([args])[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def close(self):
+        self.f.close()
+        self.sock.close()
+
+
+def pairs_to_dict(reply):
+    return dict(zip(reply[::2], reply[1::2]))
+
+
+class RedisPipeline(object):
+    """The subset of a redis-py pipeline the session uses"""
+
+    def __init__(self, client, transaction=True):
+        self.client = client
+        self.transaction = transaction
+        self.commands = list()
+
+    def hdel(self, key, *fields):
+        self.commands.append(('HDEL', key) + fields)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        mapping = dict(mapping or dict())
+        if field is not None:
+            mapping[field] = value
+        self.commands.append(('HSET', key) + tuple(x for kv in mapping.items() for x in kv))
+
+    def delete(self, *keys):
+        self.commands.append(('DEL',) + keys)
+
+    def hgetall(self, key):
+        self.commands.append(('HGETALL', key))
+
+    def scan(self, cursor, match='*', count=1000):
+        self.commands.append(('SCAN', cursor, 'MATCH', match, 'COUNT', count))
+
+    def execute(self):
+        commands, self.commands = self.commands, list()
+        if self.transaction and commands:
+            replies = self.client.execute_many([('MULTI',)] + commands + [('EXEC',)])
+            for reply in replies:
+                if isinstance(reply, RespError):
+                    raise reply
+            # The replies of the commands are the reply of EXEC
+            replies = replies[-1]
+            if replies is None:
+                raise RespError('the transaction was aborted')
+        else:
+            replies = self.client.execute_many(commands)
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        # Decode the replies like redis-py does
+        for i, command in enumerate(commands):
+            if command[0] == 'HGETALL':
+                replies[i] = pairs_to_dict(replies[i])
+            elif command[0] == 'SCAN':
+                replies[i] = (int(replies[i][0]), replies[i][1])
+        return replies
+
+
+class RedisClient(object):
+    """The subset of a redis-py client the session uses"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def scan(self, cursor, match='*', count=1000):
+        cursor, keys = self.client.execute('SCAN', cursor, 'MATCH', match, 'COUNT', count)
+        return int(cursor), keys
+
+    def pipeline(self, transaction=True):
+        return RedisPipeline(self.client, transaction)
+
+
+class RedisConnector(object):
+    """Works like swsscommon.ConfigDBPipeConnector over a RespClient"""
+
+    TABLE_NAME_SEPARATOR = '|'
+    KEY_SEPARATOR = '|'
+
+    def __init__(self, client):
+        self.client = client
+        self.db_name = None
+
+    def connect(self, wait_for_init=True, retry_on=False):
+        self.db_connect('CONFIG_DB')
+
+    def db_connect(self, dbname, wait_for_init=False, retry_on=False):
+        self.client.execute('SELECT', DATABASES[dbname])
+        self.db_name = dbname
+        self.TABLE_NAME_SEPARATOR = SEPARATORS.get(dbname, '|')
+
+    def get_redis_client(self, db_name):
+        if db_name != self.db_name:
+            raise ValueError(f'connected to {self.db_name}, not {db_name}')
+        return RedisClient(self.client)
+
+    def serialize_key(self, key):
+        if isinstance(key, tuple):
+            return self.KEY_SEPARATOR.join(key)
+        return str(key)
+
+    def deserialize_key(self, key):
+        tokens = key.split(self.KEY_SEPARATOR)
+        if len(tokens) > 1:
+            return tuple(tokens)
+        return key
+
+    @staticmethod
+    def typed_to_raw(typed_data):
+        if not typed_data:
+            return {'NULL': 'NULL'}
+        raw_data = dict()
+        for field, value in typed_data.items():
+            if isinstance(value, list):
+                raw_data[field + '@'] = ','.join(value)
+            else:
+                raw_data[field] = str(value)
+        return raw_data
+
+    @staticmethod
+    def raw_to_typed(raw_data):
+        typed_data = dict()
+        for field, value in raw_data.items():
+            if field == 'NULL':
+                continue
+            if field.endswith('@'):
+                typed_data[field[:-1]] = value.split(',')
+            else:
+                typed_data[field] = value
+        return typed_data
+
+    def _hash(self, table, key):
+        return f'{table.upper()}{self.TABLE_NAME_SEPARATOR}{self.serialize_key(key)}'
+
+    def _scan(self, match):
+        keys = list()
+        cursor = 0
+        while True:
+            cursor, batch = self.client.execute('SCAN', cursor, 'MATCH', match, 'COUNT', 1000)
+            keys.extend(batch)
+            if int(cursor) == 0:
+                return sorted(set(keys))
+
+    def _hgetall(self, keys):
+        replies = self.client.execute_many([('HGETALL', k) for k in keys])
+        return [self.raw_to_typed(pairs_to_dict(r)) for r in replies]
+
+    def get_entry(self, table, key):
+        return self.raw_to_typed(pairs_to_dict(self.client.execute('HGETALL', self._hash(table, key))))
+
+    def get_keys(self, table, split=True):
+        prefix = f'{table.upper()}{self.TABLE_NAME_SEPARATOR}'
+        keys = [k[len(prefix):] for k in self.client.execute('KEYS', prefix + '*')]
+        if split:
+            return [self.deserialize_key(k) for k in keys]
+        return keys
+
+    def get_table(self, table):
+        prefix = f'{table.upper()}{self.TABLE_NAME_SEPARATOR}'
+        keys = self._scan(prefix + '*')
+        return {self.deserialize_key(k[len(prefix):]): v for k, v in zip(keys, self._hgetall(keys))}
+
+    def get_config(self):
+        keys = [k for k in self._scan('*') if self.TABLE_NAME_SEPARATOR in k]
+        data = dict()
+        for _hash, entry in zip(keys, self._hgetall(keys)):
+            table, key = _hash.split(self.TABLE_NAME_SEPARATOR, 1)
+            data.setdefault(table, dict())[self.deserialize_key(key)] = entry
+        return data
+
+    def mod_config(self, data):
+        commands = list()
+        for table, table_data in data.items():
+            if table_data is None:
+                commands.extend(('DEL', k) for k in self._scan(f'{table.upper()}{self.TABLE_NAME_SEPARATOR}*'))
+                continue
+            for key, entry in table_data.items():
+                if entry is None:
+                    commands.append(('DEL', self._hash(table, key)))
+                    continue
+                command = ['HSET', self._hash(table, key)]
+                for field, value in self.typed_to_raw(entry).items():
+                    command.extend((field, value))
+                commands.append(tuple(command))
+        # Like the pipe connector, all writes are sent in one transaction
+        replies = self.client.execute_many([('MULTI',)] + commands + [('EXEC',)])
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
@@ -0,0 +1,85 @@
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import copy
+
+from ansible_collections.community.sonic.plugins.plugin_utils.controller import ControllerActionModule
+
+
+SNAPSHOT_FACT = 'sonic_snapshot'
+
+
+def snapshot_matches(snapshot, module_args):
+    """Whether the snapshot was taken in the namespace the module runs in
+
+    A snapshot is never used with all_namespaces, it only holds the tables
+    of one namespace.
+    """
+    if not snapshot or module_args.get('all_namespaces'):
+        return False
+    return snapshot.get('namespace', '') == (module_args.get('namespace') or '')
+
+
+def select_tables(snapshot, tables):
+    """Returns the tables of the snapshot that are needed, None if there are none"""
+    if not snapshot:
+        return None
+    selected = {t: snapshot['tables'][t] for t in tables if t in snapshot.get('tables', dict())}
+    return selected or None
+
+
+def merge_snapshot(snapshot, update):
+    """Returns a copy of the snapshot with the entries written by a module
+
+    Only tables that are part of the snapshot are updated, a None entry
+    means the key was removed.
+    """
+    snapshot = copy.deepcopy(snapshot)
+    for table, entries in update.items():
+        if table not in snapshot['tables']:
+            continue
+        for key, val in entries.items():
+            if val is None:
+                snapshot['tables'][table].pop(key, None)
+            else:
+                snapshot['tables'][table][key] = val
+    return snapshot
+
+
+class SnapshotActionModule(ControllerActionModule):
+    """Runs a config db module against the sonic_snapshot fact of the host
+
+    The tables the module needs are passed in the snapshot option when the
+    module runs in the namespace of the snapshot, and the entries written by
+    the module are merged back into the fact. If the
+    module finds that the switch changed since the snapshot was taken it's
+    run again without the snapshot. An async task only returns its job, so
+    it runs without the snapshot.
+    """
+
+    def snapshot_tables(self, module_args):
+        """The tables the module reads, to be implemented by the action plugin"""
+        raise NotImplementedError()
+
+    def run_module(self, module_name, module_args, task_vars):
+        snapshot = task_vars.get(SNAPSHOT_FACT)
+        if self._task.async_val or not snapshot_matches(snapshot, module_args):
+            snapshot = None
+        if module_args.get('snapshot') is None:
+            tables = select_tables(snapshot, self.snapshot_tables(module_args))
+            if tables is not None:
+                module_args['snapshot'] = tables
+
+        module_result = self.execute_module(module_name, module_args, task_vars)
+        if module_result.get('snapshot_stale') and 'snapshot' in module_args:
+            self._display.vvv(f'{SNAPSHOT_FACT} is stale, running {module_name} without it')
+            del module_args['snapshot']
+            module_result = self.execute_module(module_name, module_args, task_vars)
+
+        update = module_result.pop('snapshot_update', None)
+        if snapshot and update:
+            module_result.setdefault('ansible_facts', dict())[SNAPSHOT_FACT] = merge_snapshot(snapshot, update)
+        return module_result
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmarks of the hot paths of the collection
+
+The helpers and the modules are run against synthetic config db data the
+size of a large switch: 512 ports with aliases, 4094 VLANs, 100k VLAN
+memberships and a 10k entry multi-key ACL table. The modules run against
+the in-memory config db of the unit tests, so besides the time the number of
+redis round trips, commands and keys written is counted, in one more untimed
+run with perf. The caches the modules write go to a scratch directory, a
+new one for every run.
+
+Run from the root of the collection, with the directory containing
+ansible_collections in PYTHONPATH:
+
+    python tests/benchmark/bench.py --compare tests/benchmark/baseline.json
+
+A benchmark regresses when it makes more round trips or commands, or writes
+more keys, than the baseline. The counts don't depend on the machine. It also
+regresses when it's slower than the baseline by more than the threshold and
+by more than the minimum delta, so the noise of the short benchmarks doesn't
+count. Timings are only comparable on the same machine, so update the
+baseline with --save when moving to another one. --scale shrinks the data
+for a quick run.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from ansible_collections.community.sonic.plugins.module_utils import configdb
+from ansible_collections.community.sonic.plugins.module_utils.entries import compare_entries, fix_keys
+from ansible_collections.community.sonic.plugins.modules import (
+    config_table, get_entry, sonic_facts, sonic_interface_port, sonic_snapshot, vlan, vlan_member)
+from ansible_collections.community.sonic.tests.unit.plugins.fake_configdb import FakeSwsscommon
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import run_module
+
+# The counts of the module runs, from the perf of the modules but for
+# round_trips, which the in-memory config db counts
+COUNTS = ('round_trips', 'commands', 'keys_written')
+
+SIZES = {
+    'ports': 512,
+    'vlans': 4094,
+    'vlan_members': 100000,
+    'acl_rules': 10000,
+}
+
+
+def synthetic_config(ports, vlans, vlan_members, acl_rules):
+    """Returns config db tables in the format returned by get_table, with tuples as multi-keys"""
+    port_table = dict()
+    for i in range(ports):
+        port_table[f'Ethernet{i * 4}'] = {
+            'alias': f'etp{i + 1}',
+            'index': str(i + 1),
+            'lanes': ','.join(str(i * 4 + lane) for lane in range(4)),
+            'speed': '100000',
+            'fec': 'rs',
+            'mtu': '9100',
+            'admin_status': 'up',
+            'description': f'port {i + 1}',
+        }
+    vlan_table = {f'Vlan{v}': {'vlanid': str(v)} for v in range(1, vlans + 1)}
+    vlan_member_table = dict()
+    names = list(port_table)
+    for i in range(vlan_members):
+        vlanid = i // ports + 1
+        vlan_member_table[(f'Vlan{vlanid}', names[i % ports])] = {'tagging_mode': 'tagged'}
+    acl_rule_table = dict()
+    for i in range(acl_rules):
+        acl_rule_table[('DATAACL', f'RULE_{i}')] = {
+            'PRIORITY': str(i),
+            'PACKET_ACTION': 'DROP' if i % 2 else 'FORWARD',
+            'SRC_IP': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}/32',
+        }
+    return {
+        'DEVICE_METADATA': {'localhost': {'hostname': 'bench', 'platform': 'x86_64-kvm_x86_64-r0', 'hwsku': 'Force10-S6000'}},
+        'PORT': port_table,
+        'VLAN': vlan_table,
+        'VLAN_MEMBER': vlan_member_table,
+        'ACL_RULE': acl_rule_table,
+    }
+
+
+def measure(func, setup=None, repeat=5):
+    """Returns the best time of repeat runs of func, setup runs untimed before each run"""
+    best = None
+    for dummy in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def helper_benchmarks(config, sizes):
+    port_table = config['PORT']
+    aliases = [v['alias'] for v in port_table.values()]
+    vlan_members = fix_keys(config['VLAN_MEMBER'])
+    speeds = ['100G', '40G', '25G', '10000M', '400G']
+
+    def human_to_bits():
+        for i in range(10000):
+            sonic_interface_port.human_to_bits(speeds[i % len(speeds)])
+
+    def mutate_state():
+        # Like one task per port, every call resolves the alias from scratch
+        for alias in aliases:
+            sonic_interface_port.mutate_state(port_table, alias, speed='40G', enabled=True)
+
+    def build_vlan_entry():
+        for v in range(1, sizes['vlans'] + 1):
+            vlan.build_vlan_entry(v, 'present', ['10.1.0.2', '2001:db8::2'])
+
+    def build_vlan_member_entry():
+        for key in vlan_members:
+            vlanid, interface = key.split('|')
+            vlan_member.build_vlan_member_entry(vlanid[len('Vlan'):], interface, 'present', True)
+
+    def compare_vlan_members():
+        for key, val in vlan_members.items():
+            compare_entries(val, val, 'VLAN_MEMBER')
+
+    def compare_ports():
+        for key, val in port_table.items():
+            compare_entries(dict(val, admin_status='down'), val, 'PORT')
+
+    def fix_keys_vlan_member():
+        fix_keys(config['VLAN_MEMBER'])
+
+    def fix_keys_acl_rule():
+        fix_keys(config['ACL_RULE'])
+
+    return [
+        ('human_to_bits', human_to_bits),
+        ('mutate_state', mutate_state),
+        ('build_vlan_entry', build_vlan_entry),
+        ('build_vlan_member_entry', build_vlan_member_entry),
+        ('compare_entries.vlan_member', compare_vlan_members),
+        ('compare_entries.port', compare_ports),
+        ('fix_keys.vlan_member', fix_keys_vlan_member),
+        ('fix_keys.acl_rule', fix_keys_acl_rule),
+    ]
+
+
+def module_benchmarks(config, sizes):
+    """Returns (name, module, args, tables) for the module runs, tables is what the config db holds before the run"""
+    full_vlans = sizes['vlan_members'] // sizes['ports']
+    last_port = (sizes['ports'] - 1) * 4
+    acl_entries = {k: v for k, v in fix_keys(config['ACL_RULE']).items()}
+    return [
+        ('vlan.create', vlan, dict(vlans=[dict(vlanid=f'1-{sizes["vlans"]}')]),
+         {}),
+        ('vlan.unchanged', vlan, dict(vlans=[dict(vlanid=f'1-{sizes["vlans"]}')]),
+         {'VLAN': config['VLAN']}),
+        ('vlan_member.unchanged', vlan_member,
+         dict(members=[dict(vlanid=f'1-{full_vlans}', interfaces=[f'Ethernet0-{last_port}/4'], tagged=True)]),
+         {'PORT': config['PORT'], 'VLAN_MEMBER': config['VLAN_MEMBER']}),
+        ('vlan_member.single', vlan_member, dict(vlanid=1, interface='Ethernet0', tagged=False),
+         {'PORT': config['PORT'], 'VLAN_MEMBER': config['VLAN_MEMBER']}),
+        ('sonic_interface_port.ports', sonic_interface_port,
+         dict(ports=[dict(interface=v['alias'], speed='40G') for v in config['PORT'].values()]),
+         {'PORT': config['PORT']}),
+        ('sonic_interface_port.single', sonic_interface_port, dict(interface='etp1', speed='40G'),
+         {'PORT': config['PORT']}),
+        ('get_entry.vlan_member', get_entry, dict(table='VLAN_MEMBER'),
+         {'VLAN_MEMBER': config['VLAN_MEMBER']}),
+        ('get_entry.key_pattern', get_entry, dict(table='ACL_RULE', key_pattern='DATAACL|RULE_1*'),
+         {'ACL_RULE': config['ACL_RULE']}),
+        ('config_table.unchanged', config_table, dict(table='ACL_RULE', entries=acl_entries),
+         {'ACL_RULE': config['ACL_RULE']}),
+        ('sonic_facts.all', sonic_facts, dict(gather_network_resources=['all']),
+         config),
+        ('sonic_snapshot.default', sonic_snapshot, dict(),
+         {'PORT': config['PORT'], 'VLAN': config['VLAN'], 'VLAN_MEMBER': config['VLAN_MEMBER']}),
+    ]
+
+
+def run_benchmarks(scale=1.0, repeat=5, only=None):
+    sizes = {k: max(1, int(v * scale)) for k, v in SIZES.items()}
+    config = synthetic_config(**sizes)
+    results = dict()
+    scratch = tempfile.TemporaryDirectory(prefix='sonic-bench-')
+
+    for name, func in helper_benchmarks(config, sizes):
+        if only and not any(o in name for o in only):
+            continue
+        results[name] = {'seconds': measure(func, repeat=repeat)}
+
+    for name, module, args, tables in module_benchmarks(config, sizes):
+        if only and not any(o in name for o in only):
+            continue
+        swss = FakeSwsscommon()
+
+        def setup():
+            swss.databases.clear()
+            swss.load(tables)
+            tempfile.tempdir = tempfile.mkdtemp(dir=scratch.name)
+
+        def run():
+            run_module(module, args)
+
+        with patch.object(configdb, 'swsscommon', swss, create=True), \
+                patch.object(configdb, 'HAS_SWSSCOMMON_LIBRARY', True), \
+                patch.object(tempfile, 'tempdir', scratch.name):
+            seconds = measure(run, setup, repeat)
+            setup()
+            swss.reset()
+            perf = run_module(module, dict(args, perf=True))['perf']
+        results[name] = dict(seconds=seconds, round_trips=swss.round_trips(),
+                             commands=perf['commands'], keys_written=perf['keys_written'])
+
+    scratch.cleanup()
+    return {
+        'scale': scale,
+        'sizes': sizes,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold, min_delta=0.0):
+    """Returns a list of regressions of current against baseline
+
+    A timing regresses when it's more than threshold times and more than
+    min_delta seconds slower, a count when it's higher.
+    """
+    if current['scale'] != baseline['scale']:
+        raise ValueError(f'the baseline was taken with scale {baseline["scale"]}, not {current["scale"]}')
+    regressions = list()
+    for name, result in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['seconds'] / base['seconds'] if base['seconds'] else 1.0
+        if ratio > threshold and result['seconds'] - base['seconds'] > min_delta:
+            regressions.append(f'{name}: {result["seconds"]:.4f}s is {ratio:.2f}x the baseline {base["seconds"]:.4f}s')
+        for count in COUNTS:
+            if result.get(count, 0) > base.get(count, 0):
+                regressions.append(f'{name}: {result[count]} {count.replace("_", " ")}, the baseline {base.get(count, 0)}')
+    return regressions
+
+
+def print_results(current, baseline=None):
+    for name, result in sorted(current['results'].items()):
+        line = f'{name:<32} {result["seconds"] * 1000:10.2f} ms'
+        if 'round_trips' in result:
+            line += f' {result["round_trips"]:8d} round trips {result["commands"]:8d} commands {result["keys_written"]:8d} keys'
+        base = (baseline or dict()).get('results', dict()).get(name)
+        if base is not None and base['seconds']:
+            line += f'  ({result["seconds"] / base["seconds"]:.2f}x baseline)'
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of community.sonic')
+    parser.add_argument('--scale', type=float, default=1.0, help='scale the size of the synthetic data')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark, the best one counts')
+    parser.add_argument('--only', action='append', help='only run benchmarks with this in their name')
+    parser.add_argument('--save', metavar='FILE', help='write the results as JSON to FILE')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results to the baseline in FILE')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='slowdown factor against the baseline that counts as a regression')
+    parser.add_argument('--min-delta', type=float, default=0.01,
+                        help='slowdown in seconds below which a benchmark never counts as a regression')
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.scale, args.repeat, args.only)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(current, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold, args.min_delta)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
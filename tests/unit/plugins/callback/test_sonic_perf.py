@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.sonic.plugins.callback.sonic_perf import PerfAggregator, result_perf
+
+
+def test_result_perf_loop():
+    result = {'results': [{'perf': {'round_trips': 2}}, {'skipped': True}, {'perf': {'round_trips': 3}}]}
+    assert result_perf(result) == [{'round_trips': 2}, {'round_trips': 3}]
+    assert result_perf({'perf': {'round_trips': 1}}) == [{'round_trips': 1}]
+    assert result_perf({'changed': False}) == []
+
+
+def test_result_perf_namespaces():
+    result = {'namespaces': {'': {'changed': False, 'perf': {'round_trips': 1}}, 'asic0': {'perf': {'round_trips': 2}}}}
+    assert result_perf(result) == [{'round_trips': 1}, {'round_trips': 2}]
+    result = {'results': [result, {'perf': {'round_trips': 3}}]}
+    assert result_perf(result) == [{'round_trips': 1}, {'round_trips': 2}, {'round_trips': 3}]
+
+
+def test_aggregate():
+    agg = PerfAggregator()
+    agg.add('sw1', 'vlan', 'add vlans', 1.0, {'changed': True, 'perf': {'total': 0.5, 'round_trips': 3, 'keys_written': 10}})
+    agg.add('sw1', 'vlan_member', 'add members', 2.0, {'changed': False, 'perf': {'total': 1.5, 'round_trips': 4}})
+    agg.add('sw2', 'vlan', 'add vlans', 9.0, {'changed': True})
+    agg.add('sw3', 'vlan', 'add vlans', 1.5, {'failed': True})
+
+    vlan = agg.by_module()['vlan']
+    assert vlan['tasks'] == 3
+    assert vlan['changed'] == 2
+    assert vlan['failed'] == 1
+    assert vlan['wall_time'] == 11.5
+    assert vlan['round_trips'] == 3
+    assert vlan['keys_written'] == 10
+
+    assert agg.by_host_module()['sw1']['vlan_member']['module_time'] == 1.5
+    assert [t['host'] for t in agg.slowest_tasks(2)] == ['sw2', 'sw1']
+
+    slowest = agg.slowest_hosts(1)
+    assert [(h, r) for h, s, r in slowest] == [('sw2', 3.0)]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import tempfile
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils import configdb
+from ansible_collections.community.sonic.tests.unit.plugins.fake_configdb import FakeSwsscommon
+
+
+@pytest.fixture
+def swss(monkeypatch, tmp_path):
+    """Point the modules at an in-memory swsscommon"""
+    # Keep the caches the modules write on the switch apart per test
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    fake = FakeSwsscommon()
+    monkeypatch.setattr(configdb, 'swsscommon', fake, raising=False)
+    monkeypatch.setattr(configdb, 'HAS_SWSSCOMMON_LIBRARY', True)
+    return fake
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.sonic.plugins.connection.redis import forward_command, forward_paths
+
+
+def test_forward_paths():
+    sock, ctl = forward_paths('switch1', 22, 'admin', '/var/run/redis/redis.sock')
+    assert sock.endswith('.sock') and ctl.endswith('.ctl')
+    assert sock[:-len('.sock')] == ctl[:-len('.ctl')]
+    assert forward_paths('switch2', 22, 'admin', '/var/run/redis/redis.sock')[0] != sock
+
+
+def test_forward_command():
+    command = forward_command('ssh', 'switch1', 2222, 'admin', '/keys/id', '-o StrictHostKeyChecking=no',
+                              '/var/run/redis/redis.sock', '/tmp/r.sock', '/tmp/r.ctl', 60)
+    assert command[:3] == ['ssh', '-f', '-N']
+    assert '-L' in command and command[command.index('-L') + 1] == '/tmp/r.sock:/var/run/redis/redis.sock'
+    assert 'ControlPersist=60' in command
+    assert command[-5:] == ['-i', '/keys/id', '-o', 'StrictHostKeyChecking=no', 'switch1']
+    assert ['-p', '2222'] == command[command.index('-p'):command.index('-p') + 2]
+
+    command = forward_command('ssh', 'switch1', None, None, None, '', '/r.sock', '/tmp/r.sock', '/tmp/r.ctl', 60)
+    assert '-p' not in command and '-l' not in command and command[-1] == 'switch1'
@@ -0,0 +1,482 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""An in-memory stand-in for the swsscommon config db connectors
+
+The databases are stored the way redis stores them, as hashes keyed by
+'TABLE|key' with string fields, so the connector methods go through the same
+encoding as the real ones: multi-keys are joined with '|', list fields are
+stored with a '@' suffix and comma separated, and an entry without fields
+is stored as NULL:NULL.
+
+Every redis command counts as one round trip, a pipeline counts once when
+it's executed. Writes generate keyspace events, which are recorded and sent
+to the handlers registered with subscribe() and to the SubscriberStateTable
+instances. Every namespace, like asic0 of a multi-ASIC switch, has its own
+databases, the host's are in the '' namespace.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import collections
+import copy
+import fnmatch
+import itertools
+import re
+import time
+
+
+class FakeResponseError(Exception):
+    """Works like redis.exceptions.ResponseError"""
+
+
+WRONGTYPE = 'WRONGTYPE Operation against a key holding the wrong kind of value'
+
+
+class FakeRedisStore:
+    """The content of one database, hashes are dicts and sets are sets"""
+
+    def __init__(self, name):
+        self.name = name
+        self.data = dict()
+        self.round_trips = 0
+        # (event, redis key) for every write, like keyspace notifications
+        self.events = list()
+        self.subscribers = list()
+
+    def notify(self, event, key):
+        self.events.append((event, key))
+        for handler in list(self.subscribers):
+            handler(event, key)
+
+
+class FakeRedisPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = list()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        self.client.store.round_trips += 1
+        results = [getattr(self.client, '_' + name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = list()
+        return results
+
+
+class FakeRedis:
+    """A redis-py style client for a FakeRedisStore"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        command = getattr(self, '_' + name)
+
+        def call(*args, **kwargs):
+            self.store.round_trips += 1
+            return command(*args, **kwargs)
+        return call
+
+    def pipeline(self, transaction=True):
+        return FakeRedisPipeline(self)
+
+    def _keys(self, pattern='*'):
+        return sorted(k for k in self.store.data if fnmatch.fnmatchcase(k, pattern))
+
+    def _scan(self, cursor=0, match='*', count=10):
+        # The cursor is a position in the insertion order, like redis only
+        # the keys that exist during the whole scan are sure to be returned
+        cursor = int(cursor)
+        matches = re.compile(fnmatch.translate(match)).match
+        matched = [k for k in itertools.islice(self.store.data, cursor, cursor + count) if matches(k)]
+        cursor += count
+        return (0 if cursor >= len(self.store.data) else cursor), matched
+
+    def _exists(self, key):
+        return int(key in self.store.data)
+
+    def _value(self, key, kind):
+        value = self.store.data.get(key, kind())
+        if not isinstance(value, kind):
+            raise FakeResponseError(WRONGTYPE)
+        return value
+
+    def _hgetall(self, key):
+        return dict(self._value(key, dict))
+
+    def _hget(self, key, field):
+        return self._value(key, dict).get(field)
+
+    def _hset(self, key, field=None, value=None, mapping=None):
+        mapping = dict(mapping or dict())
+        if field is not None:
+            mapping[field] = value
+        new = [f for f in mapping if f not in self._value(key, dict)]
+        self.store.data.setdefault(key, dict()).update((f, str(v)) for f, v in mapping.items())
+        self.store.notify('hset', key)
+        return len(new)
+
+    def _hmset(self, key, mapping):
+        self._hset(key, mapping=mapping)
+        return True
+
+    def _sadd(self, key, *members):
+        value = self._value(key, set)
+        new = [m for m in members if m not in value]
+        self.store.data.setdefault(key, set()).update(members)
+        self.store.notify('sadd', key)
+        return len(new)
+
+    def _hdel(self, key, *fields):
+        entry = self._value(key, dict)
+        removed = [f for f in fields if entry.pop(f, None) is not None]
+        if removed:
+            self.store.notify('hdel', key)
+        if key in self.store.data and not entry:
+            # Redis removes a hash without fields
+            del self.store.data[key]
+            self.store.notify('del', key)
+        return len(removed)
+
+    def _delete(self, *keys):
+        removed = [k for k in keys if self.store.data.pop(k, None) is not None]
+        for key in removed:
+            self.store.notify('del', key)
+        return len(removed)
+
+
+class FakeTable:
+    """Works like swsscommon.Table on a buffered FakeRedisPipeline, only hdel is implemented"""
+
+    def __init__(self, pipe, table, buffered=False):
+        self.pipe = pipe
+        self.table = table
+
+    def hdel(self, key, field):
+        self.pipe.hdel(f'{self.table}|{key}', field)
+
+    def flush(self):
+        if self.pipe.commands:
+            self.pipe.execute()
+
+
+class FakeConfigDBConnector:
+    """Works like swsscommon.ConfigDBPipeConnector on a set of FakeRedisStore"""
+
+    TABLE_NAME_SEPARATOR = '|'
+    KEY_SEPARATOR = '|'
+
+    def __init__(self, databases):
+        self.databases = databases
+        self.db_name = None
+        self.handlers = dict()
+
+    def connect(self, wait_for_init=True, retry_on=False):
+        self.db_connect('CONFIG_DB', wait_for_init, retry_on)
+
+    def db_connect(self, dbname, wait_for_init=False, retry_on=False):
+        if dbname not in self.databases:
+            self.databases[dbname] = FakeRedisStore(dbname)
+        self.db_name = dbname
+
+    def get_redis_client(self, db_name):
+        return FakeRedis(self.databases[db_name])
+
+    @property
+    def client(self):
+        return FakeRedis(self.databases[self.db_name])
+
+    def serialize_key(self, key):
+        if isinstance(key, tuple):
+            return self.KEY_SEPARATOR.join(key)
+        return str(key)
+
+    def deserialize_key(self, key):
+        tokens = key.split(self.KEY_SEPARATOR)
+        if len(tokens) > 1:
+            return tuple(tokens)
+        return key
+
+    def _hash(self, table, key):
+        return f'{table.upper()}{self.TABLE_NAME_SEPARATOR}{self.serialize_key(key)}'
+
+    @staticmethod
+    def typed_to_raw(typed_data):
+        if typed_data is None:
+            return dict()
+        if len(typed_data) == 0:
+            return {'NULL': 'NULL'}
+        raw_data = dict()
+        for field, value in typed_data.items():
+            if isinstance(value, list):
+                raw_data[field + '@'] = ','.join(value)
+            else:
+                raw_data[field] = str(value)
+        return raw_data
+
+    @staticmethod
+    def raw_to_typed(raw_data):
+        if raw_data is None:
+            return None
+        typed_data = dict()
+        for field, value in raw_data.items():
+            # NULL:NULL is the placeholder of entries without fields
+            if field == 'NULL':
+                continue
+            if field.endswith('@'):
+                typed_data[field[:-1]] = value.split(',')
+            else:
+                typed_data[field] = value
+        return typed_data
+
+    def set_entry(self, table, key, data):
+        client = self.client
+        _hash = self._hash(table, key)
+        if data is None:
+            client.delete(_hash)
+            return
+        original = self.get_entry(table, key)
+        client.hmset(_hash, self.typed_to_raw(data))
+        for field in [f for f in original if f not in data]:
+            if isinstance(original[field], list):
+                field = field + '@'
+            client.hdel(_hash, field)
+
+    def mod_entry(self, table, key, data):
+        client = self.client
+        _hash = self._hash(table, key)
+        if data is None:
+            client.delete(_hash)
+        else:
+            client.hmset(_hash, self.typed_to_raw(data))
+
+    def get_entry(self, table, key):
+        return self.raw_to_typed(self.client.hgetall(self._hash(table, key)))
+
+    def get_keys(self, table, split=True):
+        prefix = f'{table.upper()}{self.TABLE_NAME_SEPARATOR}'
+        keys = [k[len(prefix):] for k in self.client.keys(prefix + '*')]
+        if split:
+            return [self.deserialize_key(k) for k in keys]
+        return keys
+
+    def get_table(self, table):
+        client = self.client
+        prefix = f'{table.upper()}{self.TABLE_NAME_SEPARATOR}'
+        data = dict()
+        for _hash in client.keys(prefix + '*'):
+            data[self.deserialize_key(_hash[len(prefix):])] = self.raw_to_typed(client.hgetall(_hash))
+        return data
+
+    def delete_table(self, table):
+        client = self.client
+        for _hash in client.keys(f'{table.upper()}{self.TABLE_NAME_SEPARATOR}*'):
+            client.delete(_hash)
+
+    def mod_config(self, data):
+        client = self.client
+        pipe = client.pipeline()
+        for table, table_data in data.items():
+            if table_data is None:
+                for _hash in client.keys(f'{table.upper()}{self.TABLE_NAME_SEPARATOR}*'):
+                    pipe.delete(_hash)
+                continue
+            for key, entry in table_data.items():
+                _hash = self._hash(table, key)
+                if entry is None:
+                    pipe.delete(_hash)
+                else:
+                    pipe.hmset(_hash, self.typed_to_raw(entry))
+        pipe.execute()
+
+    def get_config(self):
+        client = self.client
+        keys = [k for k in client.keys('*') if self.TABLE_NAME_SEPARATOR in k]
+        pipe = client.pipeline()
+        for _hash in keys:
+            pipe.hgetall(_hash)
+        data = dict()
+        for _hash, raw in zip(keys, pipe.execute()):
+            table, key = _hash.split(self.TABLE_NAME_SEPARATOR, 1)
+            data.setdefault(table, dict())[self.deserialize_key(key)] = self.raw_to_typed(raw)
+        return data
+
+    def subscribe(self, table, handler):
+        """Call handler(table, key, data) on every change of the table
+
+        Unlike the real connector there's no listen() loop, the handlers are
+        called right after the write.
+        """
+        prefix = f'{table.upper()}{self.TABLE_NAME_SEPARATOR}'
+        store = self.databases[self.db_name]
+
+        def on_event(event, _hash):
+            if _hash.startswith(prefix) and not isinstance(store.data.get(_hash), set):
+                data = self.raw_to_typed(store.data.get(_hash)) or dict()
+                handler(table, _hash[len(prefix):], copy.deepcopy(data))
+        self.handlers.setdefault(table, list()).append(on_event)
+        store.subscribers.append(on_event)
+
+    def unsubscribe(self, table):
+        store = self.databases[self.db_name]
+        for on_event in self.handlers.pop(table, list()):
+            store.subscribers.remove(on_event)
+
+
+class FakeDBConnector:
+    def __init__(self, db_name, timeout=0, is_unix=False, namespace=''):
+        self.db_name = db_name
+        self.namespace = namespace
+
+
+class FakeSonicDBConfig:
+    """Works like swsscommon.SonicDBConfig, the global config lists the namespaces"""
+
+    global_init = False
+
+    @classmethod
+    def isGlobalInit(cls):
+        return cls.global_init
+
+    @classmethod
+    def initializeGlobalConfig(cls, path=None):
+        cls.global_init = True
+
+
+class FakeSubscriberStateTable:
+    """Works like swsscommon.SubscriberStateTable, the entries are queued right after each write
+
+    The entries of the table when subscribing are queued first.
+    """
+
+    def __init__(self, store, table):
+        self.store = store
+        self.prefix = f'{table}|'
+        self.queue = collections.deque()
+        for _hash in list(store.data):
+            self._on_event('hset', _hash)
+        store.subscribers.append(self._on_event)
+
+    def _on_event(self, event, _hash):
+        if _hash.startswith(self.prefix):
+            raw = self.store.data.get(_hash)
+            if not isinstance(raw, (dict, type(None))):
+                return
+            if raw:
+                self.queue.append((_hash[len(self.prefix):], 'SET', tuple(raw.items())))
+            else:
+                self.queue.append((_hash[len(self.prefix):], 'DEL', ()))
+
+    def pops(self):
+        items = list()
+        while self.queue:
+            items.append(self.queue.popleft())
+        return items
+
+
+class FakeSelect:
+    """Works like swsscommon.Select on FakeSubscriberStateTable instances, which can be written by other threads"""
+
+    OBJECT = 0
+    ERROR = 1
+    TIMEOUT = 2
+
+    def __init__(self):
+        self.selectables = list()
+
+    def addSelectable(self, selectable):
+        self.selectables.append(selectable)
+
+    def select(self, timeout=-1):
+        deadline = time.monotonic() + timeout / 1000
+        while True:
+            for selectable in self.selectables:
+                if selectable.queue:
+                    return self.OBJECT, selectable
+            if timeout >= 0 and time.monotonic() >= deadline:
+                return self.TIMEOUT, None
+            time.sleep(0.001)
+
+
+class FakeSwsscommon:
+    """Stands in for the swsscommon module
+
+    All connectors created from the same instance share the databases, use
+    load() to fill a database with tables and dump() to read it back.
+    """
+
+    def __init__(self):
+        self.databases = dict()
+        self.namespaces = {'': self.databases}
+        self.connectors = list()
+        self.SonicDBConfig = type('SonicDBConfig', (FakeSonicDBConfig,), dict())
+
+    def namespace_databases(self, namespace=''):
+        return self.namespaces.setdefault(namespace or '', dict())
+
+    def ConfigDBConnector(self, *args, namespace='', **kwargs):
+        if namespace and not self.SonicDBConfig.isGlobalInit():
+            raise RuntimeError('Initialize global DB config using API SonicDBConfig.initializeGlobalConfig')
+        connector = FakeConfigDBConnector(self.namespace_databases(namespace))
+        self.connectors.append(connector)
+        return connector
+
+    ConfigDBPipeConnector = ConfigDBConnector
+    DBConnector = FakeDBConnector
+    Select = FakeSelect
+    Table = FakeTable
+
+    def RedisPipeline(self, client):
+        return FakeRedisPipeline(FakeRedis(client.store))
+
+    def SubscriberStateTable(self, db, table):
+        return FakeSubscriberStateTable(self.store(db.db_name, db.namespace), table)
+
+    def store(self, db_name='CONFIG_DB', namespace=''):
+        databases = self.namespace_databases(namespace)
+        if db_name not in databases:
+            databases[db_name] = FakeRedisStore(db_name)
+        return databases[db_name]
+
+    def load(self, tables, db_name='CONFIG_DB', namespace=''):
+        """Load tables, in the format of config_db.json, into a database"""
+        connector = FakeConfigDBConnector(self.namespace_databases(namespace))
+        connector.db_connect(db_name)
+        for table, entries in tables.items():
+            for key, entry in entries.items():
+                connector.mod_entry(table, key, entry)
+        self.reset(db_name, namespace)
+
+    def dump(self, db_name='CONFIG_DB', namespace=''):
+        """Returns the content of a database, multi-keys are joined with '|'"""
+        data = dict()
+        for _hash, raw in self.store(db_name, namespace).data.items():
+            if '|' not in _hash or not isinstance(raw, dict):
+                continue
+            table, key = _hash.split('|', 1)
+            data.setdefault(table, dict())[key] = FakeConfigDBConnector.raw_to_typed(raw)
+        return data
+
+    def reset(self, db_name='CONFIG_DB', namespace=''):
+        """Reset the round trip counter and the recorded events"""
+        store = self.store(db_name, namespace)
+        store.round_trips = 0
+        store.events = list()
+
+    def round_trips(self, db_name='CONFIG_DB', namespace=''):
+        return self.store(db_name, namespace).round_trips
+
+    def events(self, db_name='CONFIG_DB', namespace=''):
+        return list(self.store(db_name, namespace).events)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""A redis server speaking RESP2, serving the databases of a FakeSwsscommon
+
+Only the commands used by the collection are implemented.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import socketserver
+import threading
+
+from ansible_collections.community.sonic.plugins.plugin_utils.resp import DATABASES
+from ansible_collections.community.sonic.tests.unit.plugins.fake_configdb import FakeRedis
+
+DB_NAMES = {v: k for k, v in DATABASES.items()}
+
+
+def encode(value):
+    if isinstance(value, Exception):
+        return b'-ERR %s\r\n' % str(value).encode()
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, bool):
+        return b':%d\r\n' % int(value)
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, (list, tuple)):
+        return b'*%d\r\n' % len(value) + b''.join(encode(v) for v in value)
+    value = str(value).encode()
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class RedisHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = list()
+        for dummy in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def handle(self):
+        swss = self.server.swss
+        db = swss.store('CONFIG_DB')
+        queued = None
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            if name == 'MULTI':
+                queued = list()
+                self.wfile.write(b'+OK\r\n')
+                continue
+            if name == 'EXEC':
+                self.wfile.write(encode([self.run(db, c) for c in queued]))
+                queued = None
+                continue
+            if queued is not None:
+                queued.append(args)
+                self.wfile.write(b'+QUEUED\r\n')
+                continue
+            if name == 'SELECT':
+                db = swss.store(DB_NAMES[int(args[1])])
+                self.wfile.write(b'+OK\r\n')
+                continue
+            self.wfile.write(encode(self.run(db, args)))
+
+    def run(self, db, args):
+        db.round_trips += 1
+        client = FakeRedis(db)
+        name = args[0].upper()
+        try:
+            if name == 'PING':
+                return 'PONG'
+            if name == 'HGETALL':
+                return [x for kv in client._hgetall(args[1]).items() for x in kv]
+            if name == 'HSET':
+                return client._hset(args[1], mapping=dict(zip(args[2::2], args[3::2])))
+            if name == 'HDEL':
+                return client._hdel(args[1], *args[2:])
+            if name == 'DEL':
+                return client._delete(*args[1:])
+            if name == 'KEYS':
+                return client._keys(args[1])
+            if name == 'SCAN':
+                options = dict(zip([a.upper() for a in args[2::2]], args[3::2]))
+                cursor, keys = client._scan(int(args[1]), options.get('MATCH', '*'), int(options.get('COUNT', 10)))
+                return [str(cursor), keys]
+            raise ValueError(f"unknown command '{args[0]}'")
+        except Exception as e:
+            return e
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Serves the databases of swss on a free port of localhost, use as a context manager"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, swss):
+        self.swss = swss
+        socketserver.ThreadingTCPServer.__init__(self, ('127.0.0.1', 0), RedisHandler)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
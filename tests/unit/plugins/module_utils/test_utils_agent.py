@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils import agent, configdb
+from ansible_collections.community.sonic.plugins.module_utils.configdb import ConfigDBSession
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to about 100 characters
+    directory = tempfile.mkdtemp(prefix='sonic-agent-')
+    yield os.path.join(directory, 'agent.sock')
+    os.rmdir(directory)
+
+
+@pytest.fixture
+def server(swss, socket_path):
+    server = agent.AgentServer(socket_path, configdb.connect_connector, 0.5)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    for dummy in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.01)
+    yield server
+    thread.join(5)
+
+
+def test_session_through_agent(swss, server, socket_path):
+    swss.load({
+        'VLAN': {'Vlan10': {'vlanid': '10', 'dhcp_servers': ['10.0.0.1']}},
+        'VLAN_MEMBER': {('Vlan10', 'Ethernet0'): {'tagging_mode': 'tagged'}},
+    })
+    connector = agent.connect_agent('CONFIG_DB', fallback=None, path=socket_path)
+    session = ConfigDBSession(connector)
+    assert session.get_table('VLAN_MEMBER') == {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}}
+    assert session.scan_keys('VLAN', 'Vlan1*') == ['Vlan10']
+    assert session.get_tables(['VLAN', 'PORT']) == {'VLAN': {'Vlan10': {'vlanid': '10', 'dhcp_servers': ['10.0.0.1']}}, 'PORT': {}}
+    session.set_entry('VLAN', 'Vlan10', {'vlanid': '10'})
+    session.set_entry('VLAN', 'Vlan11', {'vlanid': '11'})
+    session.flush()
+    assert swss.dump()['VLAN'] == {'Vlan10': {'vlanid': '10'}, 'Vlan11': {'vlanid': '11'}}
+    connector.client.close()
+
+
+class DBConnectorClient:
+    """A client without a pipeline, like the swsscommon DBConnector"""
+
+    def __init__(self, client):
+        self.client = client
+        self.store = client.store
+
+    def hset(self, key, field, value):
+        return self.client.hset(key, field, value)
+
+    def hgetall(self, key):
+        return self.client.hgetall(key)
+
+
+def db_connector(swss):
+    connector = swss.ConfigDBConnector()
+    connector.connect()
+    client = DBConnectorClient(connector.get_redis_client('CONFIG_DB'))
+    connector.get_redis_client = lambda db_name: client
+    return connector
+
+
+def test_redis_transaction(swss):
+    swss.load({'VLAN': {'Vlan10': {'vlanid': '10', 'mtu': '9100'}, 'Vlan20': {'vlanid': '20'}}})
+    commands = [
+        ['hset', 'VLAN|Vlan30', None, None, {'vlanid': '30', 'dhcp_servers@': '10.0.0.1,10.0.0.2'}],
+        ['delete', 'VLAN|Vlan20'],
+        ['hdel', 'VLAN|Vlan10', 'mtu'],
+    ]
+    swss.reset()
+    assert agent.call_connector(db_connector(swss), 'redis', (commands, True)) == [None, None, None]
+    assert swss.dump()['VLAN'] == {
+        'Vlan10': {'vlanid': '10'},
+        'Vlan30': {'vlanid': '30', 'dhcp_servers': ['10.0.0.1', '10.0.0.2']},
+    }
+    # mod_config and the pipeline of HDELs
+    assert swss.round_trips() == 2
+
+
+def test_redis_transaction_invalid(swss):
+    swss.load({'VLAN': {'Vlan20': {'vlanid': '20'}}})
+    commands = [
+        ['hset', 'VLAN|Vlan30', None, None, {'vlanid': '30'}],
+        ['delete', 'VLAN|Vlan20'],
+        ['sadd', 'VLAN|Vlan40', 'vlanid'],
+    ]
+    with pytest.raises(agent.AgentError):
+        agent.call_connector(db_connector(swss), 'redis', (commands, True))
+    # None of the commands is applied
+    assert swss.dump()['VLAN'] == {'Vlan20': {'vlanid': '20'}}
+
+
+def test_agent_error(swss, server, socket_path):
+    client = agent.AgentClient(socket_path)
+    with pytest.raises(agent.AgentError):
+        client.call('CONFIG_DB', 'delete_table', 'VLAN')
+    client.close()
+
+
+def test_concurrent_connections(swss, server, socket_path):
+    swss.load({'VLAN': {'Vlan10': {'vlanid': '10'}}})
+    first = agent.AgentClient(socket_path, timeout=1)
+    assert first.call('CONFIG_DB', 'get_keys', 'VLAN') == ['Vlan10']
+    # A second connection is served while the first one is still open
+    second = agent.AgentClient(socket_path, timeout=1)
+    assert second.call('STATE_DB', 'get_keys', 'VLAN_TABLE') == []
+    assert second.call('CONFIG_DB', 'get_entry', 'VLAN', 'Vlan10') == {'vlanid': '10'}
+    assert first.call('CONFIG_DB', 'get_entry', 'VLAN', 'Vlan10') == {'vlanid': '10'}
+    second.close()
+    first.close()
+
+
+def test_fallback(swss):
+    swss.load({'VLAN': {'Vlan10': {'vlanid': '10'}}})
+
+    class DeadClient:
+        def call(self, *args, **kwargs):
+            raise ConnectionError('the agent closed the connection')
+
+    connector = agent.AgentConnector(DeadClient(), 'CONFIG_DB', lambda: configdb.connect_connector('CONFIG_DB'))
+    assert connector.get_table('VLAN') == {'Vlan10': {'vlanid': '10'}}
+    assert connector.local is not None
+
+
+def test_idle_timeout(swss, socket_path):
+    server = agent.AgentServer(socket_path, configdb.connect_connector, 0.05)
+    server.serve()
+    assert not os.path.exists(socket_path)
+
+
+def test_connect_starts_agent(swss, monkeypatch):
+    started = list()
+    monkeypatch.setattr(configdb, 'connect_agent', lambda db_name, fallback, namespace='': None)
+    monkeypatch.setattr(configdb, 'start_agent', lambda factory, timeout: started.append(timeout))
+
+    class Module:
+        params = {'agent': True, 'agent_idle_timeout': 60}
+
+    session = configdb.connect(Module())
+    assert started == [60]
+    assert session.get_table('VLAN') == {}
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils import capabilities
+from ansible_collections.community.sonic.plugins.module_utils.capabilities import (
+    BreakoutModeError, PortCapabilities, load_capabilities, parse_breakout_mode, supported_fec)
+from ansible_collections.community.sonic.plugins.module_utils.configdb import ConfigDBSession
+
+PLATFORM_JSON = {
+    'interfaces': {
+        'Ethernet0': {
+            'index': '1,1,1,1',
+            'lanes': '0,1,2,3',
+            'breakout_modes': {'1x100G[40G]': ['Eth1'], '4x25G[10G]': ['Eth1/1', 'Eth1/2', 'Eth1/3', 'Eth1/4']},
+        },
+        'Ethernet8': {
+            'index': '2,2,2,2,2,2,2,2',
+            'lanes': '8,9,10,11,12,13,14,15',
+            'breakout_modes': {'1x400G': ['Eth2'], '1x200G(4)+2x100G(4)': ['Eth2/1', 'Eth2/2', 'Eth2/3']},
+        },
+    },
+}
+HWSKU_JSON = {
+    'interfaces': {
+        'Ethernet0': {'default_brkout_mode': '1x100G[40G]', 'fec': 'rs'},
+        'Ethernet8': {'default_brkout_mode': '1x400G'},
+    },
+}
+
+
+def test_parse_breakout_mode():
+    assert parse_breakout_mode('1x100G[40G]', 4) == [(4, {100000, 40000})]
+    assert parse_breakout_mode('4x25G[10G]', 4) == [(1, {25000, 10000})] * 4
+    assert parse_breakout_mode('1x200G(4)+2x100G(4)', 8) == [(4, {200000}), (2, {100000}), (2, {100000})]
+    with pytest.raises(BreakoutModeError):
+        parse_breakout_mode('1x200G+2x100G', 8)
+    with pytest.raises(BreakoutModeError):
+        parse_breakout_mode('fast', 4)
+
+
+@pytest.mark.parametrize('speed,lanes,expected', (
+    (10000, 1, {'auto', 'none', 'fc'}),
+    (40000, 4, {'auto', 'none', 'fc'}),
+    (25000, 1, {'auto', 'none', 'fc', 'rs'}),
+    (100000, 4, {'auto', 'none', 'rs'}),
+    (100000, 2, {'auto', 'rs'}),
+    (400000, 8, {'auto', 'rs'})))
+def test_supported_fec(speed, lanes, expected):
+    assert supported_fec(speed, lanes) == expected
+
+
+def test_port_capabilities():
+    caps = PortCapabilities(PLATFORM_JSON, HWSKU_JSON, {'Ethernet8': {'brkout_mode': '1x200G(4)+2x100G(4)'}})
+    assert caps.speeds({'lanes': '0,1,2,3'}) == {100000, 40000}
+    assert caps.speeds({'lanes': '8,9,10,11'}) == {200000}
+    assert caps.speeds({'lanes': '14,15'}) == {100000}
+    assert caps.speeds({'lanes': '99'}) is None
+    assert caps.speeds({}) is None
+    assert caps.default_fec({'lanes': '0,1,2,3'}, 100000) == 'rs'
+    assert caps.default_fec({'lanes': '0,1,2,3'}, 40000) == 'none'
+    assert caps.default_fec({'lanes': '14,15'}, 100000) == 'rs'
+
+
+def test_load_capabilities(swss, monkeypatch, tmp_path):
+    platform_dir = tmp_path / 'x86_64-test-r0'
+    (platform_dir / 'Test-HWSKU').mkdir(parents=True)
+    (platform_dir / 'platform.json').write_text(json.dumps(PLATFORM_JSON))
+    (platform_dir / 'Test-HWSKU' / 'hwsku.json').write_text(json.dumps(HWSKU_JSON))
+    monkeypatch.setattr(capabilities, 'DEVICE_DIR', str(tmp_path))
+    monkeypatch.setattr(capabilities, 'MACHINE_CONF', str(tmp_path / 'machine.conf'))
+    monkeypatch.delenv('PLATFORM', raising=False)
+    swss.load({
+        'DEVICE_METADATA': {'localhost': {'platform': 'x86_64-test-r0', 'hwsku': 'Test-HWSKU'}},
+        'BREAKOUT_CFG': {'Ethernet0': {'brkout_mode': '4x25G[10G]'}},
+    })
+    config_db = swss.ConfigDBConnector()
+    config_db.connect()
+    caps = load_capabilities(ConfigDBSession(config_db))
+    assert caps.speeds({'lanes': '1'}) == {25000, 10000}
+    assert caps.default_fec({'lanes': '0,1,2,3'}, 100000) == 'rs'
+
+    # The platform is read from machine.conf when it's there
+    (tmp_path / 'machine.conf').write_text('onie_platform=x86_64-other-r0\n')
+    assert load_capabilities(ConfigDBSession(config_db)) is None
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import fnmatch
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils.configdb import (
+    ConfigDBSession, PerfRecorder, StalePlanError, StaleSnapshotError, command_count, payload_size)
+from ansible_collections.community.sonic.plugins.module_utils.entries import entry_hash, fix_keys
+from ansible_collections.community.sonic.tests.unit.plugins.fake_configdb import FakeResponseError
+
+
+class RedisPipeline:
+    def __init__(self, calls, data):
+        self.calls = calls
+        self.data = data
+        self.replies = list()
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self.calls.append(('hset', key, mapping))
+
+    def delete(self, key):
+        self.calls.append(('delete', key))
+
+    def hdel(self, key, *fields):
+        self.calls.append(('hdel', key) + fields)
+
+    def hgetall(self, key):
+        self.calls.append(('hgetall', key))
+        self.replies.append(self.data.get(key, dict()))
+
+    def execute(self):
+        self.calls.append(('execute',))
+        return self.replies
+
+
+class RedisClient:
+    def __init__(self, calls, data=None):
+        self.calls = calls
+        self.data = data or dict()
+        self.keys = list(self.data)
+
+    def pipeline(self, transaction=True):
+        return RedisPipeline(self.calls, self.data)
+
+    def scan(self, cursor, match, count):
+        self.calls.append(('scan', cursor, match, count))
+        matched = [k for k in self.keys[cursor:cursor + 2] if fnmatch.fnmatchcase(k, match)]
+        cursor += 2
+        return (0 if cursor >= len(self.keys) else cursor), matched
+
+
+class RecordingConfigDB:
+    db_name = 'CONFIG_DB'
+    TABLE_NAME_SEPARATOR = '|'
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = list()
+
+    def get_entry(self, table, key):
+        self.calls.append(('get_entry', table, key))
+        return dict(fix_keys(self.tables.get(table, dict())).get(key, dict()))
+
+    def get_table(self, table):
+        self.calls.append(('get_table', table))
+        return dict(self.tables.get(table, dict()))
+
+    def mod_config(self, data):
+        self.calls.append(('mod_config', data))
+
+    def get_redis_client(self, db_name):
+        data = dict()
+        for table, entries in self.tables.items():
+            for key, entry in fix_keys(entries).items():
+                data[f'{table}|{key}'] = {f'{f}@' if isinstance(v, list) else f: ','.join(v) if isinstance(v, list) else v
+                                          for f, v in entry.items()} or {'NULL': 'NULL'}
+        return RedisClient(self.calls, data)
+
+
+WRITES = ('mod_config', 'hset', 'delete', 'hdel')
+
+TABLES = {
+    'VLAN': {
+        'Vlan10': {'vlanid': '10', 'dhcp_servers': ['10.1.0.2']},
+        'Vlan20': {'vlanid': '20'},
+    },
+    'VLAN_MEMBER': {
+        ('Vlan10', 'Ethernet0'): {'tagging_mode': 'tagged'},
+    },
+}
+
+
+def test_reads_are_cached():
+    config_db = RecordingConfigDB(TABLES)
+    session = ConfigDBSession(config_db)
+    assert session.get_entry('VLAN', 'Vlan10')['vlanid'] == '10'
+    session.get_entry('VLAN', 'Vlan10')
+    assert session.get_table('VLAN_MEMBER') == {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}}
+    assert session.get_entry('VLAN_MEMBER', 'Vlan10|Ethernet0') == {'tagging_mode': 'tagged'}
+    assert session.get_entry('VLAN_MEMBER', 'Vlan20|Ethernet0') == {}
+    assert session.round_trips == 2
+    assert config_db.calls == [('get_entry', 'VLAN', 'Vlan10'), ('get_table', 'VLAN_MEMBER')]
+
+
+def test_reads_return_pending_writes():
+    session = ConfigDBSession(RecordingConfigDB(TABLES))
+    session.mod_entry('VLAN', 'Vlan20', {'mtu': '9100'})
+    session.delete_entry('VLAN', 'Vlan10')
+    session.set_entry('VLAN', 'Vlan30', {'vlanid': '30'})
+    assert session.get_table('VLAN') == {
+        'Vlan20': {'vlanid': '20', 'mtu': '9100'},
+        'Vlan30': {'vlanid': '30'},
+    }
+    assert session.pending == [('VLAN', 'Vlan10'), ('VLAN', 'Vlan20'), ('VLAN', 'Vlan30')]
+
+
+def test_flush_batches_writes():
+    config_db = RecordingConfigDB(TABLES)
+    session = ConfigDBSession(config_db)
+    session.get_table('VLAN')
+    session.set_entry('VLAN', 'Vlan10', {'vlanid': '10', 'mtu': '9100'})
+    session.set_entry('VLAN', 'Vlan20', None)
+    session.set_entry('VLAN', 'Vlan30', {})
+    # Writing the current value is not a change
+    session.set_entry('VLAN_MEMBER', ('Vlan10', 'Ethernet0'), {'tagging_mode': 'tagged'})
+    assert session.flush() == 3
+    # Changed fields, removed keys and removed fields in one transaction
+    assert config_db.calls[2:] == [
+        ('hset', 'VLAN|Vlan10', {'mtu': '9100'}),
+        ('delete', 'VLAN|Vlan20'),
+        ('hset', 'VLAN|Vlan30', {'NULL': 'NULL'}),
+        ('hdel', 'VLAN|Vlan10', 'dhcp_servers@'),
+        ('execute',),
+    ]
+    assert session.pending == []
+    assert session.flush() == 0
+    assert session.round_trips == 3
+
+
+def test_apply_patch():
+    config_db = RecordingConfigDB(TABLES)
+    session = ConfigDBSession(config_db)
+    session.get_table('VLAN')
+    session.apply_patch('VLAN', {
+        'Vlan10': {'set': {}, 'delete': ['dhcp_servers']},
+        'Vlan20': None,
+        'Vlan30': {'set': {'NULL': 'NULL'}, 'delete': []},
+    })
+    assert session.get_table('VLAN') == {'Vlan10': {'vlanid': '10'}, 'Vlan30': {}}
+
+
+def test_snapshot():
+    snapshot = {
+        'VLAN': {'Vlan10': {'vlanid': '10', 'dhcp_servers': ['10.1.0.2']}},
+        'VLAN_INTERFACE': {'Vlan10': {}},
+    }
+    config_db = RecordingConfigDB(dict(TABLES, VLAN_INTERFACE={'Vlan10': {}}))
+    session = ConfigDBSession(config_db, snapshot=snapshot)
+    assert session.get_entry('VLAN', 'Vlan20') == {}
+    session.set_entry('VLAN', 'Vlan10', {'vlanid': '10'})
+    session.set_entry('VLAN', 'Vlan30', {'vlanid': '30'})
+    session.set_entry('VLAN_INTERFACE', 'Vlan10', None)
+    session.flush()
+    # Only the written keys are read back to check the snapshot is fresh, in one pipeline
+    assert config_db.calls[:4] == [
+        ('hgetall', 'VLAN|Vlan10'), ('hgetall', 'VLAN|Vlan30'), ('hgetall', 'VLAN_INTERFACE|Vlan10'), ('execute',)]
+    # Then all writes in one transaction
+    assert session.round_trips == 2
+
+
+def test_snapshot_stale():
+    config_db = RecordingConfigDB(TABLES)
+    session = ConfigDBSession(config_db, snapshot={'VLAN': {'Vlan10': {'vlanid': '10'}}})
+    session.set_entry('VLAN', 'Vlan10', {'vlanid': '10', 'mtu': '9100'})
+    with pytest.raises(StaleSnapshotError):
+        session.flush()
+    assert [c for c in config_db.calls if c[0] in WRITES] == []
+
+
+def test_plan():
+    config_db = RecordingConfigDB(TABLES)
+    session = ConfigDBSession(config_db)
+    session.plan = list()
+    session.get_table('VLAN')
+    session.set_entry('VLAN', 'Vlan10', {'vlanid': '10'})
+    session.set_entry('VLAN', 'Vlan30', {'vlanid': '30'})
+    assert session.flush() == 2
+    session.set_entry('VLAN', 'Vlan30', None)
+    session.flush()
+    # Nothing is written, later reads see the planned writes
+    assert [c for c in config_db.calls if c[0] in WRITES] == []
+    assert session.get_table('VLAN') == {'Vlan10': {'vlanid': '10'}, 'Vlan20': {'vlanid': '20'}}
+
+    plan = session.plan_document('community.sonic.vlan')
+    assert plan['hashes'] == [
+        {'table': 'VLAN', 'key': 'Vlan10', 'hash': entry_hash(TABLES['VLAN']['Vlan10'])},
+        {'table': 'VLAN', 'key': 'Vlan30', 'hash': None},
+    ]
+    assert plan['batches'] == [
+        [{'table': 'VLAN', 'key': 'Vlan10', 'entry': {'vlanid': '10'}},
+         {'table': 'VLAN', 'key': 'Vlan30', 'entry': {'vlanid': '30'}}],
+        [{'table': 'VLAN', 'key': 'Vlan30', 'entry': None}],
+    ]
+
+    config_db = RecordingConfigDB(TABLES)
+    session = ConfigDBSession(config_db)
+    assert session.apply_plan(plan) == 3
+    # Only the touched keys are read, each batch is written as planned
+    assert config_db.calls[2:] == [
+        ('hset', 'VLAN|Vlan30', {'vlanid': '30'}),
+        ('hdel', 'VLAN|Vlan10', 'dhcp_servers@'),
+        ('execute',),
+        ('delete', 'VLAN|Vlan30'),
+        ('execute',),
+    ]
+
+
+def test_apply_plan_stale():
+    session = ConfigDBSession(RecordingConfigDB(TABLES))
+    session.plan = list()
+    session.set_entry('VLAN', 'Vlan20', {'vlanid': '20', 'mtu': '9100'})
+    session.flush()
+    plan = session.plan_document()
+
+    tables = dict(TABLES, VLAN={'Vlan20': {'vlanid': '20', 'mtu': '1500'}})
+    config_db = RecordingConfigDB(tables)
+    with pytest.raises(StalePlanError, match='VLAN|Vlan20'):
+        ConfigDBSession(config_db).apply_plan(plan)
+    assert [c for c in config_db.calls if c[0] in WRITES] == []
+
+    with pytest.raises(ValueError, match='version'):
+        ConfigDBSession(config_db).apply_plan(dict(plan, version=0))
+
+
+def test_get_tables_pipelined(swss):
+    swss.load(TABLES)
+    # Keys of other tables that aren't hashes are never read
+    swss.ConfigDBConnector().get_redis_client('CONFIG_DB').sadd('ACL_RULE|KEY_SET', 'RULE_1')
+    config_db = swss.ConfigDBPipeConnector()
+    config_db.connect()
+    session = ConfigDBSession(config_db)
+    tables = session.get_tables(['VLAN', 'VLAN_MEMBER', 'PORT'])
+    assert tables['VLAN_MEMBER'] == {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}}
+    assert tables['PORT'] == {}
+    session.get_table('VLAN')
+    # The tables are scanned together, then all entries are read at once
+    assert session.round_trips == 2
+    with pytest.raises(FakeResponseError, match='WRONGTYPE'):
+        config_db.get_config()
+
+
+def test_scan_keys():
+    tables = {
+        'ACL_RULE': {
+            ('DATAACL', 'RULE_1'): {'PRIORITY': '1'},
+            ('DATAACL', 'RULE_2'): {'PRIORITY': '2'},
+            ('EVERFLOW', 'RULE_1'): {'PRIORITY': '1'},
+        },
+    }
+    config_db = RecordingConfigDB(tables)
+    session = ConfigDBSession(config_db)
+    assert session.scan_keys('ACL_RULE', 'DATAACL|*') == ['DATAACL|RULE_1', 'DATAACL|RULE_2']
+    assert [c[:3] for c in config_db.calls] == [('scan', 0, 'ACL_RULE|DATAACL|*'), ('scan', 2, 'ACL_RULE|DATAACL|*')]
+    assert session.round_trips == 2
+
+
+def test_iter_entries_uncached():
+    tables = {'ACL_RULE': {('DATAACL', 'RULE_%d' % i): {'PRIORITY': str(i)} for i in range(5)}}
+    config_db = RecordingConfigDB(tables)
+    session = ConfigDBSession(config_db)
+    entries = list(session.iter_entries('ACL_RULE', count=2))
+    assert sorted(entries) == [('DATAACL|RULE_%d' % i, {'PRIORITY': str(i)}) for i in range(5)]
+    assert session._entries == dict()
+    # One pipeline of HGETALLs per SCAN batch
+    assert [c[0] for c in config_db.calls].count('execute') == 3
+    assert session.round_trips == 3 + 3
+
+
+def test_session_on_fake_connector(swss):
+    swss.load({'VLAN': {'Vlan100': {'vlanid': '100', 'dhcp_servers': ['10.0.0.1', '10.0.0.2']}}})
+    config_db = swss.ConfigDBPipeConnector()
+    config_db.connect()
+    seen = list()
+    config_db.subscribe('VLAN', lambda table, key, data: seen.append((key, data)))
+
+    session = ConfigDBSession(config_db)
+    assert session.get_entry('VLAN', 'Vlan100')['dhcp_servers'] == ['10.0.0.1', '10.0.0.2']
+    session.set_entry('VLAN', 'Vlan100', {'vlanid': '100'})
+    session.flush()
+    assert swss.store().data['VLAN|Vlan100'] == {'vlanid': '100'}
+    assert seen == [('Vlan100', {'vlanid': '100'})]
+
+
+def test_payload_size():
+    assert payload_size({('Vlan10', 'Ethernet0'): {'tagging_mode': 'tagged'}}) == len('Vlan10|Ethernet0tagging_modetagged')
+    assert payload_size({'Vlan10': {'dhcp_servers': ['10.0.0.1', '10.0.0.2']}}) == len('Vlan10dhcp_servers10.0.0.1,10.0.0.2')
+    assert payload_size(None) == 0
+
+
+def test_command_count():
+    assert command_count('get_table', ('PORT',), {'Ethernet0': {}, 'Ethernet4': {}}) == 3
+    assert command_count('mod_config', ({'VLAN': {'Vlan10': None, 'Vlan11': {}}, 'ACL_RULE': None},), None) == 3
+    assert command_count('get_entry', ('PORT', 'Ethernet0'), {}) == 1
+
+
+def test_perf():
+    tables = {'VLAN': {'Vlan10': {'vlanid': '10'}}}
+    perf = PerfRecorder()
+    session = ConfigDBSession(RecordingConfigDB(tables), perf=perf)
+    session.get_entry('VLAN', 'Vlan10')
+    session.set_entry('VLAN', 'Vlan11', {'vlanid': '11'})
+    session.flush()
+    result = perf.result()
+    assert result['round_trips'] == session.round_trips == 3
+    assert result['bytes_read'] == len('vlanid10')
+    assert result['bytes_written'] == len('VLANVlan11vlanid11')
+    assert result['total'] >= sum(result['phases'].values()) - 0.001
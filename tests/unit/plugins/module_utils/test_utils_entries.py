@@ -4,7 +4,7 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
-from ansible_collections.community.sonic.plugins.module_utils.entries import compare_entries
+from ansible_collections.community.sonic.plugins.module_utils.entries import compare_entries, diff_fields, diff_table
 
 
 def test_compare_entries_both_empty():
@@ -48,3 +48,70 @@ def test_compare_entries_different():
     }
     changed = compare_entries(new, cur)
     assert changed
+
+
+def test_diff_fields():
+    new = {'speed': '100000', 'fec': 'rs', 'admin_status': 'up'}
+    cur = {'speed': '40000', 'description': 'foo', 'admin_status': 'up'}
+    assert diff_fields(new, cur) == {
+        'description': {'before': 'foo'},
+        'fec': {'after': 'rs'},
+        'speed': {'before': '40000', 'after': '100000'},
+    }
+    assert diff_fields(None, None) == {}
+
+
+TABLE = {
+    'Loopback0': {'vrf_name': 'default', 'nat_zone': '0'},
+    'Loopback1': {'vrf_name': 'default'},
+}
+
+
+def test_diff_table_merged():
+    wanted = {'Loopback0': {'vrf_name': 'default', 'admin_status': 'up'}, 'Loopback2': {}}
+    patch = diff_table(wanted, TABLE, 'merged')
+    assert patch == {
+        'Loopback0': {'set': {'admin_status': 'up'}, 'delete': []},
+        'Loopback2': {'set': {'NULL': 'NULL'}, 'delete': []},
+    }
+
+
+def test_diff_table_replaced():
+    wanted = {'Loopback0': {'vrf_name': 'default'}, 'Loopback1': {'vrf_name': 'default'}}
+    patch = diff_table(wanted, TABLE, 'replaced')
+    assert patch == {'Loopback0': {'set': {}, 'delete': ['nat_zone']}}
+
+
+def test_diff_table_overridden():
+    patch = diff_table({'Loopback1': {'vrf_name': 'default'}}, TABLE, 'overridden')
+    assert patch == {'Loopback0': None}
+
+
+def test_diff_table_deleted():
+    patch = diff_table({'Loopback0': {'nat_zone': None}, 'Loopback1': {}, 'Loopback9': {}}, TABLE, 'deleted')
+    assert patch == {'Loopback0': {'set': {}, 'delete': ['nat_zone']}, 'Loopback1': None}
+    assert diff_table({}, TABLE, 'deleted') == {'Loopback0': None, 'Loopback1': None}
+
+
+def test_compare_entries_normalized():
+    # vlanid is built as an int while the config db returns strings
+    assert not compare_entries({'vlanid': 10}, {'vlanid': '10'}, 'VLAN')
+    # the order of the DHCP servers doesn't matter
+    new = {'vlanid': '10', 'dhcp_servers': ['10.1.0.3', '10.1.0.2']}
+    cur = {'vlanid': '10', 'dhcp_servers': ['10.1.0.2', '10.1.0.3']}
+    assert not compare_entries(new, cur, 'VLAN')
+    assert compare_entries(new, {'vlanid': '10', 'dhcp_servers': ['10.1.0.2']}, 'VLAN')
+
+
+def test_diff_table_defaults():
+    current = {'Ethernet0': {'speed': '40000', 'admin_status': 'down', 'fec': 'rs'}}
+    patch = diff_table({'Ethernet0': {'speed': 40000}}, current, 'replaced', 'PORT')
+    assert patch == {'Ethernet0': {'set': {}, 'delete': ['fec']}}
+    patch = diff_table({'Ethernet0': {'speed': '40000', 'admin_status': 'down', 'fec': 'none'}},
+                       {'Ethernet0': {'speed': '40000'}}, 'replaced', 'PORT')
+    assert patch == {}
+
+
+def test_diff_table_absent():
+    patch = diff_table({'Vlan10': None, 'Vlan20': None}, {'Vlan10': {'vlanid': '10'}}, 'replaced', 'VLAN')
+    assert patch == {'Vlan10': None}
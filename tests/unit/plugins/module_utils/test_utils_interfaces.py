@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils import interfaces
+from ansible_collections.community.sonic.plugins.module_utils.configdb import ConfigDBSession
+from ansible_collections.community.sonic.plugins.module_utils.interfaces import (
+    InterfaceIndex, NoSuchInterfaceError, interfaces_fingerprint, load_interfaces, resolve_interface)
+
+PORT_TABLE = {
+    'Ethernet0': {'alias': 'Eth1/1', 'index': '1', 'lanes': '0,1'},
+    'Ethernet2': {'alias': 'Eth1/2', 'index': '1', 'lanes': '2,3'},
+    'Ethernet8': {'alias': 'Eth2', 'index': '2', 'lanes': '8,9,10,11'},
+    # An alias that is the name of another port resolves to that port
+    'Ethernet12': {'alias': 'Ethernet8', 'index': '3', 'lanes': '12,13,14,15'},
+}
+PORTCHANNEL_TABLE = {'PortChannel0001': {'mtu': '9100'}}
+
+
+def session(swss):
+    config_db = swss.ConfigDBConnector()
+    config_db.connect()
+    return ConfigDBSession(config_db)
+
+
+def test_interface_index():
+    index = InterfaceIndex.from_tables(PORT_TABLE, PORTCHANNEL_TABLE)
+    assert index.resolve('Eth1/2') == 'Ethernet2'
+    assert index.resolve('Ethernet8') == 'Ethernet8'
+    assert index.resolve('PortChannel0001') == 'PortChannel0001'
+    assert index.get('Eth9') is None
+    with pytest.raises(NoSuchInterfaceError, match='Eth9'):
+        index.resolve('Eth9')
+    assert index.is_port('Ethernet0') and not index.is_port('PortChannel0001')
+    assert index.is_portchannel('PortChannel0001')
+    assert index.port_of_lane(3) == 'Ethernet2'
+    assert index.ports_of_index(1) == ['Ethernet0', 'Ethernet2']
+    assert index.breakout_siblings('Eth1/1') == ['Ethernet0', 'Ethernet2']
+    assert index.breakout_siblings('PortChannel0001') == ['PortChannel0001']
+
+    copy = InterfaceIndex.from_dict(index.to_dict())
+    assert copy.resolve('Eth1/2') == 'Ethernet2'
+    assert copy.breakout_siblings('Ethernet2') == ['Ethernet0', 'Ethernet2']
+
+
+def test_interfaces_fingerprint():
+    metadata = {'hwsku': 'Force10-S6000', 'platform': 'x86_64-kvm_x86_64-r0'}
+    fingerprint = interfaces_fingerprint(['Ethernet4', 'Ethernet0'], [], metadata)
+    assert fingerprint == interfaces_fingerprint(['Ethernet0', 'Ethernet4'], [], dict(metadata, hostname='sw1'))
+    assert fingerprint != interfaces_fingerprint(['Ethernet0'], [], metadata)
+    assert fingerprint != interfaces_fingerprint(['Ethernet0', 'Ethernet4'], [], dict(metadata, hwsku='other'))
+
+
+def test_load_interfaces(swss):
+    swss.load({
+        'PORT': PORT_TABLE,
+        'PORTCHANNEL': PORTCHANNEL_TABLE,
+        'DEVICE_METADATA': {'localhost': {'hwsku': 'Force10-S6000'}},
+    })
+    index = load_interfaces(session(swss))
+    assert index.resolve('Eth2') == 'Ethernet8'
+    cold = swss.round_trips()
+
+    # The next run only reads the keys and the metadata
+    swss.reset()
+    index = load_interfaces(session(swss))
+    assert index.resolve('Eth2') == 'Ethernet8'
+    assert swss.round_trips() == 3 < cold
+
+    # A breakout changes the port names and the cache is rebuilt
+    swss.load({'PORT': {'Ethernet10': {'alias': 'Eth2/2', 'index': '2', 'lanes': '10,11'}}})
+    index = load_interfaces(session(swss))
+    assert index.resolve('Eth2/2') == 'Ethernet10'
+
+
+def test_resolve_interface(swss):
+    swss.load({'PORT': PORT_TABLE, 'PORTCHANNEL': PORTCHANNEL_TABLE})
+    assert resolve_interface(session(swss), 'Ethernet8') == 'Ethernet8'
+    assert swss.round_trips() == 1
+    assert resolve_interface(session(swss), 'PortChannel0001') == 'PortChannel0001'
+    assert resolve_interface(session(swss), 'Eth1/2') == 'Ethernet2'
+    with pytest.raises(NoSuchInterfaceError):
+        resolve_interface(session(swss), 'Eth9')
+
+
+def test_load_interfaces_session_tables(swss, monkeypatch):
+    swss.load({'PORT': PORT_TABLE})
+    config_db = swss.ConfigDBConnector()
+    config_db.connect()
+    snapshot_session = ConfigDBSession(config_db, snapshot={'PORT': PORT_TABLE, 'PORTCHANNEL': {}})
+    monkeypatch.setattr(interfaces, 'read_cache', None)
+    assert load_interfaces(snapshot_session).resolve('Eth1/1') == 'Ethernet0'
+    assert swss.round_trips() == 0
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils import namespaces
+from ansible_collections.community.sonic.plugins.module_utils.namespaces import get_namespaces
+from ansible_collections.community.sonic.plugins.modules import config_table, get_entry, sonic_facts, sonic_interface_port, vlan_member
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+
+@pytest.fixture
+def asics(swss, monkeypatch, tmp_path):
+    """A switch with two ASICs, Ethernet0 is on asic0 and Ethernet8 on asic1"""
+    path = tmp_path / 'database_global.json'
+    path.write_text(json.dumps({'INCLUDES': [
+        {'include': '../../redis/sonic-db/database_config.json'},
+        {'namespace': 'asic1', 'include': '../../redis1/sonic-db/database_config.json'},
+        {'namespace': 'asic0', 'include': '../../redis0/sonic-db/database_config.json'},
+    ]}))
+    monkeypatch.setattr(namespaces, 'DATABASE_GLOBAL_CONFIG', str(path))
+    swss.load({'PORT': {'Ethernet0': {'alias': 'Eth1/1', 'speed': '100000'}}}, namespace='asic0')
+    swss.load({'PORT': {'Ethernet8': {'alias': 'Eth2/1', 'speed': '100000'}}}, namespace='asic1')
+    return swss
+
+
+def test_get_namespaces(asics, monkeypatch, tmp_path):
+    assert get_namespaces() == ['', 'asic0', 'asic1']
+    monkeypatch.setattr(namespaces, 'DATABASE_GLOBAL_CONFIG', str(tmp_path / 'missing.json'))
+    assert get_namespaces() == ['']
+
+
+def test_namespace(asics):
+    result = run_module(config_table, dict(table='VLAN', entries={'Vlan10': {'vlanid': 10}}, namespace='asic1'))
+    assert result['changed']
+    assert asics.dump(namespace='asic1') == {
+        'PORT': {'Ethernet8': {'alias': 'Eth2/1', 'speed': '100000'}},
+        'VLAN': {'Vlan10': {'vlanid': '10'}},
+    }
+    assert 'VLAN' not in asics.dump()
+    assert 'VLAN' not in asics.dump(namespace='asic0')
+
+
+def test_all_namespaces(asics):
+    result = run_module(config_table, dict(table='VLAN', entries={'Vlan10': {'vlanid': 10}}, all_namespaces=True))
+    assert result['changed']
+    assert sorted(result['namespaces']) == ['', 'asic0', 'asic1']
+    assert [d['before_header'] for d in result['diff']] == ['host', 'asic0', 'asic1']
+    for ns in ('', 'asic0', 'asic1'):
+        assert asics.dump(namespace=ns)['VLAN'] == {'Vlan10': {'vlanid': '10'}}
+
+    asics.load({'VLAN': {'Vlan10': {'vlanid': '10'}}}, namespace='asic1')
+    result = run_module(config_table, dict(table='VLAN', entries={'Vlan10': {'vlanid': 10}}, all_namespaces=True))
+    assert not result['changed']
+
+
+def test_all_namespaces_read(asics):
+    result = run_module(get_entry, dict(table='PORT', all_namespaces=True))
+    assert result['namespaces']['']['value'] == {}
+    assert result['namespaces']['asic0']['value'] == {'Ethernet0': {'alias': 'Eth1/1', 'speed': '100000'}}
+    assert list(result['namespaces']['asic1']['value']) == ['Ethernet8']
+
+
+def test_all_namespaces_facts(asics):
+    asics.load({'DEVICE_METADATA': {'localhost': {'hostname': 'switch1'}}})
+    result = run_module(sonic_facts, dict(gather_subset=['ports'], all_namespaces=True))
+    assert not result['changed']
+    facts = result['ansible_facts']
+    assert facts['sonic_hostname'] == 'switch1'
+    assert sorted(facts['sonic_namespaces']) == ['', 'asic0', 'asic1']
+    assert facts['sonic_namespaces']['asic0']['sonic_config_db']['PORT'] == {'Ethernet0': {'alias': 'Eth1/1', 'speed': '100000'}}
+    assert list(facts['sonic_namespaces']['asic1']['sonic_config_db']['PORT']) == ['Ethernet8']
+    assert 'ansible_facts' not in result['namespaces']['asic0']
+
+
+def test_all_namespaces_exclusive(asics):
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(get_entry, dict(table='PORT', all_namespaces=True, namespace='asic0'))
+    assert 'mutually exclusive' in e.value.args[0]['msg']
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(config_table, dict(table='VLAN', all_namespaces=True, plan='/tmp/vlan.plan'))
+    assert e.value.args[0]['msg'] == 'plan can not be used with all_namespaces'
+
+
+def test_all_namespaces_ports(asics):
+    result = run_module(sonic_interface_port, dict(
+        ports=[dict(interface='Eth1/1', description='uplink'), dict(interface='Ethernet8', enabled=True)],
+        all_namespaces=True))
+    assert result['changed']
+    assert not result['namespaces']['']['changed']
+    assert list(result['namespaces']['asic0']['results']) == ['Ethernet0']
+    assert list(result['namespaces']['asic1']['results']) == ['Ethernet8']
+    assert asics.dump(namespace='asic0')['PORT']['Ethernet0']['description'] == 'uplink'
+    assert asics.dump(namespace='asic1')['PORT']['Ethernet8']['admin_status'] == 'up'
+
+    result = run_module(sonic_interface_port, dict(interface='Ethernet8', speed='40G', all_namespaces=True))
+    assert result['namespaces']['asic1']['changed']
+    assert asics.dump(namespace='asic1')['PORT']['Ethernet8']['speed'] == '40000'
+
+
+def test_all_namespaces_missing_interface(asics):
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(sonic_interface_port, dict(ports=[dict(interface='Ethernet0', enabled=True), dict(interface='Ethernet4', enabled=True)],
+                                              all_namespaces=True))
+    assert e.value.args[0]['msg'] == 'could not find interface Ethernet4 in any namespace'
+    # The other runs are not undone
+    assert asics.dump(namespace='asic0')['PORT']['Ethernet0']['admin_status'] == 'up'
+
+
+def test_all_namespaces_vlan_members(asics):
+    for ns in ('asic0', 'asic1'):
+        asics.load({'VLAN': {'Vlan10': {'vlanid': '10'}}}, namespace=ns)
+    result = run_module(vlan_member, dict(members=[dict(vlanid='10', interfaces=['Eth1/1', 'Ethernet8'], tagged=True)],
+                                          all_namespaces=True))
+    assert result['namespaces']['asic0']['added'] == ['Vlan10|Ethernet0']
+    assert result['namespaces']['asic1']['added'] == ['Vlan10|Ethernet8']
+    assert list(asics.dump(namespace='asic1')['VLAN_MEMBER']) == ['Vlan10|Ethernet8']
+
+    result = run_module(vlan_member, dict(vlanid=10, interface='Ethernet8', state='absent', all_namespaces=True))
+    assert result['namespaces']['asic1']['changed']
+    assert 'VLAN_MEMBER' not in asics.dump(namespace='asic1')
+
+
+def test_all_namespaces_failure(asics):
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(vlan_member, dict(vlanid=10, interface='Ethernet0', tagged=True, all_namespaces=True, wait=True, wait_timeout=0))
+    result = e.value.args[0]
+    assert result['msg'] == (
+        'failed in namespace asic0: timed out after 0 seconds waiting for STATE_DB VLAN_MEMBER_TABLE Vlan10|Ethernet0')
+    assert result['namespaces']['asic0']['pending'] == ['Vlan10|Ethernet0']
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils.patch import (
+    PatchError, apply_json_patch, apply_merge_patch, check_document, merge_patch_keys, order_changes, parse_pointer,
+    patch_keys, table_level)
+
+DOCUMENT = {
+    'VLAN': {'Vlan10': {'vlanid': '10', 'dhcp_servers': ['10.0.0.1']}},
+    'VLAN_MEMBER': {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}},
+}
+
+
+def test_parse_pointer():
+    assert parse_pointer('/INTERFACE/Ethernet0|10.0.0.0~131/x~0y') == ['INTERFACE', 'Ethernet0|10.0.0.0/31', 'x~y']
+    assert parse_pointer('') == []
+    with pytest.raises(PatchError):
+        parse_pointer('VLAN')
+
+
+def test_patch_keys():
+    keys = patch_keys([
+        {'op': 'remove', 'path': '/VLAN_MEMBER/Vlan10|Ethernet0'},
+        {'op': 'move', 'from': '/VLAN/Vlan10', 'path': '/VLAN/Vlan20'},
+        {'op': 'copy', 'from': '/PORT/Ethernet0', 'path': '/PORT/Ethernet4/mtu'},
+        {'op': 'remove', 'path': '/ACL_RULE'},
+        {'op': 'add', 'path': '/ACL_RULE/DATAACL|RULE_1', 'value': {}},
+    ])
+    assert keys == {'VLAN_MEMBER': {'Vlan10|Ethernet0'}, 'VLAN': {'Vlan10', 'Vlan20'}, 'PORT': {'Ethernet0', 'Ethernet4'},
+                    'ACL_RULE': None}
+    assert list(keys) == ['VLAN_MEMBER', 'VLAN', 'PORT', 'ACL_RULE']
+    with pytest.raises(PatchError):
+        patch_keys([{'op': 'add', 'path': '', 'value': {}}])
+
+
+def test_merge_patch_keys():
+    assert merge_patch_keys({'VLAN': {'Vlan10': None, 'Vlan20': {'vlanid': 20}}, 'ACL_RULE': None}) == {
+        'VLAN': {'Vlan10', 'Vlan20'}, 'ACL_RULE': None}
+
+
+def test_apply_json_patch():
+    document = apply_json_patch(DOCUMENT, [
+        {'op': 'test', 'path': '/VLAN/Vlan10/vlanid', 'value': 10},
+        {'op': 'add', 'path': '/VLAN/Vlan10/dhcp_servers/-', 'value': '10.0.0.2'},
+        {'op': 'add', 'path': '/VLAN/Vlan10/dhcp_servers/0', 'value': '10.0.0.0'},
+        {'op': 'replace', 'path': '/VLAN_MEMBER/Vlan10|Ethernet0/tagging_mode', 'value': 'untagged'},
+        {'op': 'copy', 'from': '/VLAN_MEMBER/Vlan10|Ethernet0', 'path': '/VLAN_MEMBER/Vlan10|Ethernet4'},
+        {'op': 'move', 'from': '/VLAN_MEMBER/Vlan10|Ethernet0', 'path': '/VLAN_MEMBER/Vlan10|Ethernet8'},
+        {'op': 'remove', 'path': '/VLAN/Vlan10/dhcp_servers/1'},
+    ])
+    assert document == {
+        'VLAN': {'Vlan10': {'vlanid': '10', 'dhcp_servers': ['10.0.0.0', '10.0.0.2']}},
+        'VLAN_MEMBER': {
+            'Vlan10|Ethernet4': {'tagging_mode': 'untagged'},
+            'Vlan10|Ethernet8': {'tagging_mode': 'untagged'},
+        },
+    }
+    assert DOCUMENT['VLAN_MEMBER'] == {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}}
+
+
+@pytest.mark.parametrize('operation, msg', [
+    ({'op': 'test', 'path': '/VLAN/Vlan10/vlanid', 'value': 20}, 'test failed'),
+    ({'op': 'remove', 'path': '/VLAN/Vlan20'}, 'path not found'),
+    ({'op': 'replace', 'path': '/VLAN/Vlan10/mtu', 'value': 9100}, 'path not found'),
+    ({'op': 'add', 'path': '/VLAN/Vlan20/vlanid', 'value': 20}, 'path not found'),
+    ({'op': 'add', 'path': '/VLAN/Vlan10/dhcp_servers/2', 'value': '10.0.0.3'}, 'out of range'),
+    ({'op': 'add', 'path': '/VLAN/Vlan10'}, 'value is required'),
+    ({'op': 'move', 'from': '/VLAN/Vlan10', 'path': '/VLAN/Vlan10/x'}, 'into itself'),
+    ({'op': 'merge', 'path': '/VLAN/Vlan10'}, 'unsupported operation'),
+])
+def test_apply_json_patch_errors(operation, msg):
+    with pytest.raises(PatchError, match=msg):
+        apply_json_patch(DOCUMENT, [operation])
+
+
+def test_apply_merge_patch():
+    document = apply_merge_patch(DOCUMENT, {
+        'VLAN': {'Vlan10': {'dhcp_servers': None, 'mtu': 9100}, 'Vlan20': {'vlanid': 20}},
+        'VLAN_MEMBER': None,
+    })
+    assert document == {'VLAN': {'Vlan10': {'vlanid': '10', 'mtu': 9100}, 'Vlan20': {'vlanid': 20}}}
+
+
+def test_check_document():
+    check_document({'VLAN': {'Vlan10': {'vlanid': 10, 'dhcp_servers': ['10.0.0.1']}}})
+    with pytest.raises(PatchError):
+        check_document({'VLAN': {'Vlan10': 'x'}})
+    with pytest.raises(PatchError):
+        check_document({'VLAN': {'Vlan10': {'vlanid': {'a': 'b'}}}})
+
+
+def test_table_level():
+    assert table_level('VLAN') == 0
+    assert table_level('VLAN_MEMBER') == 1
+    assert table_level('ACL_RULE') == 2
+    assert table_level('UNKNOWN') == 0
+
+
+def test_order_changes():
+    batches = order_changes({
+        'VLAN': {'Vlan10': None, 'Vlan20': {'set': {'vlanid': '20'}, 'delete': []}},
+        'VLAN_MEMBER': {'Vlan10|Ethernet0': None, 'Vlan20|Ethernet0': {'set': {'tagging_mode': 'tagged'}, 'delete': []}},
+        'VLAN_INTERFACE': {
+            'Vlan10': None,
+            'Vlan10|10.1.0.1/24': None,
+            'Vlan20': {'set': {'NULL': 'NULL'}, 'delete': []},
+        },
+        'VRF': {'Vrf1': {'set': {'NULL': 'NULL'}, 'delete': ['fallback']}},
+    })
+    assert batches == [
+        {'VLAN_MEMBER': {'Vlan10|Ethernet0': None}, 'VLAN_INTERFACE': {'Vlan10|10.1.0.1/24': None}},
+        {'VLAN_INTERFACE': {'Vlan10': None}},
+        {'VLAN': {'Vlan10': None}, 'VRF': {'Vrf1': {'set': {}, 'delete': ['fallback']}}},
+        {'VLAN': {'Vlan20': {'set': {'vlanid': '20'}, 'delete': []}}},
+        {'VLAN_INTERFACE': {'Vlan20': {'set': {'NULL': 'NULL'}, 'delete': []}}},
+        {'VLAN_MEMBER': {'Vlan20|Ethernet0': {'set': {'tagging_mode': 'tagged'}, 'delete': []}}},
+    ]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils.ranges import expand_interface_range, expand_range
+
+
+def test_expand_range():
+    assert expand_range('300,100-103') == [100, 101, 102, 103, 300]
+    assert expand_range(42) == [42]
+
+
+def test_expand_range_overlapping():
+    assert expand_range('1-3,2-4') == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('spec', ('', 'falafel', '10-5', '1-', '0-3', '4090-4095'))
+def test_expand_range_invalid(spec):
+    with pytest.raises(ValueError):
+        expand_range(spec, lower=1, upper=4094)
+
+
+def test_expand_interface_range():
+    assert expand_interface_range('Ethernet0-12/4') == ['Ethernet0', 'Ethernet4', 'Ethernet8', 'Ethernet12']
+    assert expand_interface_range('PortChannel1-2') == ['PortChannel1', 'PortChannel2']
+
+
+def test_expand_interface_range_zero_padding():
+    assert expand_interface_range('PortChannel0001-0004') == [
+        'PortChannel0001', 'PortChannel0002', 'PortChannel0003', 'PortChannel0004']
+    assert expand_interface_range('PortChannel0998-1000/2') == ['PortChannel0998', 'PortChannel1000']
+
+
+def test_expand_interface_range_plain_names():
+    assert expand_interface_range('Ethernet4') == ['Ethernet4']
+    assert expand_interface_range('fortyGigE0/24') == ['fortyGigE0/24']
+
+
+def test_expand_interface_range_invalid():
+    with pytest.raises(ValueError):
+        expand_interface_range('Ethernet8-0')
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import threading
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils import wait
+from ansible_collections.community.sonic.plugins.module_utils.configdb import use_connector_factory
+from ansible_collections.community.sonic.plugins.module_utils.wait import entry_matches, state_entries
+from ansible_collections.community.sonic.plugins.modules import vlan, vlan_member
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+
+def vlanmgrd(swss, entries, delay=0.05):
+    """Set the STATE_DB entries after a delay, like vlanmgrd does after creating the VLANs"""
+    timer = threading.Timer(delay, swss.load, args=({'VLAN_TABLE': entries}, 'STATE_DB'))
+    timer.start()
+    return timer
+
+
+def test_entry_matches():
+    assert entry_matches({'state': 'ok', 'mtu': '9100'}, {'state': 'ok'})
+    assert not entry_matches({'state': 'down'}, {'state': 'ok'})
+    assert not entry_matches({}, {'state': 'ok'})
+    assert entry_matches({}, None)
+    assert not entry_matches({'state': 'ok'}, None)
+
+
+def test_state_entries():
+    patch = {'Vlan10': {'set': {'vlanid': '10'}, 'delete': []}, 'Vlan20': None}
+    assert state_entries(patch) == {'Vlan10': {'state': 'ok'}, 'Vlan20': None}
+
+
+def test_wait_notifications(swss):
+    timer = vlanmgrd(swss, {'Vlan10': {'state': 'ok'}})
+    result = run_module(vlan, dict(vlanid=10, wait=True))
+    timer.join()
+    assert result['changed']
+    assert result['waited'] >= 0.04
+
+
+def test_wait_polling(swss, monkeypatch):
+    monkeypatch.setattr(wait, 'POLL_INTERVAL', 0.01)
+
+    def factory(db_name):
+        connector = swss.ConfigDBConnector()
+        connector.db_connect(db_name)
+        return connector
+
+    timer = vlanmgrd(swss, {'Vlan10': {'state': 'ok'}})
+    with use_connector_factory(factory):
+        result = run_module(vlan, dict(vlanid=10, wait=True))
+    timer.join()
+    assert result['waited'] >= 0.04
+
+
+def test_wait_removed(swss):
+    swss.load({'VLAN': {'Vlan10': {'vlanid': '10'}}})
+    result = run_module(vlan, dict(vlanid=10, state='absent', wait=True))
+    assert result['changed']
+    assert 'waited' in result
+
+
+def test_wait_timeout(swss):
+    swss.load({'VLAN': {'Vlan10': {'vlanid': '10'}}, 'PORT': {'Ethernet0': {'speed': '100000'}}})
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(vlan_member, dict(vlanid=10, interface='Ethernet0', tagged=True, wait=True, wait_timeout=0))
+    assert e.value.args[0]['pending'] == ['Vlan10|Ethernet0']
+    assert 'Vlan10|Ethernet0' in swss.dump()['VLAN_MEMBER']
+
+
+def test_no_wait_without_changes(swss):
+    result = run_module(vlan, dict(vlanid=10, wait=True, wait_timeout=0), check_mode=True)
+    assert result['changed']
+    assert 'waited' not in result
+    result = run_module(vlan_member, dict(vlanid=10, interface='Ethernet0', state='absent', wait=True, wait_timeout=0))
+    assert not result['changed']
+    assert 'waited' not in result
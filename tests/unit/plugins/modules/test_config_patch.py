@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.modules import config_patch
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+TABLES = {
+    'VLAN': {'Vlan10': {'vlanid': '10'}},
+    'VLAN_MEMBER': {('Vlan10', 'Ethernet0'): {'tagging_mode': 'tagged'}},
+    'VLAN_INTERFACE': {'Vlan10': {}, ('Vlan10', '10.1.0.1/24'): {}},
+    'PORT': {'Ethernet0': {'speed': '100000', 'mtu': '1500'}},
+}
+
+REMOVE_VLAN = [
+    {'op': 'remove', 'path': '/VLAN/Vlan10'},
+    {'op': 'remove', 'path': '/VLAN_INTERFACE/Vlan10'},
+    {'op': 'remove', 'path': '/VLAN_INTERFACE/Vlan10|10.1.0.1~124'},
+    {'op': 'remove', 'path': '/VLAN_MEMBER/Vlan10|Ethernet0'},
+]
+
+
+def test_build_changes():
+    current = {'VLAN': {'Vlan10': {'vlanid': '10'}, 'Vlan20': {'vlanid': '20'}}}
+    wanted = {'VLAN': {'Vlan10': {'vlanid': 10, 'mtu': 9100}}}
+    assert config_patch.build_changes(wanted, current) == {
+        'VLAN': {'Vlan10': {'set': {'mtu': '9100'}, 'delete': []}, 'Vlan20': None},
+    }
+    assert config_patch.build_changes(current, current) == {}
+
+
+def test_run_module_patch(swss):
+    swss.load(TABLES)
+    result = run_module(config_patch, dict(patch=REMOVE_VLAN))
+    assert result['changed'] is True
+    assert result['batches'] == [
+        ['VLAN_INTERFACE|Vlan10|10.1.0.1/24', 'VLAN_MEMBER|Vlan10|Ethernet0'],
+        ['VLAN_INTERFACE|Vlan10'],
+        ['VLAN|Vlan10'],
+    ]
+    assert swss.dump() == {'PORT': {'Ethernet0': {'speed': '100000', 'mtu': '1500'}}}
+    # One pipelined read of the keys of the patch, and one transaction per batch
+    assert swss.round_trips() == 1 + 3
+
+    # The VLAN is gone, so the patch can't be applied again
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(config_patch, dict(patch=REMOVE_VLAN))
+    assert 'path not found' in e.value.args[0]['msg']
+
+
+def test_run_module_patch_test_failed(swss):
+    swss.load(TABLES)
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(config_patch, dict(patch=[
+            {'op': 'replace', 'path': '/PORT/Ethernet0/mtu', 'value': 9100},
+            {'op': 'test', 'path': '/PORT/Ethernet0/speed', 'value': 40000},
+        ]))
+    assert 'test failed' in e.value.args[0]['msg']
+    assert swss.dump()['PORT']['Ethernet0']['mtu'] == '1500'
+
+
+def test_run_module_config(swss):
+    swss.load(TABLES)
+    config = {
+        'VLAN': {'Vlan20': {'vlanid': 20}},
+        'VLAN_INTERFACE': {'Vlan20': {}, 'Vlan20|10.2.0.1/24': {}},
+        'VLAN_MEMBER': {'Vlan20|Ethernet0': {'tagging_mode': 'untagged'}, 'Vlan10|Ethernet0': None},
+        'PORT': {'Ethernet0': {'mtu': 9100}},
+    }
+    result = run_module(config_patch, dict(config=config), check_mode=True, diff=True)
+    assert result['changed'] is True
+    assert result['diff']['after']['PORT'] == {'Ethernet0': {'speed': '100000', 'mtu': '9100'}}
+    assert swss.dump()['PORT']['Ethernet0']['mtu'] == '1500'
+
+    result = run_module(config_patch, dict(config=config))
+    assert result['batches'] == [
+        ['VLAN_MEMBER|Vlan10|Ethernet0'],
+        ['VLAN|Vlan20', 'PORT|Ethernet0'],
+        ['VLAN_INTERFACE|Vlan20'],
+        ['VLAN_INTERFACE|Vlan20|10.2.0.1/24', 'VLAN_MEMBER|Vlan20|Ethernet0'],
+    ]
+    data = swss.dump()
+    assert data['VLAN'] == {'Vlan10': {'vlanid': '10'}, 'Vlan20': {'vlanid': '20'}}
+    assert data['VLAN_MEMBER'] == {'Vlan20|Ethernet0': {'tagging_mode': 'untagged'}}
+    assert sorted(data['VLAN_INTERFACE']) == ['Vlan10', 'Vlan10|10.1.0.1/24', 'Vlan20', 'Vlan20|10.2.0.1/24']
+
+    result = run_module(config_patch, dict(config=config))
+    assert result['changed'] is False
+    assert result['batches'] == []
+
+
+def test_run_module_whole_table(swss):
+    swss.load(TABLES)
+    swss.reset()
+    result = run_module(config_patch, dict(patch=[
+        {'op': 'remove', 'path': '/VLAN_INTERFACE'},
+        {'op': 'replace', 'path': '/PORT/Ethernet0/mtu', 'value': 9100},
+    ]))
+    assert result['changes'] == {
+        'VLAN_INTERFACE': {'Vlan10': None, 'Vlan10|10.1.0.1/24': None},
+        'PORT': {'Ethernet0': {'set': {'mtu': '9100'}, 'delete': []}},
+    }
+    # The removed table is read with get_table, KEYS and one HGETALL per key, and Ethernet0
+    # on its own, then the three batches are written
+    assert swss.round_trips() == 3 + 1 + 3
+    assert swss.dump()['PORT']['Ethernet0']['mtu'] == '9100'
+    assert 'VLAN_INTERFACE' not in swss.dump()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.sonic.plugins.modules import config_table
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import run_module
+
+
+def test_build_table_entries():
+    wanted = config_table.build_table_entries({
+        '10.0.0.1': {'asn': 65100, 'admin_status': True},
+        'Vlan10': {'dhcp_servers': ['10.1.0.2']},
+        'Loopback0': None,
+    }, 'merged')
+    assert wanted['10.0.0.1'] == {'asn': '65100', 'admin_status': 'true'}
+    assert wanted['Vlan10'] == {'dhcp_servers': ['10.1.0.2']}
+    assert wanted['Loopback0'] == {}
+
+
+def test_build_table_entries_deleted():
+    wanted = config_table.build_table_entries({'Ethernet0': {'description': None}}, 'deleted')
+    assert wanted == {'Ethernet0': {'description': None}}
+
+
+def test_build_diff():
+    current = {
+        'Ethernet0': {'speed': '40000', 'description': 'foo'},
+        'Ethernet4': {'speed': '40000'},
+    }
+    patch = {
+        'Ethernet0': {'set': {'speed': '100000'}, 'delete': ['description']},
+        'Ethernet4': None,
+    }
+    diff = config_table.build_diff(patch, current)
+    assert diff['before'] == current
+    assert diff['after'] == {'Ethernet0': {'speed': '100000'}}
+
+
+def test_run_module(swss):
+    swss.load({'LOOPBACK_INTERFACE': {'Loopback0': {}, ('Loopback0', '10.1.0.1/32'): {}, 'Loopback9': {}}})
+    entries = {'Loopback0': {}, 'Loopback0|10.1.0.1/32': {}, 'Loopback1': {}}
+    result = run_module(config_table, dict(table='LOOPBACK_INTERFACE', entries=entries, state='overridden'))
+    assert result['changes'] == {'Loopback1': {'set': {'NULL': 'NULL'}, 'delete': []}, 'Loopback9': None}
+    assert swss.store().data['LOOPBACK_INTERFACE|Loopback1'] == {'NULL': 'NULL'}
+    assert sorted(swss.dump()['LOOPBACK_INTERFACE']) == sorted(entries)
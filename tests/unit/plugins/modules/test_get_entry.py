@@ -4,7 +4,10 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+from ansible_collections.community.sonic.plugins.module_utils import configdb
+from ansible_collections.community.sonic.plugins.module_utils.entries import fix_keys
 from ansible_collections.community.sonic.plugins.modules import get_entry
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import run_module
 
 
 def test_fix_keys():
@@ -12,7 +15,90 @@ def test_fix_keys():
         'not_tuple': 'falafel',
         ('is', 'tuple'): 'tahini',
     }
-    new_dict = get_entry.fix_keys(test_dict)
+    new_dict = fix_keys(test_dict)
     assert new_dict.get('not_tuple') == 'falafel'
     assert new_dict.get('is|tuple') == 'tahini'
     assert ('is', 'tuple') not in new_dict
+
+
+def test_run_module_joined_keys(swss, monkeypatch):
+    swss.load({'VLAN_MEMBER': {('Vlan10', 'Ethernet0'): {'tagging_mode': 'tagged'}}})
+    calls = list()
+
+    def counting_fix_keys(value):
+        calls.append(value)
+        return fix_keys(value)
+    monkeypatch.setattr(configdb, 'fix_keys', counting_fix_keys)
+    monkeypatch.setattr(get_entry, 'fix_keys', counting_fix_keys, raising=False)
+    result = run_module(get_entry, dict(table='VLAN_MEMBER'))
+    assert result['value'] == {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}}
+    # The session joins the keys, the module doesn't copy the table again
+    assert len(calls) == 1
+
+
+def test_project_fields():
+    entry = {'PRIORITY': '10', 'PACKET_ACTION': 'DROP', 'SRC_IP': '10.0.0.1/32'}
+    assert get_entry.project_fields(entry, ['PRIORITY', 'DST_IP']) == {'PRIORITY': '10'}
+    assert get_entry.project_fields(entry, None) is entry
+
+
+def test_export_entries(tmp_path):
+    import gzip
+    import json
+
+    entries = iter([('Ethernet0', {'speed': '100000', 'mtu': '9100'}), ('Ethernet4', {'speed': '40000'})])
+    dest = str(tmp_path / 'port.jsonl.gz')
+    assert get_entry.export_entries(entries, dest, compress=True, fields=['speed']) == (2, True)
+    with gzip.open(dest, 'rt') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines == [
+        {'key': 'Ethernet0', 'value': {'speed': '100000'}},
+        {'key': 'Ethernet4', 'value': {'speed': '40000'}},
+    ]
+    assert [p.name for p in tmp_path.iterdir()] == ['port.jsonl.gz']
+
+
+def test_run_module_dest(swss, tmp_path):
+    swss.load({'PORT': {'Ethernet0': {'speed': '100000'}, 'Ethernet4': {'speed': '40000'}}})
+    dest = str(tmp_path / 'port.jsonl.gz')
+    result = run_module(get_entry, dict(table='PORT', dest=dest, compress=True), check_mode=True)
+    assert not result['changed']
+    assert not (tmp_path / 'port.jsonl.gz').exists()
+
+    result = run_module(get_entry, dict(table='PORT', dest=dest, compress=True))
+    assert result['changed']
+    assert result['count'] == 2
+    # The same entries are exported to the same bytes
+    result = run_module(get_entry, dict(table='PORT', dest=dest, compress=True))
+    assert not result['changed']
+    assert [p.name for p in tmp_path.iterdir()] == ['port.jsonl.gz']
+
+
+def test_run_module(swss):
+    swss.load({'ACL_RULE': {
+        ('DATAACL', 'RULE_1'): {'PRIORITY': '1', 'PACKET_ACTION': 'DROP'},
+        ('DATAACL', 'RULE_2'): {'PRIORITY': '2', 'PACKET_ACTION': 'FORWARD'},
+        ('EVERFLOW', 'RULE_1'): {'PRIORITY': '1'},
+    }})
+    result = run_module(get_entry, dict(table='ACL_RULE', key_pattern='DATAACL|*', fields=['PRIORITY']))
+    assert result['value'] == {'DATAACL|RULE_1': {'PRIORITY': '1'}, 'DATAACL|RULE_2': {'PRIORITY': '2'}}
+    assert not result['changed']
+
+
+def test_if_none_match(swss):
+    swss.load({'VLAN': {'Vlan10': {'vlanid': '10'}}})
+    result = run_module(get_entry, dict(table='VLAN'))
+    assert 'not_modified' not in result
+    fingerprint = result['fingerprint']
+
+    result = run_module(get_entry, dict(table='VLAN', if_none_match=fingerprint))
+    assert result['not_modified']
+    assert 'value' not in result
+    # The same entries from another lookup have another fingerprint
+    assert run_module(get_entry, dict(table='VLAN', key='Vlan10'))['fingerprint'] != fingerprint
+
+    swss.load({'VLAN': {'Vlan20': {'vlanid': '20'}}})
+    result = run_module(get_entry, dict(table='VLAN', if_none_match=fingerprint))
+    assert not result['not_modified']
+    assert list(result['value']) == ['Vlan10', 'Vlan20']
+    assert result['fingerprint'] != fingerprint
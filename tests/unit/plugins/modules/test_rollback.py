@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils.configdb import checkpoint_path, read_checkpoint
+from ansible_collections.community.sonic.plugins.modules import config_table, rollback, sonic_interface_port, vlan, vlan_member
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+TABLES = {
+    'PORT': {
+        'Ethernet0': {'speed': '100000', 'mtu': '9100', 'description': 'uplink'},
+        'Ethernet4': {'speed': '100000'},
+    },
+    'VLAN': {'Vlan20': {'vlanid': '20'}},
+}
+
+
+def test_rollback(swss):
+    swss.load(TABLES)
+    run_module(vlan, dict(vlanid=10, checkpoint='c1'))
+    run_module(vlan_member, dict(vlanid=10, interface='Ethernet0', tagged=True, checkpoint='c1'))
+    run_module(sonic_interface_port, dict(interface='Ethernet0', description='', enabled=True, checkpoint='c1'))
+    run_module(vlan, dict(vlanid=20, state='absent', checkpoint='c1'))
+    assert read_checkpoint(checkpoint_path('c1')) == {
+        ('VLAN', 'Vlan10'): None,
+        ('VLAN_MEMBER', 'Vlan10|Ethernet0'): None,
+        ('PORT', 'Ethernet0'): {'speed': '100000', 'mtu': '9100', 'description': 'uplink'},
+        ('VLAN', 'Vlan20'): {'vlanid': '20'},
+    }
+
+    swss.reset()
+    result = run_module(rollback, dict(checkpoint='c1'), diff=True)
+    assert result['changed']
+    assert result['keys'] == 4
+    # Ethernet0 loses admin_status with the teardown and gets its description back with the buildup
+    assert result['batches'] == [
+        ['VLAN_MEMBER|Vlan10|Ethernet0'], ['VLAN|Vlan10', 'PORT|Ethernet0'], ['VLAN|Vlan20', 'PORT|Ethernet0']]
+    assert result['diff']['after']['VLAN'] == {'Vlan20': {'vlanid': '20'}}
+    assert swss.dump() == TABLES
+    assert not os.path.exists(checkpoint_path('c1'))
+    # Only the keys of the journal are read, one round trip each
+    assert swss.round_trips() < 4 + 2 * len(result['batches'])
+
+
+def test_rollback_first_value(swss):
+    swss.load(TABLES)
+    for mtu in (1500, 9000):
+        run_module(config_table, dict(table='PORT', entries={'Ethernet4': {'mtu': mtu}}, checkpoint='c1'))
+    assert swss.dump()['PORT']['Ethernet4'] == {'speed': '100000', 'mtu': '9000'}
+
+    result = run_module(rollback, dict(checkpoint='c1', keep=True))
+    assert result['changes'] == {'PORT': {'Ethernet4': {'set': {}, 'delete': ['mtu']}}}
+    assert swss.dump() == TABLES
+
+    result = run_module(rollback, dict(checkpoint='c1'))
+    assert not result['changed']
+    assert not os.path.exists(checkpoint_path('c1'))
+
+
+def test_rollback_check_mode(swss):
+    swss.load(TABLES)
+    run_module(vlan, dict(vlanid=10, checkpoint='c1'), check_mode=True)
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(rollback, dict(checkpoint='c1'))
+    assert e.value.args[0]['msg'] == 'checkpoint c1 does not exist'
+
+    # Without changes the checkpoint still exists, with an empty journal
+    run_module(vlan, dict(vlanid=20, checkpoint='c1'))
+    run_module(vlan, dict(vlanid=10, checkpoint='c1'))
+    result = run_module(rollback, dict(checkpoint='c1'), check_mode=True)
+    assert result['changes'] == {'VLAN': {'Vlan10': None}}
+    assert 'Vlan10' in swss.dump()['VLAN']
+    assert os.path.exists(checkpoint_path('c1'))
+
+
+def test_rollback_plan(swss, tmp_path):
+    swss.load(TABLES)
+    plan = str(tmp_path / 'vlan.plan')
+    run_module(vlan, dict(vlanid=10, plan=plan, checkpoint='c1'))
+    assert read_checkpoint(checkpoint_path('c1')) == {}
+    run_module(vlan, dict(vlanid=10, apply_plan=plan, checkpoint='c1'))
+    assert read_checkpoint(checkpoint_path('c1')) == {('VLAN', 'Vlan10'): None}
+
+
+def test_invalid_checkpoint(swss):
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(vlan, dict(vlanid=10, checkpoint='../c1'))
+    assert 'invalid checkpoint name' in e.value.args[0]['msg']
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(rollback, dict(checkpoint='../c1'))
+    assert 'invalid checkpoint name' in e.value.args[0]['msg']
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+
+from ansible_collections.community.sonic.plugins.module_utils.configdb import (
+    clear_dirty, dirty_marker_path, dirty_markers, mark_dirty)
+from ansible_collections.community.sonic.plugins.modules import save_config, vlan
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import run_module
+
+TABLES = {
+    'PORT': {'Ethernet0': {'speed': '100000', 'mtu': '9100'}},
+    'VLAN': {'Vlan20': {'vlanid': '20', 'dhcp_servers': ['10.0.0.1', '10.0.0.2']}},
+    'VLAN_INTERFACE': {'Vlan20': {}},
+}
+
+
+def test_default_path():
+    assert save_config.default_path() == '/etc/sonic/config_db.json'
+    assert save_config.default_path('asic1') == '/etc/sonic/config_db1.json'
+
+
+def test_changed_tables():
+    assert save_config.changed_tables(TABLES, None) == ['PORT', 'VLAN', 'VLAN_INTERFACE']
+    assert save_config.changed_tables(TABLES, dict(TABLES, VLAN={})) == ['VLAN']
+    assert save_config.changed_tables({'PORT': TABLES['PORT']}, TABLES) == ['VLAN', 'VLAN_INTERFACE']
+
+
+def test_dirty_markers(swss):
+    assert dirty_markers() == {}
+    mark_dirty()
+    markers = dirty_markers()
+    assert list(markers) == [dirty_marker_path()]
+    assert dirty_markers('asic0') == {}
+
+    # A write while saving leaves the marker
+    mark_dirty()
+    clear_dirty(markers)
+    assert os.path.exists(dirty_marker_path())
+    clear_dirty(dirty_markers())
+    assert dirty_markers() == {}
+
+
+def test_save_config(swss, tmp_path):
+    path = tmp_path / 'config_db.json'
+    path.write_text(json.dumps(TABLES))
+    path.chmod(0o644)
+    swss.load(TABLES)
+
+    run_module(vlan, dict(vlanid=10))
+    assert dirty_markers()
+    swss.reset()
+    result = run_module(save_config, dict(path=str(path)))
+    assert result['changed']
+    assert result['dirty']
+    assert result['tables'] == ['VLAN']
+    assert json.loads(path.read_text()) == dict(TABLES, VLAN=dict(TABLES['VLAN'], Vlan10={'vlanid': '10'}))
+    assert path.stat().st_mode & 0o777 == 0o644
+    assert dirty_markers() == {}
+
+    # Without writes the database isn't read
+    swss.reset()
+    result = run_module(save_config, dict(path=str(path)))
+    assert not result['changed']
+    assert not result['dirty']
+    assert swss.round_trips() == 0
+
+
+def test_save_config_unchanged(swss, tmp_path):
+    path = tmp_path / 'config_db.json'
+    path.write_text(json.dumps(TABLES, indent=4, sort_keys=True) + '\n')
+    swss.load(TABLES)
+    mtime = path.stat().st_mtime_ns
+
+    result = run_module(save_config, dict(path=str(path), force=True))
+    assert not result['changed']
+    assert result['tables'] == []
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_save_config_check_mode(swss, tmp_path):
+    path = tmp_path / 'config_db.json'
+    swss.load(TABLES)
+    mark_dirty()
+
+    result = run_module(save_config, dict(path=str(path)), check_mode=True)
+    assert result['changed']
+    assert not path.exists()
+    assert dirty_markers()
+
+    result = run_module(save_config, dict(path=str(path)))
+    assert result['changed']
+    assert json.loads(path.read_text()) == TABLES
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.modules import sonic_facts
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import run_module
+
+
+CONFIG = {
+    'DEVICE_METADATA': {
+        'localhost': {'hostname': 'sonic', 'platform': 'x86_64-kvm_x86_64-r0', 'hwsku': 'Force10-S6000'},
+    },
+    'PORT': {
+        'Ethernet10': {'alias': 'fortyGigE0/10', 'speed': '40000'},
+        'Ethernet2': {'alias': 'fortyGigE0/2', 'speed': '40000', 'admin_status': 'up'},
+    },
+    'VLAN': {
+        'Vlan100': {'vlanid': '100', 'dhcp_servers': ['10.1.0.2']},
+    },
+    'VLAN_MEMBER': {
+        'Vlan100|Ethernet2': {'tagging_mode': 'untagged'},
+        'Vlan100|Ethernet10': {'tagging_mode': 'tagged'},
+    },
+}
+
+
+@pytest.mark.parametrize('gather_subset,expected', (
+    (['all'], ['interfaces', 'metadata', 'portchannels', 'ports', 'vlans']),
+    (['min'], ['metadata']),
+    (['all', '!vlans', '!metadata'], ['interfaces', 'metadata', 'portchannels', 'ports']),
+    (['ports'], ['metadata', 'ports']),
+))
+def test_resolve_subsets(gather_subset, expected):
+    assert sonic_facts.resolve_subsets(gather_subset) == expected
+
+
+def test_resolve_subsets_invalid():
+    with pytest.raises(sonic_facts.InvalidSubsetError):
+        sonic_facts.resolve_subsets(['falafel'])
+
+
+def test_build_facts():
+    facts = sonic_facts.build_facts(['metadata'], ['ports', 'vlans'], {'CONFIG_DB': CONFIG})
+    assert facts['sonic_hostname'] == 'sonic'
+    assert facts['sonic_hwsku'] == 'Force10-S6000'
+    assert facts['sonic_config_db'] is CONFIG
+    resources = facts['ansible_network_resources']
+    assert [p['name'] for p in resources['ports']] == ['Ethernet2', 'Ethernet10']
+    assert resources['ports'][0]['enabled']
+    assert resources['vlans'] == [{
+        'vlanid': 100,
+        'dhcp_servers': ['10.1.0.2'],
+        'dhcpv6_servers': [],
+        'members': [
+            {'interface': 'Ethernet2', 'tagged': False},
+            {'interface': 'Ethernet10', 'tagged': True},
+        ],
+    }]
+
+
+def test_build_facts_databases():
+    tables = {'CONFIG_DB': CONFIG, 'STATE_DB': {'VLAN_TABLE': {}}}
+    facts = sonic_facts.build_facts(['metadata'], ['vlans'], tables, ['STATE_DB'])
+    assert 'sonic_config_db' not in facts
+    assert facts['sonic_state_db'] == {'VLAN_TABLE': {}}
+    assert facts['sonic_hostname'] == 'sonic'
+    assert facts['ansible_network_resources']['vlans'][0]['vlanid'] == 100
+
+
+def test_run_module(swss):
+    swss.load({
+        'DEVICE_METADATA': {'localhost': {'hostname': 'sw1'}},
+        'VLAN': {'Vlan10': {'vlanid': '10'}},
+    })
+    swss.load({'VLAN_TABLE': {'Vlan10': {'oper_status': 'up'}}}, db_name='STATE_DB')
+    facts = run_module(sonic_facts, dict(gather_subset=['vlans'], databases=['STATE_DB']))['ansible_facts']
+    assert facts['sonic_hostname'] == 'sw1'
+    assert facts['sonic_state_db'] == {'VLAN_TABLE': {'Vlan10': {'oper_status': 'up'}}, 'VLAN_MEMBER_TABLE': {}}
+    assert 'sonic_config_db' not in facts
@@ -4,9 +4,15 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import json
+
 import pytest
 
+from ansible_collections.community.sonic.plugins.module_utils import capabilities
+from ansible_collections.community.sonic.plugins.module_utils.configdb import ConfigDBSession
+from ansible_collections.community.sonic.plugins.module_utils.capabilities import PortCapabilities
 from ansible_collections.community.sonic.plugins.modules import sonic_interface_port
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
 
 
 PORT_TABLE = {
@@ -80,3 +86,143 @@ def test_set_fec_implicit_downgrade():
         port_table, interface='qsfp1', speed='40G')
     assert changed, 'state was expected to change'
     assert new_state['fec'] == 'none', f"got fec {new_state['fec']}"
+
+
+def test_mutate_ports():
+    port_table = {
+        'Ethernet0': {'alias': 'qsfp1', 'speed': '100000'},
+        'Ethernet4': {'alias': 'qsfp2', 'speed': '100000', 'admin_status': 'up'},
+        'Ethernet8': {'alias': 'qsfp3', 'speed': '100000', 'description': 'foo'},
+    }
+    new_states = sonic_interface_port.mutate_ports(port_table, [
+        dict(interface='qsfp1', description='uplink', enabled=None, speed=None, fec=None),
+        dict(interface='Ethernet4', description=None, enabled=True, speed=None, fec=None),
+        dict(interface='qsfp1', description='uplink', enabled=True, speed=None, fec=None),
+    ])
+    assert sorted(new_states) == ['Ethernet0', 'Ethernet4']
+    assert new_states['Ethernet0']['description'] == 'uplink'
+    assert new_states['Ethernet0']['admin_status'] == 'up'
+    assert new_states['Ethernet4'] == port_table['Ethernet4']
+    assert port_table['Ethernet0'] == {'alias': 'qsfp1', 'speed': '100000'}
+
+
+def test_mutate_ports_unknown_interface():
+    with pytest.raises(sonic_interface_port.NoSuchInterfaceError):
+        sonic_interface_port.mutate_ports(PORT_TABLE, [
+            dict(interface='qsfp99', description=None, enabled=None, speed=None, fec=None)])
+
+
+def test_run_module(swss):
+    swss.load({'PORT': {
+        'Ethernet0': {'alias': 'qsfp1', 'speed': '40000', 'description': 'uplink', 'admin_status': 'up'},
+    }})
+    result = run_module(sonic_interface_port, dict(interface='qsfp1', speed='100G', description=''), diff=True)
+    assert result['changed']
+    assert result['interface'] == 'Ethernet0'
+    port = swss.dump()['PORT']['Ethernet0']
+    assert port['speed'] == '100000'
+    assert 'description' not in port
+
+    result = run_module(sonic_interface_port, dict(interface='Ethernet0', speed='100G'))
+    assert not result['changed']
+
+
+def test_run_module_reads_one_port(swss, monkeypatch):
+    swss.load({'PORT': {f'Ethernet{i * 4}': {'alias': f'etp{i + 1}', 'speed': '100000'} for i in range(32)}})
+    tables = list()
+    get_table = ConfigDBSession.get_table
+
+    def recording_get_table(self, table):
+        tables.append(table)
+        return get_table(self, table)
+    monkeypatch.setattr(ConfigDBSession, 'get_table', recording_get_table)
+
+    result = run_module(sonic_interface_port, dict(interface='Ethernet4', description='uplink'))
+    assert result['changed']
+    assert tables == []
+    # The first alias builds the cached interface index, later ones use it
+    run_module(sonic_interface_port, dict(interface='etp3', description='uplink'))
+    tables.clear()
+    result = run_module(sonic_interface_port, dict(interface='etp4', description='uplink'))
+    assert result['interface'] == 'Ethernet12'
+    assert tables == []
+    assert swss.dump()['PORT']['Ethernet12']['description'] == 'uplink'
+
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(sonic_interface_port, dict(interface='etp99', description='uplink'))
+    assert e.value.args[0]['msg'] == 'could not find interface "etp99"'
+
+
+def test_mutate_state_capabilities():
+    caps = PortCapabilities(
+        {'interfaces': {'Ethernet0': {'lanes': '0,1,2,3', 'breakout_modes': {'1x100G[40G]': ['qsfp1']}}}},
+        {'interfaces': {'Ethernet0': {'default_brkout_mode': '1x100G[40G]'}}})
+    port_table = {'Ethernet0': {'alias': 'qsfp1', 'lanes': '0,1,2,3', 'speed': '100000', 'fec': 'rs'}}
+    with pytest.raises(sonic_interface_port.InvalidSpeedError, match='100G, 40G'):
+        sonic_interface_port.mutate_state(port_table, interface='qsfp1', speed='25G', capabilities=caps)
+    with pytest.raises(sonic_interface_port.InvalidFecError):
+        sonic_interface_port.mutate_state(port_table, interface='qsfp1', fec='fc', capabilities=caps)
+
+    # RS is not supported at 40G, it's replaced by the default
+    _, new_state, _, changed = sonic_interface_port.mutate_state(
+        port_table, interface='qsfp1', speed='40G', capabilities=caps)
+    assert changed
+    assert new_state['fec'] == 'none'
+    _, new_state, _, changed = sonic_interface_port.mutate_state(
+        port_table, interface='qsfp1', speed='100G', capabilities=caps)
+    assert not changed
+
+
+def test_run_module_unsupported_speed(swss, monkeypatch, tmp_path):
+    (tmp_path / 'x86_64-test-r0').mkdir()
+    (tmp_path / 'x86_64-test-r0' / 'platform.json').write_text(json.dumps(
+        {'interfaces': {'Ethernet0': {'lanes': '0,1,2,3', 'breakout_modes': {'1x100G[40G]': ['qsfp1']}}}}))
+    monkeypatch.setattr(capabilities, 'DEVICE_DIR', str(tmp_path))
+    monkeypatch.setenv('PLATFORM', 'x86_64-test-r0')
+    swss.load({
+        'PORT': {'Ethernet0': {'alias': 'qsfp1', 'lanes': '0,1,2,3', 'speed': '100000'}},
+        'BREAKOUT_CFG': {'Ethernet0': {'brkout_mode': '1x100G[40G]'}},
+    })
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(sonic_interface_port, dict(interface='qsfp1', speed='25G'))
+    assert 'not supported' in e.value.args[0]['msg']
+    assert swss.dump()['PORT']['Ethernet0']['speed'] == '100000'
+
+
+def test_applied_ports():
+    patch = {
+        'Ethernet0': {'set': {'speed': '40000', 'fec': 'none'}, 'delete': ['admin_status', 'description']},
+        'Ethernet4': {'set': {'alias': 'etp2'}, 'delete': []},
+    }
+    assert sonic_interface_port.applied_ports(patch) == {
+        'Ethernet0': {'speed': '40000', 'fec': 'none', 'admin_status': 'down', 'description': ''},
+    }
+
+
+def test_port_wait_targets():
+    patch = {
+        'Ethernet0': {'set': {'speed': '40000', 'fec': 'none'}, 'delete': ['admin_status']},
+        'Ethernet4': {'set': {'description': 'uplink'}, 'delete': []},
+    }
+    assert sonic_interface_port.port_wait_targets(patch) == [
+        ('APPL_DB', 'PORT_TABLE', {
+            'Ethernet0': {'speed': '40000', 'fec': 'none', 'admin_status': 'down'},
+            'Ethernet4': {'description': 'uplink'},
+        }),
+        ('STATE_DB', 'PORT_TABLE', {'Ethernet0': {'speed': '40000', 'admin_status': 'down'}}),
+    ]
+
+
+def test_wait_state_db(swss):
+    swss.load({'PORT': {'Ethernet0': {'speed': '100000'}}})
+    swss.load({'PORT_TABLE': {'Ethernet0': {'speed': '100000', 'admin_status': 'up'}}}, 'APPL_DB')
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(sonic_interface_port, dict(interface='Ethernet0', enabled=True, wait=True, wait_timeout=0))
+    assert e.value.args[0]['msg'] == 'timed out after 0 seconds waiting for STATE_DB PORT_TABLE Ethernet0'
+
+    # The operational status isn't waited for
+    swss.load({'PORT_TABLE': {'Ethernet0': {'admin_status': 'down'}}}, 'APPL_DB')
+    swss.load({'PORT_TABLE': {'Ethernet0': {'admin_status': 'down', 'netdev_oper_status': 'down'}}}, 'STATE_DB')
+    result = run_module(sonic_interface_port, dict(interface='Ethernet0', enabled=False, wait=True, wait_timeout=0))
+    assert result['changed']
+    assert 'waited' in result
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.sonic.plugins.modules import sonic_snapshot
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import run_module
+
+
+def test_run_module(swss):
+    swss.load({
+        'PORT': {'Ethernet0': {'alias': 'fortyGigE0/0', 'speed': '40000'}},
+        'VLAN': {'Vlan100': {'vlanid': '100'}},
+        'VLAN_MEMBER': {'Vlan100|Ethernet0': {'tagging_mode': 'untagged'}},
+        'ACL_TABLE': {'DATAACL': {'type': 'L3'}},
+    })
+    swss.reset()
+    result = run_module(sonic_snapshot, dict())
+    assert not result['changed']
+    assert result['ansible_facts']['sonic_snapshot'] == {
+        'tables': {
+            'PORT': {'Ethernet0': {'alias': 'fortyGigE0/0', 'speed': '40000'}},
+            'VLAN': {'Vlan100': {'vlanid': '100'}},
+            'VLAN_MEMBER': {'Vlan100|Ethernet0': {'tagging_mode': 'untagged'}},
+        },
+        'namespace': '',
+    }
+    # The tables are scanned in one pipeline and their entries read in another
+    assert swss.round_trips() == 2
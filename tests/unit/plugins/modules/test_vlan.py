@@ -4,7 +4,11 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils.entries import diff_table
 from ansible_collections.community.sonic.plugins.modules import vlan
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
 
 
 def test_check_address():
@@ -28,3 +32,96 @@ def test_build_vlan_entry_absent():
     key, val = vlan.build_vlan_entry(vlanid=3360, state='absent', dhcp_servers=['127.0.0.1', '::1'])
     assert key == 'Vlan3360'
     assert val is None
+
+
+def test_build_vlan_entries():
+    entries = vlan.build_vlan_entries([
+        dict(vlanid='100-102,200', state='present', dhcp_servers=['127.0.0.1']),
+        dict(vlanid='102', state='absent', dhcp_servers=[]),
+    ])
+    assert list(entries) == ['Vlan100', 'Vlan101', 'Vlan102', 'Vlan200']
+    assert entries['Vlan100'].get('dhcp_servers') == ['127.0.0.1']
+    assert entries['Vlan102'] is None
+
+
+def test_build_vlan_entries_out_of_range():
+    with pytest.raises(ValueError):
+        vlan.build_vlan_entries([dict(vlanid='4090-4095', state='present', dhcp_servers=[])])
+
+
+def test_build_vlan_entry_idempotent():
+    key, val = vlan.build_vlan_entry(vlanid=3360, state='present', dhcp_servers=['127.0.0.2', '127.0.0.1'])
+    cur_table = {key: {'vlanid': '3360', 'dhcp_servers': ['127.0.0.1', '127.0.0.2']}}
+    assert diff_table({key: val}, cur_table, 'replaced', 'VLAN') == {}
+
+
+def test_run_module(swss):
+    swss.load({'VLAN': {'Vlan100': {'vlanid': '100'}}})
+    result = run_module(vlan, dict(vlans=[dict(vlanid='100-101', dhcp_servers=['10.1.0.2', '::1'])]))
+    assert result['changed']
+    assert swss.dump()['VLAN'] == {
+        'Vlan100': {'vlanid': '100', 'dhcp_servers': ['10.1.0.2'], 'dhcpv6_servers': ['::1']},
+        'Vlan101': {'vlanid': '101', 'dhcp_servers': ['10.1.0.2'], 'dhcpv6_servers': ['::1']},
+    }
+    # get_table reads every key, mod_config is a single pipeline
+    assert swss.round_trips() == 3
+
+    swss.reset()
+    result = run_module(vlan, dict(vlans=[dict(vlanid='100-101', dhcp_servers=['::1', '10.1.0.2'])]))
+    assert not result['changed']
+    assert ('hset', 'VLAN|Vlan100') not in swss.events()
+
+    result = run_module(vlan, dict(vlanid=100, state='absent'))
+    assert result['changed']
+    assert list(swss.dump()['VLAN']) == ['Vlan101']
+
+
+def test_run_module_perf(swss, monkeypatch):
+    monkeypatch.setenv('ANSIBLE_SONIC_PERF', 'true')
+    result = run_module(vlan, dict(vlanid=100))
+    perf = result['perf']
+    assert set(perf['phases']) == {'import', 'connect', 'read', 'write', 'compute'}
+    # Look up the VLAN and write it
+    assert perf['round_trips'] == 2
+    assert perf['bytes_written'] > 0
+
+    result = run_module(vlan, dict(vlanid=100, perf=False))
+    assert 'perf' not in result
+
+
+def test_run_module_plan(swss, tmp_path):
+    swss.load({'VLAN': {'Vlan100': {'vlanid': '100'}}})
+    plan = str(tmp_path / 'vlan.plan')
+    args = dict(vlans=[dict(vlanid='100-110', dhcp_servers=['10.1.0.2'])])
+    result = run_module(vlan, dict(args, plan=plan))
+    assert result['changed']
+    assert result['plan'] == {'path': plan, 'batches': 1, 'keys': 11}
+    assert swss.dump()['VLAN'] == {'Vlan100': {'vlanid': '100'}}
+
+    swss.reset()
+    result = run_module(vlan, dict(args, apply_plan=plan), check_mode=True)
+    assert result['changed']
+    assert swss.dump()['VLAN'] == {'Vlan100': {'vlanid': '100'}}
+
+    result = run_module(vlan, dict(args, apply_plan=plan))
+    assert result['plan']['keys'] == 11
+    assert len(swss.dump()['VLAN']) == 11
+    assert swss.dump()['VLAN']['Vlan110'] == {'vlanid': '110', 'dhcp_servers': ['10.1.0.2']}
+
+    # The entries changed since the plan was made
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(vlan, dict(args, apply_plan=plan))
+    assert e.value.args[0]['plan_stale']
+
+
+def test_run_module_plan_snapshot(swss, tmp_path):
+    snapshot = {'VLAN': {'Vlan100': {'vlanid': '100'}}}
+    swss.load(snapshot)
+    result = run_module(vlan, dict(vlanid=10, plan=str(tmp_path / 'vlan.plan'), snapshot=snapshot))
+    assert result['changed']
+    # Nothing is written, so the snapshot isn't updated
+    assert 'snapshot_update' not in result
+    assert swss.dump() == snapshot
+
+    result = run_module(vlan, dict(vlanid=10, snapshot=snapshot))
+    assert result['snapshot_update'] == {'VLAN': {'Vlan10': {'vlanid': '10'}}}
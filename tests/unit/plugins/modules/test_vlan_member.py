@@ -4,7 +4,15 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils.interfaces import InterfaceIndex
 from ansible_collections.community.sonic.plugins.modules import vlan_member
+from ansible_collections.community.sonic.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+INTERFACES = InterfaceIndex.from_tables(
+    {f'Ethernet{i * 4}': {'alias': f'qsfp{i + 1}'} for i in range(32)},
+    {'PortChannel0001': {}})
 
 
 def test_build_vlan_member_entry_present():
@@ -21,3 +29,80 @@ def test_build_vlan_member_entry_absent():
     key, val = vlan_member.build_vlan_member_entry(vlanid=3360, interface='Ethernet90', state='absent', tagged=None)
     assert key == 'Vlan3360|Ethernet90'
     assert val is None
+
+
+def test_build_vlan_member_entries():
+    members = [
+        dict(vlanid='10-11', interfaces=['Ethernet0-8/4', 'qsfp1'], state='present', tagged=True),
+        dict(vlanid='11', interfaces=['Ethernet4'], state='absent', tagged=None),
+    ]
+    entries = vlan_member.build_vlan_member_entries(members, INTERFACES)
+    assert entries['Vlan10|Ethernet0'] == {'tagging_mode': 'tagged'}
+    assert entries['Vlan11|Ethernet8'] == {'tagging_mode': 'tagged'}
+    assert entries['Vlan11|Ethernet4'] is None
+    assert len(entries) == 6
+
+
+def test_build_vlan_member_entries_unknown_interface():
+    members = [dict(vlanid='10', interfaces=['PortChannel0001', 'Ethernt4'], state='present', tagged=True)]
+    with pytest.raises(ValueError, match='Ethernt4'):
+        vlan_member.build_vlan_member_entries(members, INTERFACES)
+
+    # Memberships of ports that are gone can still be removed
+    members = [dict(vlanid='10', interfaces=['Ethernet200'], state='absent', tagged=None)]
+    assert vlan_member.build_vlan_member_entries(members, INTERFACES) == {'Vlan10|Ethernet200': None}
+
+
+def test_diff_vlan_members():
+    entries = {
+        'Vlan10|Ethernet0': {'tagging_mode': 'tagged'},
+        'Vlan10|Ethernet4': {'tagging_mode': 'untagged'},
+        'Vlan10|Ethernet8': None,
+    }
+    cur_table = {
+        'Vlan10|Ethernet4': {'tagging_mode': 'tagged'},
+        'Vlan10|Ethernet8': {'tagging_mode': 'tagged'},
+        'Vlan20|Ethernet8': {'tagging_mode': 'tagged'},
+    }
+    changes, added, retagged, removed = vlan_member.diff_vlan_members(entries, cur_table, exclusive=False)
+    assert added == ['Vlan10|Ethernet0']
+    assert retagged == ['Vlan10|Ethernet4']
+    assert removed == ['Vlan10|Ethernet8']
+    assert 'Vlan20|Ethernet8' not in changes
+
+    changes, added, retagged, removed = vlan_member.diff_vlan_members(entries, cur_table, exclusive=True)
+    assert removed == ['Vlan10|Ethernet8', 'Vlan20|Ethernet8']
+
+
+def test_run_module(swss):
+    swss.load({
+        'PORT': {'Ethernet0': {'alias': 'qsfp1'}, 'Ethernet4': {'alias': 'qsfp2'}},
+        'VLAN_MEMBER': {('Vlan10', 'Ethernet8'): {'tagging_mode': 'untagged'}},
+    })
+    members = [dict(vlanid='100-101', interfaces=['qsfp1', 'Ethernet4'], tagged=True)]
+    result = run_module(vlan_member, dict(members=members, exclusive=True))
+    assert result['added'] == ['Vlan100|Ethernet0', 'Vlan100|Ethernet4', 'Vlan101|Ethernet0', 'Vlan101|Ethernet4']
+    assert result['removed'] == ['Vlan10|Ethernet8']
+    assert sorted(swss.dump()['VLAN_MEMBER']) == result['added']
+
+    result = run_module(vlan_member, dict(members=members, exclusive=True))
+    assert not result['changed']
+
+
+def test_run_module_unknown_interface(swss):
+    swss.load({'PORT': {'Ethernet0': {'alias': 'qsfp1'}}})
+    with pytest.raises(AnsibleFailJson) as e:
+        run_module(vlan_member, dict(vlanid=100, interface='qsfp2', tagged=False))
+    assert e.value.args[0]['msg'] == 'could not find interface "qsfp2"'
+    assert 'VLAN_MEMBER' not in swss.dump()
+
+    result = run_module(vlan_member, dict(vlanid=100, interface='qsfp1', tagged=False))
+    assert result['changed']
+    assert swss.dump()['VLAN_MEMBER'] == {'Vlan100|Ethernet0': {'tagging_mode': 'untagged'}}
+
+
+def test_run_module_check_mode(swss):
+    swss.load({'PORT': {'Ethernet0': {'alias': 'qsfp1'}}})
+    result = run_module(vlan_member, dict(vlanid=100, interface='Ethernet0', tagged=False), check_mode=True)
+    assert result['changed']
+    assert 'VLAN_MEMBER' not in swss.dump()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import contextlib
+import json
+
+from unittest.mock import patch
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+
+try:
+    from ansible.module_utils.testing import patch_module_args
+except ImportError:
+    # ansible-core < 2.19
+    @contextlib.contextmanager
+    def patch_module_args(args=None):
+        args = to_bytes(json.dumps({'ANSIBLE_MODULE_ARGS': args or dict()}))
+        with patch.object(basic, '_ANSIBLE_ARGS', args):
+            yield
+
+
+class AnsibleExitJson(Exception):
+    pass
+
+
+class AnsibleFailJson(Exception):
+    pass
+
+
+def exit_json(self, **kwargs):
+    kwargs.setdefault('changed', False)
+    raise AnsibleExitJson(kwargs)
+
+
+def fail_json(self, **kwargs):
+    kwargs['failed'] = True
+    raise AnsibleFailJson(kwargs)
+
+
+def run_module(module, args, check_mode=False, diff=False):
+    """Run the run_module function of a module, returning its result
+
+    Raises AnsibleFailJson with the result if the module fails.
+    """
+    args = dict(args, _ansible_check_mode=check_mode, _ansible_diff=diff)
+    with patch_module_args(args), \
+            patch.object(basic.AnsibleModule, 'exit_json', exit_json), \
+            patch.object(basic.AnsibleModule, 'fail_json', fail_json):
+        try:
+            module.run_module()
+        except AnsibleExitJson as e:
+            return e.args[0]
+    raise AssertionError('the module did not call exit_json')
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import tempfile
+from types import SimpleNamespace
+
+from ansible_collections.community.sonic.plugins.plugin_utils.controller import ControllerActionModule, run_on_controller
+from ansible_collections.community.sonic.plugins.plugin_utils.resp import RespClient
+from ansible_collections.community.sonic.tests.unit.plugins.fake_configdb import FakeSwsscommon
+from ansible_collections.community.sonic.tests.unit.plugins.fake_redis_server import FakeRedisServer
+
+
+def run(swss, module_name, args, host=None):
+    with FakeRedisServer(swss) as server:
+        return run_on_controller(module_name, args, lambda: RespClient.tcp('127.0.0.1', server.port), host)
+
+
+def test_run_on_controller():
+    swss = FakeSwsscommon()
+    swss.load({'VLAN': {'Vlan10': {'vlanid': '10'}}})
+
+    result = run(swss, 'community.sonic.vlan', {'vlanid': 20})
+    assert result['changed'] is True
+    assert swss.dump()['VLAN'] == {'Vlan10': {'vlanid': '10'}, 'Vlan20': {'vlanid': '20'}}
+
+    result = run(swss, 'community.sonic.vlan', {'vlanid': 20})
+    assert result['changed'] is False
+
+    result = run(swss, 'community.sonic.get_entry', {'table': 'VLAN', 'key': 'Vlan20'})
+    assert result['value'] == {'vlanid': '20'}
+
+
+def test_run_on_controller_check_mode():
+    swss = FakeSwsscommon()
+    result = run(swss, 'community.sonic.vlan', {'vlanid': 20, '_ansible_check_mode': True})
+    assert result['changed'] is True
+    assert swss.dump() == {}
+
+
+def test_run_on_controller_hosts(monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    switch_a = FakeSwsscommon()
+    switch_a.load({'VLAN': {'Vlan10': {'vlanid': '10'}}})
+    switch_b = FakeSwsscommon()
+
+    # The same checkpoint on two switches, Vlan10 only exists on switch_a before it
+    for swss, host in ((switch_a, 'switch-a:22'), (switch_b, 'switch-b:22')):
+        run(swss, 'community.sonic.vlan', {'vlanid': 10, 'checkpoint': 'cw'}, host)
+    assert switch_b.dump()['VLAN'] == {'Vlan10': {'vlanid': '10'}}
+
+    result = run(switch_a, 'community.sonic.rollback', {'checkpoint': 'cw'}, 'switch-a:22')
+    assert result['changed'] is False
+    assert switch_a.dump()['VLAN'] == {'Vlan10': {'vlanid': '10'}}
+
+    result = run(switch_b, 'community.sonic.rollback', {'checkpoint': 'cw'}, 'switch-b:22')
+    assert result['changed'] is True
+    assert switch_b.dump() == {}
+
+
+def test_run_on_controller_failed():
+    result = run(FakeSwsscommon(), 'community.sonic.vlan', {'vlanid': 20, 'state': 'unknown'})
+    assert result['failed'] is True
+
+
+class RecordingActionModule(ControllerActionModule):
+    """Records the calls to run the module on the switch instead of running it"""
+
+    def __init__(self, connection, async_val=0):
+        self._connection = connection
+        self._task = SimpleNamespace(async_val=async_val, check_mode=False, diff=False, no_log=False)
+        self.calls = list()
+
+    def _execute_module(self, **kwargs):
+        self.calls.append(('execute', kwargs['wrap_async']))
+        return {'ansible_job_id': '1'} if kwargs['wrap_async'] else {'changed': False}
+
+    def _remove_tmp_path(self, tmpdir):
+        self.calls.append(('remove', tmpdir))
+
+
+def test_execute_module_async():
+    connection = SimpleNamespace(has_native_async=False, _shell=SimpleNamespace(tmpdir='/tmp/x'))
+    action = RecordingActionModule(connection, async_val=30)
+    assert action.execute_module('community.sonic.vlan', {'vlanid': 10}, {}) == {'ansible_job_id': '1'}
+    # The async wrapper removes the temporary directory when the module is done
+    assert action.calls == [('execute', True)]
+
+    action = RecordingActionModule(connection)
+    assert action.execute_module('community.sonic.vlan', {'vlanid': 10}, {}) == {'changed': False}
+    assert action.calls == [('execute', False), ('remove', '/tmp/x')]
+
+    action = RecordingActionModule(SimpleNamespace(redis_client=lambda: None), async_val=30)
+    result = action.execute_module('community.sonic.vlan', {'vlanid': 10}, {})
+    assert result['failed'] is True
+    assert 'async is not supported' in result['msg']
+    assert action.calls == []
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.sonic.plugins.module_utils.configdb import ConfigDBSession
+from ansible_collections.community.sonic.plugins.plugin_utils.resp import RedisConnector, RespClient, RespError, encode_command
+from ansible_collections.community.sonic.tests.unit.plugins.fake_configdb import FakeSwsscommon
+from ansible_collections.community.sonic.tests.unit.plugins.fake_redis_server import FakeRedisServer
+
+
+@pytest.fixture
+def server():
+    swss = FakeSwsscommon()
+    swss.load({
+        'VLAN': {'Vlan10': {'vlanid': '10', 'dhcp_servers': ['10.0.0.1', '10.0.0.2']}},
+        'VLAN_MEMBER': {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}},
+        'PORT': {'Ethernet0': {'speed': '100000'}},
+    })
+    swss.load({'PORT_TABLE': {'Ethernet0': {'oper_status': 'up'}}}, 'STATE_DB')
+    # APPL_DB separates the table and the key with ':'
+    swss.store('APPL_DB').data['PORT_TABLE:Ethernet0'] = {'speed': '100000'}
+    with FakeRedisServer(swss) as server:
+        yield server
+
+
+def connector(server, db_name='CONFIG_DB'):
+    c = RedisConnector(RespClient.tcp('127.0.0.1', server.port))
+    c.db_connect(db_name)
+    return c
+
+
+def test_encode_command():
+    assert encode_command(('HGETALL', 'VLAN|Vlan10')) == b'*2\r\n$7\r\nHGETALL\r\n$11\r\nVLAN|Vlan10\r\n'
+
+
+def test_read(server):
+    c = connector(server)
+    assert c.get_entry('VLAN', 'Vlan10') == {'vlanid': '10', 'dhcp_servers': ['10.0.0.1', '10.0.0.2']}
+    assert c.get_entry('VLAN', 'Vlan20') == {}
+    assert c.get_keys('VLAN_MEMBER') == [('Vlan10', 'Ethernet0')]
+    assert c.get_table('VLAN_MEMBER') == {('Vlan10', 'Ethernet0'): {'tagging_mode': 'tagged'}}
+    assert set(c.get_config()) == {'VLAN', 'VLAN_MEMBER', 'PORT'}
+    assert connector(server, 'STATE_DB').get_table('PORT_TABLE') == {'Ethernet0': {'oper_status': 'up'}}
+    assert connector(server, 'APPL_DB').get_entry('PORT_TABLE', 'Ethernet0') == {'speed': '100000'}
+
+
+def test_errors(server):
+    c = connector(server)
+    with pytest.raises(RespError):
+        c.client.execute('NOSUCHCOMMAND')
+    assert c.client.execute('PING') == 'PONG'
+
+
+def test_session(server):
+    c = connector(server)
+    session = ConfigDBSession(c)
+    assert session.get_entry('VLAN', 'Vlan10')['vlanid'] == '10'
+    assert list(session.scan_keys('VLAN', 'Vlan*')) == ['Vlan10']
+    tables = session.get_tables(['VLAN_MEMBER', 'PORT', 'PORTCHANNEL'])
+    assert tables == {'VLAN_MEMBER': {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}}, 'PORT': {'Ethernet0': {'speed': '100000'}},
+                      'PORTCHANNEL': {}}
+    session.set_entry('VLAN', 'Vlan20', {'vlanid': '20'})
+    session.set_entry('VLAN', 'Vlan10', {'vlanid': '10'})
+    session.set_entry('VLAN_MEMBER', 'Vlan10|Ethernet0', None)
+    session.flush()
+
+    swss = server.swss
+    assert swss.dump()['VLAN'] == {'Vlan10': {'vlanid': '10'}, 'Vlan20': {'vlanid': '20'}}
+    assert 'VLAN_MEMBER' not in swss.dump()
+
+    session = ConfigDBSession(connector(server, 'APPL_DB'))
+    assert session.get_tables(['PORT_TABLE', 'LAG_TABLE']) == {'PORT_TABLE': {'Ethernet0': {'speed': '100000'}}, 'LAG_TABLE': {}}
+
+
+def test_transaction(server):
+    c = connector(server)
+    pipe = c.get_redis_client('CONFIG_DB').pipeline()
+    pipe.hset('VLAN|Vlan20', mapping={'vlanid': '20'})
+    pipe.hdel('VLAN|Vlan10', 'dhcp_servers@')
+    pipe.delete('PORT|Ethernet0')
+    pipe.hgetall('VLAN|Vlan10')
+    # Sent in one MULTI/EXEC transaction
+    assert pipe.execute() == [1, 1, 1, {'vlanid': '10'}]
+    assert c.client.round_trips == 2
+    assert server.swss.dump() == {
+        'VLAN': {'Vlan10': {'vlanid': '10'}, 'Vlan20': {'vlanid': '20'}},
+        'VLAN_MEMBER': {'Vlan10|Ethernet0': {'tagging_mode': 'tagged'}},
+    }
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=disallowed-name
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from types import SimpleNamespace
+
+from ansible.utils.display import Display
+
+from ansible_collections.community.sonic.plugins.plugin_utils.snapshot import (
+    SnapshotActionModule, merge_snapshot, select_tables, snapshot_matches)
+
+
+SNAPSHOT = {
+    'tables': {
+        'VLAN': {
+            'Vlan10': {'vlanid': '10'},
+            'Vlan20': {'vlanid': '20'},
+        },
+    },
+    'namespace': '',
+}
+
+
+def test_select_tables():
+    assert select_tables(SNAPSHOT, ('VLAN', 'PORT')) == {'VLAN': SNAPSHOT['tables']['VLAN']}
+    assert select_tables(SNAPSHOT, ('PORT',)) is None
+    assert select_tables(None, ('VLAN',)) is None
+
+
+def test_merge_snapshot():
+    snapshot = merge_snapshot(SNAPSHOT, {
+        'VLAN': {'Vlan10': {'vlanid': '10', 'mtu': '9100'}, 'Vlan20': None},
+        'PORT': {'Ethernet0': {'speed': '100000'}},
+    })
+    assert snapshot == {'tables': {'VLAN': {'Vlan10': {'vlanid': '10', 'mtu': '9100'}}}, 'namespace': ''}
+    assert 'Vlan20' in SNAPSHOT['tables']['VLAN']
+
+
+def test_snapshot_matches():
+    assert snapshot_matches(SNAPSHOT, {'vlanid': 10})
+    assert snapshot_matches(SNAPSHOT, {'vlanid': 10, 'namespace': None})
+    assert not snapshot_matches(SNAPSHOT, {'vlanid': 10, 'namespace': 'asic0'})
+    assert not snapshot_matches(SNAPSHOT, {'vlanid': 10, 'all_namespaces': True})
+    assert snapshot_matches(dict(SNAPSHOT, namespace='asic0'), {'vlanid': 10, 'namespace': 'asic0'})
+    assert not snapshot_matches(None, {'vlanid': 10})
+
+
+class RecordingActionModule(SnapshotActionModule):
+    """Records the arguments the module is run with, the results are given in order"""
+
+    def __init__(self, args, results):
+        self._task = SimpleNamespace(args=args, action='community.sonic.vlan', resolved_action='community.sonic.vlan',
+                                     async_val=0, check_mode=False)
+        self._connection = SimpleNamespace(_shell=SimpleNamespace(tmpdir='/tmp/x'))
+        self._display = Display()
+        self.results = list(results)
+        self.calls = list()
+
+    def snapshot_tables(self, module_args):
+        return ('VLAN',)
+
+    def execute_module(self, module_name, module_args, task_vars):
+        self.calls.append(dict(module_args))
+        return self.results.pop(0)
+
+
+def test_run_once():
+    action = RecordingActionModule({'vlanid': 30}, [{'changed': True, 'snapshot_update': {'VLAN': {'Vlan30': {'vlanid': '30'}}}}])
+    result = action.run(task_vars={'sonic_snapshot': SNAPSHOT})
+    assert action.calls == [{'vlanid': 30, 'snapshot': {'VLAN': SNAPSHOT['tables']['VLAN']}}]
+    assert result['changed']
+    assert 'Vlan30' in result['ansible_facts']['sonic_snapshot']['tables']['VLAN']
+    assert 'snapshot_update' not in result
+
+    action = RecordingActionModule({'vlanid': 30}, [{'changed': False}])
+    action.run(task_vars={})
+    assert action.calls == [{'vlanid': 30}]
+
+
+def test_run_stale():
+    action = RecordingActionModule({'vlanid': 30}, [{'snapshot_stale': True}, {'changed': True}])
+    result = action.run(task_vars={'sonic_snapshot': SNAPSHOT})
+    assert action.calls == [{'vlanid': 30, 'snapshot': {'VLAN': SNAPSHOT['tables']['VLAN']}}, {'vlanid': 30}]
+    assert result['changed']